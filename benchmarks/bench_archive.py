@@ -0,0 +1,117 @@
+"""
+Parquet account archive vs the same data as CSV.
+
+Builds one large synthetic account (``--years`` of readings with appliance
+hours in both JSON shapes) and writes it both ways with the same columns —
+Year, Month, Units, Bill, Rate and the appliance JSON — one year at a time.
+It then compares file size, write time, restore-side parsing (every row
+validated by archive.normalise_record) and a plain pandas load of the sort
+an analyst would do. Parquet runs twice: with the default row groups, and
+with one row group per year to show what the per-group overhead costs.
+
+    python -m benchmarks.bench_archive [--years 100] [--repeat 20]
+"""
+import argparse
+import csv
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.suite import synthetic_user
+from voltiq import archive
+
+
+def by_year(u):
+    years = {}
+    for year, month, units, bill, rate in u["entries"]:
+        years.setdefault(year, ([], []))[0].append((month, units, bill, rate))
+    for year, month, hours in u["appliance_rows"]:
+        years.setdefault(year, ([], []))[1].append((month, hours))
+    return years
+
+
+def write_parquet(years, sink, row_group_months=archive.ROW_GROUP_MONTHS):
+    with archive.pq.ParquetWriter(sink, archive._schema({"voltiq.format": archive.FORMAT_VERSION}),
+                                  compression="zstd") as writer:
+        archive.write_years(writer, (archive.year_table(y, *years[y]) for y in sorted(years)), row_group_months)
+
+
+def write_csv(years, sink):
+    writer = csv.writer(sink)
+    writer.writerow(["Year", "Month", "Units", "Bill", "Rate", "Appliances"])
+    for year in sorted(years):
+        for record in archive.year_table(year, *years[year]).to_pylist():
+            writer.writerow(["" if record[c] is None else record[c] for c in archive.COLUMNS])
+
+
+def parse_parquet(buf):
+    buf.seek(0)
+    return sum(len(e) + len(a) for e, a, _ in archive.iter_years(buf))
+
+
+def parse_csv(text):
+    count = 0
+    for row in csv.DictReader(io.StringIO(text)):
+        record = {
+            "year":       int(row["Year"]),
+            "month":      row["Month"],
+            "units":      float(row["Units"]) if row["Units"] else None,
+            "bill":       float(row["Bill"]) if row["Bill"] else None,
+            "rate":       float(row["Rate"]) if row["Rate"] else None,
+            "appliances": row["Appliances"] or None,
+        }
+        entry, appliance_row = archive.normalise_record(record)
+        count += (entry is not None) + (appliance_row is not None)
+    return count
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    if not archive.PARQUET_AVAILABLE:
+        print("pyarrow is not installed; nothing to compare")
+        return
+
+    u = synthetic_user(np.random.default_rng(24), 0, args.years, 1999 + args.years)
+    years = by_year(u)
+
+    csv_buf = io.StringIO()
+    write_csv(years, csv_buf)
+    csv_text = csv_buf.getvalue()
+    variants = {"Parquet": archive.ROW_GROUP_MONTHS, "PQ per year": 1}
+    buffers  = {}
+    for name, group in variants.items():
+        buffers[name] = io.BytesIO()
+        write_parquet(years, buffers[name], group)
+        assert parse_parquet(buffers[name]) == parse_csv(csv_text) == len(u["entries"]) + len(u["appliance_rows"])
+
+    print(f"{len(years)} years, {len(u['entries'])} readings, {len(u['appliance_rows'])} appliance rows")
+    print(f"{'':<16} | " + " | ".join(f"{name:>11}" for name in (*variants, "CSV")))
+    sizes = [len(b.getvalue()) / 1024 for b in buffers.values()] + [len(csv_text.encode()) / 1024]
+    print(f"{'size (KiB)':<16} | " + " | ".join(f"{size:>11.1f}" for size in sizes))
+    for label, pq_fn, csv_fn in (
+        ("write ms",         lambda b, g: write_parquet(years, io.BytesIO(), g), lambda: write_csv(years, io.StringIO())),
+        ("restore parse ms", lambda b, g: parse_parquet(b),                      lambda: parse_csv(csv_text)),
+        ("pandas load ms",   lambda b, g: pd.read_parquet(io.BytesIO(b.getvalue())),
+                             lambda: pd.read_csv(io.StringIO(csv_text))),
+    ):
+        times = [best_ms(lambda: pq_fn(buffers[name], group), args.repeat) for name, group in variants.items()]
+        times.append(best_ms(csv_fn, args.repeat))
+        print(f"{label:<16} | " + " | ".join(f"{t:>11.2f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Appliance-wise yearly cost attribution: the old per-month, per-appliance
+loop vs the matrix version in voltiq.appliances.
+
+Inputs are random multi-year histories with a mix of both appliance-hours
+JSONB shapes. Every run checks that both paths give the same kWh and cost
+per appliance, in the same order.
+
+It then checks the yearly_summary path: store.appliance_totals(), the SQL
+aggregate over appliance_usage, must give yearly_appliance_breakdown()'s
+numbers for the same stored rows, in the same order, to 1e-12 relative
+(they differ only in float summation order). Pass --dsn to check the real
+SQL on Postgres; the stand-in runs its emulation of it.
+
+    python -m benchmarks.bench_attribution [--dsn postgresql://localhost/voltiq_bench]
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from benchmarks.standin import StandinDatabase
+from benchmarks.suite import populate_postgres, populate_standin, synthetic_user
+from voltiq import db
+from voltiq.appliances import APPLIANCES, effective_hours, yearly_appliance_breakdown
+from voltiq.constants import MONTH_NAMES
+from voltiq.store import appliance_totals, load_all_appliance_data, load_user_data
+from voltiq.tariff import calculate_bills
+
+SQL_TOLERANCE = 1e-12
+
+
+def loop_breakdown(month_rows, appliance_rows, supplier):
+    """The dashboard's original attribution loop, kept as the reference."""
+    month_bill  = {r[0]: r[2] for r in month_rows}
+    month_units = {r[0]: r[1] for r in month_rows}
+    yearly_units, yearly_cost = {}, {}
+    for month_name, hours_json in appliance_rows:
+        actual_bill  = month_bill.get(month_name, 0)
+        actual_units = month_units.get(month_name, 0)
+        if actual_bill == 0 or actual_units == 0:
+            continue
+        month_kwh = {}
+        for appliance, wattage in APPLIANCES.items():
+            hrs = effective_hours(hours_json, appliance)
+            if hrs > 0:
+                month_kwh[appliance] = (wattage * hrs * 30) / 1000
+        raw_total_kwh = sum(month_kwh.values())
+        if raw_total_kwh == 0:
+            continue
+        for appliance, raw_kwh in month_kwh.items():
+            scaled_kwh = (raw_kwh / raw_total_kwh) * actual_units
+            yearly_units[appliance] = yearly_units.get(appliance, 0) + scaled_kwh
+        month_costs = dict(zip(month_kwh, calculate_bills(list(month_kwh.values()), supplier)["total"]))
+        raw_cost_total = sum(month_costs.values())
+        for appliance, cost in month_costs.items():
+            normalised = (cost / raw_cost_total) * actual_bill
+            yearly_cost[appliance] = yearly_cost.get(appliance, 0) + normalised
+    return yearly_units, yearly_cost
+
+
+def random_year(rng):
+    names = list(APPLIANCES)
+    month_rows, appliance_rows = [], []
+    for m in MONTH_NAMES:
+        units = float(rng.uniform(50, 900))
+        month_rows.append((m, units, round(units * 8.5, 2), 8.5))
+        hours = {}
+        for a in names:
+            if rng.random() < 0.7:
+                hrs = round(float(rng.uniform(0, 12)), 2)
+                hours[a] = {"qty": int(rng.integers(1, 4)), "hrs": hrs} if rng.random() < 0.5 else hrs
+        appliance_rows.append((m, hours))
+    return month_rows, appliance_rows
+
+
+def check_sql_totals(users):
+    """
+    Compare store.appliance_totals() with yearly_appliance_breakdown() on
+    every stored year with appliance rows. Returns (years, worst relative error).
+    """
+    years, worst = 0, 0.0
+    with db.connection() as conn:
+        cur = conn.cursor()
+        for u in users:
+            name = u["username"]
+            for year in sorted({r[0] for r in u["appliance_rows"]}):
+                months, units, cost = appliance_totals(cur, name, year)
+                appliance_rows = load_all_appliance_data(name, year)
+                ref_units, ref_cost = yearly_appliance_breakdown(load_user_data(name, year), appliance_rows,
+                                                                 u["supplier"])
+                assert months == len(appliance_rows), (name, year, months, len(appliance_rows))
+                for got, ref in ((units, ref_units), (cost, ref_cost)):
+                    assert list(got) == list(ref), (name, year, list(got), list(ref))
+                    for a, value in ref.items():
+                        error = abs(got[a] - value) / abs(value) if value else abs(got[a])
+                        assert error <= SQL_TOLERANCE, (name, year, a, got[a], value)
+                        worst = max(worst, error)
+                years += 1
+        cur.close()
+    return years, worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--dsn", help="check the SQL aggregate on this Postgres instead of the stand-in")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(7)
+    print(f"{'years':>5} | {'loop ms':>8} | {'matrix ms':>9} | {'speedup':>7}")
+    for n_years in (1, 5, 20, 50):
+        years = [random_year(rng) for _ in range(n_years)]
+        for month_rows, appliance_rows in years:
+            ref = loop_breakdown(month_rows, appliance_rows, "MSEDCL")
+            new = yearly_appliance_breakdown(month_rows, appliance_rows, "MSEDCL")
+            assert [list(d.items()) for d in ref] == [list(d.items()) for d in new]
+
+        reps = max(1, 200 // n_years)
+        loop_s   = timeit.timeit(lambda: [loop_breakdown(*y, "MSEDCL") for y in years], number=reps) / reps
+        matrix_s = timeit.timeit(lambda: [yearly_appliance_breakdown(*y, "MSEDCL") for y in years], number=reps) / reps
+        print(f"{n_years:>5} | {loop_s * 1000:>8.2f} | {matrix_s * 1000:>9.2f} | {loop_s / matrix_s:>6.1f}x")
+
+    users = [synthetic_user(rng, i, 4, 2025) for i in range(args.users)]
+    if args.dsn:
+        from voltiq import migrations
+        pool = db.configure(args.dsn, maxconn=4)
+        migrations.ensure_schema(pool.connection)
+        populate_postgres(users)
+    else:
+        db.set_pool(StandinDatabase())
+        populate_standin(db.get_pool(), users)
+    years, worst = check_sql_totals(users)
+    print(f"SQL totals ({'postgres' if args.dsn else 'stand-in'}): {years} years match, "
+          f"worst relative error {worst:.1e} (tolerance {SQL_TOLERANCE:.0e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Forecast model backtest on synthetic households.
+
+Each household gets a random appliance mix; its monthly kWh follows that
+mix through SEASONAL_MULTIPLIERS, with a slow trend, ±12% noise and the
+occasional skipped month. Every model forecasts every month that has three
+earlier readings, in one batched call per model; the seasonal-multiplier
+model sees each household's survey. The run also checks the
+batched weighted moving average against predict_next_units().
+
+    python -m benchmarks.bench_forecast [--users N]
+"""
+import argparse
+
+import numpy as np
+
+from voltiq.appliances import APPLIANCES, seasonal_load_index, survey_monthly_units
+from voltiq.constants import MONTH_NAMES
+from voltiq.forecast import (
+    WeightedMovingAverage, backtest, history_matrix, predict_next_units, print_backtest,
+)
+
+
+def random_household(rng, n_months=48):
+    """(history, survey) for one synthetic household."""
+    survey = {a: {"qty": int(rng.integers(1, 3)), "hrs": round(float(rng.uniform(0.5, 8)), 1)}
+              for a in APPLIANCES if rng.random() < 0.6}
+    index  = seasonal_load_index(survey)
+    base   = max(survey_monthly_units(survey), 40.0)
+    start  = int(rng.integers(2019 * 12, 2022 * 12))
+    trend  = 1 + rng.normal(0, 0.003)
+    history = []
+    for k in range(n_months):
+        if rng.random() < 0.08:
+            continue
+        p = start + k
+        units = base * index[p % 12] * trend ** k * rng.normal(1, 0.12)
+        history.append((p // 12, MONTH_NAMES[p % 12], round(max(units, 5.0), 1)))
+    return history, survey
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(20)
+    histories, surveys = zip(*(random_household(rng) for _ in range(args.users)))
+
+    Y, last_month = history_matrix(histories, n_months=60)
+    batched = WeightedMovingAverage().predict(Y, last_month)
+    assert [round(float(p), 1) for p in batched] == [predict_next_units([r[2] for r in h]) for h in histories]
+
+    print(f"{len(histories)} households, {sum(len(h) for h in histories)} readings")
+    print_backtest(backtest(histories, surveys=surveys))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Round trips and latency for loading a user's full history.
+
+Compares the old alerts-page loop (load_years_with_data + load_user_data
+per year) against the single-query load_user_history, as account age grows.
+
+    python -m benchmarks.bench_history
+"""
+import time
+
+from benchmarks.standin import StandinDatabase
+from voltiq import db
+from voltiq.cache import data_cache
+from voltiq.constants import MONTH_NAMES
+from voltiq.store import load_user_data, load_user_history, load_years_with_data
+
+USER    = "bench_user"
+LATENCY = 0.002   # simulated network round trip, seconds
+
+
+def sequential(username):
+    rows = []
+    for yr in load_years_with_data(username):
+        rows.extend((yr, *r) for r in load_user_data(username, yr))
+    return rows
+
+
+def measure(database, fn):
+    data_cache.clear()
+    before = database.round_trips
+    start  = time.perf_counter()
+    rows   = fn(USER)
+    return len(rows), database.round_trips - before, (time.perf_counter() - start) * 1000
+
+
+def main():
+    print(f"{'years':>5} | {'rows':>5} | {'loop trips':>10} | {'loop ms':>8} | {'bulk trips':>10} | {'bulk ms':>8}")
+    for n_years in (1, 2, 5, 10, 20, 40):
+        database = StandinDatabase(latency=LATENCY)
+        for y in range(2025 - n_years + 1, 2026):
+            for i, m in enumerate(MONTH_NAMES):
+                database.electricity[(USER, y, m)] = (100.0 + i, 800.0 + i, 8.0)
+        previous = db.set_pool(database)
+        try:
+            n_loop, trips_loop, ms_loop = measure(database, sequential)
+            n_bulk, trips_bulk, ms_bulk = measure(database, load_user_history)
+        finally:
+            db.set_pool(previous)
+        assert n_loop == n_bulk
+        print(f"{n_years:>5} | {n_bulk:>5} | {trips_loop:>10} | {ms_loop:>8.1f} | {trips_bulk:>10} | {ms_bulk:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Sequential store helpers vs one concurrent prefetch per page.
+
+Runs each page's planned reads (as electricity_app.page_reads() builds
+them) against the stand-in with a per-statement latency, from a cold
+cache: once one after another, as the pages used to, and once through
+prefetch.gather(). Both must return the same data and make the same number
+of round trips; only the wall time should differ.
+
+    python -m benchmarks.bench_prefetch [--latency 0.002] [--workers 4]
+"""
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+
+from benchmarks.standin import StandinDatabase
+from benchmarks.suite import clear_caches, populate_standin, synthetic_user
+from voltiq import db, prefetch
+from voltiq.store import load_all_appliance_data, load_user_data, load_user_history, load_year_summary, load_years_with_data
+from voltiq.ticker import ticker_reads
+
+
+def page_plans(u, year):
+    username = u["username"]
+    ticker = ticker_reads(username, u["supplier"], date(year, 6, 15))
+    return {
+        "dashboard": ticker + [(load_years_with_data, username), (load_user_data, username, year),
+                               (load_year_summary, username, year), (load_all_appliance_data, username, year)],
+        "alerts":    ticker + [(load_user_history, username)],
+        "post_save": ticker + [(load_user_history, username), (load_all_appliance_data, username, year)],
+    }
+
+
+def time_fetch(fetch, calls, database):
+    clear_caches()
+    trips = database.round_trips
+    start = time.perf_counter()
+    data  = fetch(calls)
+    return (time.perf_counter() - start) * 1000, database.round_trips - trips, data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.002, help="stand-in seconds per statement")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    rng   = np.random.default_rng(23)
+    year  = 2025
+    users = [synthetic_user(rng, i, 4, year) for i in range(args.users)]
+    database = StandinDatabase(latency=args.latency)
+    db.set_pool(database)
+    populate_standin(database, users)
+    prefetch.configure(max_workers=args.workers)
+
+    print(f"stand-in latency {args.latency * 1000:.1f} ms/statement, {args.workers} fetch workers, cold cache")
+    print(f"{'page':<10} | {'reads':>5} | {'trips':>5} | {'sequential p50':>14} | {'gather p50':>10} | {'speedup':>7}")
+    for page in page_plans(users[0], year):
+        seq, con, trips = [], [], []
+        for i in range(args.iterations):
+            calls = page_plans(users[i % len(users)], year)[page]
+            t_seq, n_seq, a = time_fetch(prefetch.fetch_sequential, calls, database)
+            t_con, n_con, b = time_fetch(prefetch.gather, calls, database)
+            assert n_seq == n_con, (page, n_seq, n_con)
+            assert all(a.get(fn, *args) == b.get(fn, *args) for fn, *args in calls)
+            seq.append(t_seq)
+            con.append(t_con)
+            trips.append(n_con)
+        p_seq, p_con = np.percentile(seq, 50), np.percentile(con, 50)
+        print(f"{page:<10} | {len(dict.fromkeys(calls)):>5} | {np.mean(trips):>5.1f} | {p_seq:>11.2f} ms | "
+              f"{p_con:>7.2f} ms | {p_seq / p_con:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Seasonal + bill-scaled appliance hours: apply_seasonal_multipliers() and
+scale_hours_to_units() called month by month vs the batched versions in
+voltiq.appliances.
+
+Profiles are random survey dicts in both appliance-hours JSONB shapes.
+Every run checks that both paths give identical hours for every month and
+appliance.
+
+    python -m benchmarks.bench_seasonal
+"""
+import timeit
+
+import numpy as np
+
+from voltiq.appliances import (
+    APPLIANCE_NAMES, APPLIANCES, apply_seasonal_multipliers, effective_hours,
+    estimate_hours_batch, scale_hours_to_units, seasonal_hours_batch,
+)
+from voltiq.constants import MONTH_NAMES
+
+
+def loop_hours(survey, months, units):
+    """The per-row dashboard/import path, kept as the reference."""
+    seasonal, scaled = [], []
+    for month, u in zip(months, units):
+        adjusted = apply_seasonal_multipliers(survey, month)
+        seasonal.append([effective_hours(adjusted, a) for a in APPLIANCE_NAMES])
+        final = scale_hours_to_units(adjusted, u)
+        scaled.append([effective_hours(final, a) for a in APPLIANCE_NAMES])
+    return seasonal, scaled
+
+
+def random_survey(rng):
+    survey = {}
+    for a in APPLIANCES:
+        if rng.random() < 0.7:
+            hrs = round(float(rng.uniform(0, 14)), 2)
+            survey[a] = {"qty": int(rng.integers(1, 4)), "hrs": hrs} if rng.random() < 0.5 else hrs
+    return survey
+
+
+def main():
+    rng = np.random.default_rng(16)
+    print(f"{'months':>6} | {'loop ms':>8} | {'batch ms':>8} | {'speedup':>7}")
+    for n_months in (12, 60, 240, 1200):
+        survey = random_survey(rng)
+        months = [MONTH_NAMES[i % 12] for i in range(n_months)]
+        units  = [float(u) if rng.random() < 0.95 else 0.0 for u in rng.uniform(20, 1500, n_months)]
+
+        ref_seasonal, ref_scaled = loop_hours(survey, months, units)
+        assert seasonal_hours_batch(survey, months).tolist() == ref_seasonal
+        assert estimate_hours_batch(survey, months, units).tolist() == ref_scaled
+
+        reps = max(1, 1200 // n_months)
+        loop_s  = timeit.timeit(lambda: loop_hours(survey, months, units), number=reps) / reps
+        batch_s = timeit.timeit(lambda: (seasonal_hours_batch(survey, months),
+                                         estimate_hours_batch(survey, months, units)), number=reps) / reps
+        print(f"{n_months:>6} | {loop_s * 1000:>8.2f} | {batch_s * 1000:>8.2f} | {loop_s / batch_s:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
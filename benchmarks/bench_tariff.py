@@ -0,0 +1,39 @@
+"""
+Scalar calculate_bill loop vs one calculate_bills call.
+
+Sizes cover an alerts render (10 appliances), a dashboard pie (12 months ×
+10 appliances) and batch-job scale. Every run also checks that both paths
+agree on every field to the paisa.
+
+    python -m benchmarks.bench_tariff
+"""
+import timeit
+
+import numpy as np
+
+from voltiq.tariff import SUPPLIERS, calculate_bill, calculate_bills
+
+
+def main():
+    rng = np.random.default_rng(42)
+    suppliers = list(SUPPLIERS)
+    print(f"{'n':>7} | {'scalar ms':>10} | {'batch ms':>9} | {'speedup':>7}")
+    for n in (10, 120, 1_000, 10_000, 100_000):
+        units = rng.uniform(0, 900, n).round(2)
+        per_row_supplier = rng.choice(suppliers, n)
+        unit_list = units.tolist()
+        sup_list  = per_row_supplier.tolist()
+
+        batch = calculate_bills(units, per_row_supplier)
+        for i, (u, s) in enumerate(zip(unit_list, sup_list)):
+            ref = calculate_bill(u, s)
+            assert all(ref[k] == batch[k][i] for k in ref), (u, s)
+
+        reps = max(1, 20_000 // n)
+        scalar_s = timeit.timeit(lambda: [calculate_bill(u, s) for u, s in zip(unit_list, sup_list)], number=reps) / reps
+        batch_s  = timeit.timeit(lambda: calculate_bills(units, per_row_supplier), number=reps) / reps
+        print(f"{n:>7} | {scalar_s * 1000:>10.3f} | {batch_s * 1000:>9.3f} | {scalar_s / batch_s:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+In-process stand-in for the PostgreSQL tables behind voltiq.store.
+
+It answers exactly the statements the store issues, matched on normalised
+SQL text, and counts round trips. An optional per-statement ``latency``
+simulates the network hop to the real database. Install it with
+``voltiq.db.set_pool(StandinDatabase())``.
+"""
+import json
+import re
+import time
+from contextlib import contextmanager
+
+import psycopg2.extensions
+
+from voltiq.appliances import APPLIANCE_INDEX
+from voltiq.constants import MONTH_ORDER
+from voltiq.summary import SUMMARY_FIELDS
+
+
+def _normalise(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class StandinDatabase:
+    """Pool-compatible object: ``connection()`` yields a DB-API-ish connection."""
+
+    def __init__(self, latency=0.0):
+        self.latency     = latency
+        self.round_trips = 0
+        self.electricity = {}   # (username, year, month) -> (units, bill, rate)
+        self.appliances  = {}   # (username, year, month) -> appliance_hours dict
+        self.usage       = {}   # (username, year) -> {(month, appliance): (qty, hrs, kwh, price)}, as the primary key indexes it
+        self.suppliers   = {}   # username -> supplier (absent = MSEDCL)
+        self.summaries   = {}   # (username, year) -> summary row tuple, SUMMARY_FIELDS order
+        self.users       = {}   # username -> {"password", "security_question", "security_answer"}
+        self.surveys     = {}   # username -> avg_appliance_hours dict
+        self._handlers   = [
+            (r"^SELECT month, units, bill, rate FROM electricity_data WHERE username = %s AND year = %s$", self._user_data),
+            (r"^SELECT DISTINCT year FROM electricity_data WHERE username = %s ORDER BY year DESC$", self._years),
+            (r"^SELECT year, month, units, bill, rate FROM electricity_data WHERE username = %s ORDER BY year, array_position", self._history),
+            (r"^SELECT month, appliance_hours FROM appliance_data WHERE username = %s AND year = %s$", self._all_appliances),
+            (r"^INSERT INTO electricity_data ", self._upsert_entry),
+            (r"^INSERT INTO appliance_data ", self._upsert_appliances),
+            (r"^DELETE FROM electricity_data WHERE username = %s AND year = %s", self._delete_entries),
+            (r"^DELETE FROM appliance_data WHERE username = %s AND year = %s", self._delete_appliances),
+            (r"^DELETE FROM appliance_usage WHERE username = %s AND \(year, month\) IN", self._delete_usage_months),
+            (r"^DELETE FROM appliance_usage WHERE username = %s AND year = %s", self._delete_usage),
+            (r"^INSERT INTO appliance_usage ", self._insert_usage),
+            (r"^SELECT year, month, appliance, kwh FROM appliance_usage WHERE username = %s AND kwh > 0$", self._usage_kwh),
+            (r"^UPDATE appliance_usage AS u SET price = v.price", self._reprice_usage),
+            (r"^SELECT \(SELECT COUNT\(\*\) FROM appliance_data WHERE username = %s AND year = %s\), t.appliance",
+             self._appliance_totals),
+            (r"^SELECT pg_advisory_xact_lock\(", self._no_rows),
+            (r"^SELECT supplier FROM users WHERE username = %s$", self._supplier),
+            (r"^UPDATE users SET supplier = %s WHERE username = %s$", self._set_supplier),
+            (r"^SELECT year FROM yearly_summary WHERE username = %s ORDER BY year$", self._summary_years),
+            (r"^SELECT .* FROM yearly_summary WHERE username = %s AND year = %s$", self._summary),
+            (r"^INSERT INTO yearly_summary ", self._upsert_summary),
+            (r"^DELETE FROM yearly_summary WHERE username = %s AND year = %s$", self._delete_summary),
+            (r"^INSERT INTO users \(username, password, security_question, security_answer\)", self._insert_user),
+            (r"^SELECT password FROM users WHERE username = %s$", self._user_columns("password")),
+            (r"^SELECT u.password, u.supplier, s.avg_appliance_hours FROM users u LEFT JOIN user_survey s", self._login_profile),
+            (r"^SELECT avg_appliance_hours FROM user_survey WHERE username = %s$", self._survey),
+            (r"^INSERT INTO user_survey ", self._upsert_survey),
+            (r"^SELECT security_question FROM users WHERE username = %s$", self._user_columns("security_question")),
+            (r"^SELECT security_question, security_answer FROM users WHERE username = %s$",
+             self._user_columns("security_question", "security_answer")),
+            (r"^UPDATE users SET password = %s WHERE username = %s$", self._set_user_column("password")),
+            (r"^UPDATE users SET password = %s WHERE username = %s AND password = %s$",
+             self._set_user_column("password")),
+            (r"^UPDATE users SET security_answer = %s WHERE username = %s AND security_answer = %s$",
+             self._set_user_column("security_answer")),
+        ]
+
+    @contextmanager
+    def connection(self, timeout=None):
+        yield StandinConnection(self)
+
+    def execute(self, sql, params):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+        sql = _normalise(sql)
+        for pattern, handler in self._handlers:
+            if re.search(pattern, sql):
+                return handler(*params)
+        raise NotImplementedError(f"stand-in has no handler for: {sql[:80]}")
+
+    # ── handlers ──
+    def _user_data(self, username, year):
+        return [(m, *v) for (u, y, m), v in self.electricity.items() if u == username and y == year]
+
+    def _years(self, username):
+        return [(y,) for y in sorted({y for (u, y, _) in self.electricity if u == username}, reverse=True)]
+
+    def _history(self, username, _month_names):
+        rows = [(y, m, *v) for (u, y, m), v in self.electricity.items() if u == username]
+        return sorted(rows, key=lambda r: (r[0], MONTH_ORDER[r[1]]))
+
+    def _all_appliances(self, username, year):
+        return [(m, h) for (u, y, m), h in self.appliances.items() if u == username and y == year]
+
+    def _upsert_entry(self, username, year, month, units, bill, rate):
+        self.electricity[(username, year, month)] = (units, bill, rate)
+        return []
+
+    def _upsert_appliances(self, username, year, month, hours_json):
+        self.appliances[(username, year, month)] = json.loads(hours_json)
+        return []
+
+    @staticmethod
+    def _delete_matching(table, username, year, month=None):
+        for key in [k for k in table if k[:2] == (username, year) and month in (None, k[2])]:
+            del table[key]
+        return []
+
+    def _delete_entries(self, *params):
+        return self._delete_matching(self.electricity, *params)
+
+    def _delete_appliances(self, *params):
+        return self._delete_matching(self.appliances, *params)
+
+    def _delete_usage(self, username, year, month=None):
+        rows = self.usage.get((username, year), {})
+        for key in [k for k in rows if month in (None, k[0])]:
+            del rows[key]
+        return []
+
+    def _delete_usage_months(self, username, years, months):
+        for year, month in zip(years, months):
+            self._delete_usage(username, year, month)
+        return []
+
+    def _insert_usage(self, username, years, months, appliances, qty, hrs, kwh, price):
+        for year, month, appliance, *values in zip(years, months, appliances, qty, hrs, kwh, price):
+            self.usage.setdefault((username, year), {})[(month, appliance)] = tuple(values)
+        return []
+
+    def _usage_kwh(self, username):
+        return [(y, m, a, v[2]) for (u, y), rows in self.usage.items() if u == username
+                for (m, a), v in rows.items() if v[2] > 0]
+
+    def _reprice_usage(self, years, months, appliances, prices, username):
+        for year, month, appliance, price in zip(years, months, appliances, prices):
+            rows = self.usage[(username, year)]
+            rows[(month, appliance)] = (*rows[(month, appliance)][:3], price)
+        return []
+
+    def _appliance_totals(self, username, year, *_):
+        # Same attribution as the SQL aggregate in store.appliance_totals()
+        months = sum(1 for key in self.appliances if key[:2] == (username, year))
+        active = [(m, a, v) for (m, a), v in self.usage.get((username, year), {}).items() if v[2] > 0]
+        month_kwh, month_price = {}, {}
+        for m, _, (_, _, kwh, price) in active:
+            month_kwh[m]   = month_kwh.get(m, 0.0) + kwh
+            month_price[m] = month_price.get(m, 0.0) + price
+        totals = {}
+        for m, a, (_, _, kwh, price) in active:
+            units, bill, _ = self.electricity.get((username, year, m), (0, 0, 0))
+            if units and bill and month_kwh[m]:
+                total = totals.setdefault(a, [0.0, 0.0])
+                total[0] += kwh / month_kwh[m] * units
+                total[1] += price / month_price[m] * bill
+        rows = [(months, a, k, c) for a, (k, c) in sorted(totals.items(), key=lambda t: APPLIANCE_INDEX[t[0]])]
+        return rows or [(months, None, None, None)]
+
+    def _no_rows(self, *params):
+        return [(None,)]
+
+    def _supplier(self, username):
+        return [(self.suppliers.get(username, "MSEDCL"),)]
+
+    def _set_supplier(self, supplier, username):
+        self.suppliers[username] = supplier
+        return []
+
+    def _summary_years(self, username):
+        return sorted((y,) for (u, y) in self.summaries if u == username)
+
+    def _summary(self, username, year):
+        row = self.summaries.get((username, year))
+        return [row] if row else []
+
+    def _upsert_summary(self, username, year, *values):
+        values = dict(zip(SUMMARY_FIELDS, values))
+        for field in ("appliance_units", "appliance_cost"):
+            values[field] = json.loads(values[field])
+        self.summaries[(username, year)] = tuple(values[f] for f in SUMMARY_FIELDS)
+        return []
+
+    def _delete_summary(self, username, year):
+        self.summaries.pop((username, year), None)
+        return []
+
+    def _insert_user(self, username, password, question, answer):
+        if username in self.users:
+            raise psycopg2.IntegrityError(f"duplicate username {username!r}")
+        self.users[username] = {"password": password, "security_question": question, "security_answer": answer}
+        return []
+
+    def _user_columns(self, *columns):
+        def handler(username):
+            user = self.users.get(username)
+            return [tuple(user[c] for c in columns)] if user else []
+        return handler
+
+    def _login_profile(self, username):
+        user = self.users.get(username)
+        return [(user["password"], self.suppliers.get(username, "MSEDCL"), self.surveys.get(username))] if user else []
+
+    def _survey(self, username):
+        return [(self.surveys[username],)] if username in self.surveys else []
+
+    def _upsert_survey(self, username, hours_json):
+        self.surveys[username] = json.loads(hours_json)
+        return []
+
+    def _set_user_column(self, column):
+        # The optional trailing param is a compare-and-set on the current value
+        def handler(value, username, expected=None):
+            user = self.users.get(username)
+            if user and (expected is None or user[column] == expected):
+                user[column] = value
+            return []
+        return handler
+
+
+class StandinConnection:
+    closed = 0
+
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self):
+        return StandinCursor(self.database)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class StandinCursor:
+    def __init__(self, database):
+        self.database = database
+        self._rows    = []
+
+    def execute(self, sql, params=()):
+        self._rows = list(self.database.execute(sql, params))
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def close(self):
+        pass
@@ -0,0 +1,299 @@
+"""
+Headless page benchmark suite with a regression gate.
+
+Generates synthetic users — several years of electricity_data and
+appliance_data in both JSONB shapes, a survey and a supplier each — then
+runs the data work behind each page the way the app does, minus
+Streamlit and Plotly:
+
+    dashboard   one prefetch of years, rows, yearly summary and appliance
+                rows; data version, daily series, appliance breakdown when
+                the summary can't be used
+    alerts      full history, next-month forecast, slab savings
+    ticker      load_ticker_alerts
+    input_save  save_entry + seasonal/scaled save_appliance_data, then
+                the post-save forecast view (history and appliance rows
+                prefetched together)
+
+Each page runs ``--iterations`` times per cache mode: ``cold`` clears every
+in-process cache first (a fresh login), ``warm`` repeats the same view.
+Queries per page are counted through voltiq.metrics, so they mean the same
+thing on the stand-in and on Postgres.
+
+Results are compared with benchmarks/baseline.json. Query counts must not
+grow. p50/p95 may grow by at most ``--tolerance`` plus ``--slack-ms``, as
+timings are machine-dependent; re-record the baseline with
+``--update-baseline`` on the machine that gates. Exits 1 on a regression.
+
+    python -m benchmarks.suite                      # in-process stand-in
+    python -m benchmarks.suite --dsn postgresql://localhost/voltiq_bench
+    python -m benchmarks.suite --update-baseline
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.standin import StandinDatabase
+from voltiq import db, metrics, prefetch
+from voltiq.appliances import (
+    APPLIANCES, apply_seasonal_multipliers, breakdown_from_hours, scale_hours_to_units,
+    seasonal_hours_batch, survey_monthly_units, yearly_appliance_breakdown,
+)
+from voltiq.cache import data_cache
+from voltiq.constants import MONTH_NAMES, MONTH_ORDER
+from voltiq.forecast import forecast_next
+from voltiq.series import load_daily_series, series_cache
+from voltiq.store import (
+    data_version, load_all_appliance_data, load_appliance_data, load_user_data, load_user_history,
+    load_year_summary, load_years_with_data, refresh_summary, save_appliance_data, save_entries_bulk,
+    save_entry, save_supplier, save_user_survey, write_usage,
+)
+from voltiq.summary import summarise_year
+from voltiq.tariff import SUPPLIERS, calculate_bill, calculate_bills, get_tariff
+from voltiq.ticker import load_ticker_alerts, ticker_cache
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+MODES    = ("cold", "warm")
+_save_months = itertools.cycle(MONTH_NAMES)
+
+
+# ─────────────────────────────────────────────
+# SYNTHETIC USERS
+# ─────────────────────────────────────────────
+def synthetic_user(rng, index, n_years, last_year):
+    """One user's profile plus (year, month, units, bill, rate) and (year, month, hours) rows."""
+    supplier = str(rng.choice(list(SUPPLIERS)))
+    survey   = {a: {"qty": int(rng.integers(1, 3)), "hrs": round(float(rng.uniform(0.5, 8)), 1)}
+                for a in APPLIANCES if rng.random() < 0.6}
+    entries, appliance_rows = [], []
+    base = max(survey_monthly_units(survey), 60.0) * rng.uniform(0.6, 1.2)
+    for year in range(last_year - n_years + 1, last_year + 1):
+        for month in MONTH_NAMES:
+            if rng.random() < 0.1:
+                continue
+            units = round(float(base * rng.normal(1, 0.15)), 1)
+            bill  = calculate_bill(units, supplier)["total"]
+            entries.append((year, month, units, bill, round(bill / units, 2) if units else 0.0))
+            if rng.random() < 0.8:
+                hours = scale_hours_to_units(apply_seasonal_multipliers(survey, month), units)
+                if rng.random() < 0.3:   # older rows stored bare hours
+                    hours = {a: (h["qty"] * h["hrs"] if isinstance(h, dict) else h) for a, h in hours.items()}
+                appliance_rows.append((year, month, hours))
+    return {"username": f"bench_{index:04d}", "supplier": supplier, "survey": survey,
+            "entries": entries, "appliance_rows": appliance_rows}
+
+
+def populate_standin(database, users):
+    """Write the users straight into the stand-in's tables, then their appliance usage and summaries."""
+    for u in users:
+        name = u["username"]
+        database.suppliers[name] = u["supplier"]
+        database.surveys[name]   = u["survey"]
+        database.users[name]     = {"password": "x", "security_question": "q", "security_answer": "a"}
+        for year, month, units, bill, rate in u["entries"]:
+            database.electricity[(name, year, month)] = (units, bill, rate)
+        for year, month, hours in u["appliance_rows"]:
+            database.appliances[(name, year, month)] = hours
+    with db.connection() as conn:
+        cur = conn.cursor()
+        for u in users:
+            write_usage(cur, u["username"], u["appliance_rows"], u["supplier"])
+            for year in sorted({e[0] for e in u["entries"]}):
+                refresh_summary(cur, u["username"], year)
+        cur.close()
+
+
+def populate_postgres(users):
+    """Write the users through the store, as the app and importer would."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        for u in users:
+            cur.execute("""
+                INSERT INTO users (username, password, security_question, security_answer)
+                VALUES (%s, 'x', 'q', 'a') ON CONFLICT (username) DO NOTHING
+            """, (u["username"],))
+        conn.commit()
+        cur.close()
+    for u in users:
+        save_supplier(u["username"], u["supplier"])
+        save_user_survey(u["username"], u["survey"])
+        save_entries_bulk(u["username"], u["entries"], u["appliance_rows"])
+
+
+# ─────────────────────────────────────────────
+# PAGE PATHS
+# ─────────────────────────────────────────────
+def page_dashboard(u, year):
+    username, supplier, survey = u["username"], u["supplier"], u["survey"]
+    page_data = prefetch.gather([(load_years_with_data, username), (load_user_data, username, year),
+                                 (load_year_summary, username, year), (load_all_appliance_data, username, year)])
+    available_years = page_data.get(load_years_with_data, username)
+    year = year if year in available_years else available_years[0]
+    rows = page_data.get(load_user_data, username, year)
+    df = pd.DataFrame(rows, columns=["Month", "Units", "Bill", "Rate"])
+    df["Month_Order"] = df["Month"].map(MONTH_ORDER)
+    df = df.sort_values("Month_Order").reset_index(drop=True)
+    summary = page_data.get(load_year_summary, username, year) or summarise_year(
+        rows, page_data.get(load_all_appliance_data, username, year), supplier)
+    data_version(username, year)
+    load_daily_series(username, year)
+    if not summary["appliance_months"] or summary["supplier"] != supplier:
+        if not summary["appliance_months"] and survey:
+            months = df["Month"].tolist()
+            breakdown_from_hours(rows, months, seasonal_hours_batch(survey, months), supplier)
+        else:
+            yearly_appliance_breakdown(rows, load_all_appliance_data(username, year), supplier)
+    days = np.array([pd.Period(f"{year}-{MONTH_ORDER[m] + 1:02d}").days_in_month for m in df["Month"]])
+    return (df["Units"].to_numpy() / days)[:, None] * np.full(24, 1 / 24) * 24
+
+
+def page_alerts(u, year):
+    username, supplier = u["username"], u["supplier"]
+    all_rows = load_user_history(username)
+    last = all_rows[-1]
+    next_units = forecast_next([r[:3] for r in all_rows], survey=u["survey"])
+    tariff = get_tariff(supplier)
+    slab   = tariff.slab_index(last[2])
+    return calculate_bill(next_units, supplier)["total"], calculate_bill(tariff.floors[slab], supplier)["total"]
+
+
+def page_ticker(u, year):
+    return load_ticker_alerts(u["username"], u["supplier"])
+
+
+def page_input_save(u, year):
+    username, supplier, survey = u["username"], u["supplier"], u["survey"]
+    month = next(_save_months)
+    units = 250.0
+    bill  = calculate_bill(units, supplier)
+    save_entry(username, year, month, units, bill["total"], round(bill["total"] / units, 2))
+    save_appliance_data(username, year, month,
+                        scale_hours_to_units(apply_seasonal_multipliers(survey, month), units))
+    # Post-save view
+    page_data = prefetch.gather([(load_user_history, username), (load_all_appliance_data, username, year)])
+    saved_pos = (year, MONTH_ORDER[month])
+    history = [r[:3] for r in page_data.get(load_user_history, username) if (r[0], MONTH_ORDER[r[1]]) <= saved_pos]
+    next_units = forecast_next(history, survey=survey, survey_units=survey_monthly_units(survey))
+    hours = load_appliance_data(username, year, month)
+    return next_units, calculate_bills([units, next_units], supplier), hours
+
+
+PAGES = {"dashboard": page_dashboard, "alerts": page_alerts, "ticker": page_ticker, "input_save": page_input_save}
+
+
+def clear_caches():
+    data_cache.clear()
+    series_cache.clear()
+    ticker_cache.clear()
+
+
+# ─────────────────────────────────────────────
+# RUN + GATE
+# ─────────────────────────────────────────────
+def run(users, iterations, year):
+    """{"page/mode": {"p50_ms", "p95_ms", "queries"}} over ``iterations`` views each."""
+    results = {}
+    for page, fn in PAGES.items():
+        for mode in MODES:
+            latencies, queries = [], []
+            for i in range(iterations):
+                u = users[i % len(users)]
+                if mode == "cold":
+                    clear_caches()
+                else:
+                    fn(u, year)   # prime this user's view
+                metrics.begin_run(page)
+                start = time.perf_counter()
+                fn(u, year)
+                latencies.append((time.perf_counter() - start) * 1000)
+                queries.append(metrics.end_run().queries)
+            results[f"{page}/{mode}"] = {
+                "p50_ms":  float(np.percentile(latencies, 50)),
+                "p95_ms":  float(np.percentile(latencies, 95)),
+                "queries": float(np.mean(queries)),
+            }
+    return results
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    failures = []
+    for key, base in baseline.items():
+        cur = results.get(key)
+        if cur is None:
+            failures.append(f"{key}: missing from this run")
+            continue
+        if round(cur["queries"], 2) > round(base["queries"], 2):
+            failures.append(f"{key}: {cur['queries']:.2f} queries/page, baseline {base['queries']:.2f}")
+        for field in ("p50_ms", "p95_ms"):
+            limit = base[field] * (1 + tolerance) + slack_ms
+            if cur[field] > limit:
+                failures.append(f"{key}: {field} {cur[field]:.2f} > {limit:.2f} (baseline {base[field]:.2f})")
+    return failures
+
+
+def print_results(results, baseline):
+    print(f"{'page/mode':<18} | {'p50 ms':>7} | {'p95 ms':>7} | {'queries':>7} | {'base p50':>8} | {'base q':>6}")
+    for key, r in results.items():
+        base = baseline.get(key, {})
+        print(f"{key:<18} | {r['p50_ms']:>7.2f} | {r['p95_ms']:>7.2f} | {r['queries']:>7.2f} | "
+              f"{base.get('p50_ms', float('nan')):>8.2f} | {base.get('queries', float('nan')):>6.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the app's page data paths and gate on a stored baseline.")
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.0005, help="stand-in seconds per statement")
+    parser.add_argument("--dsn", help="run against this Postgres instead of the stand-in")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative latency growth")
+    parser.add_argument("--slack-ms", type=float, default=1.0, help="allowed absolute latency growth")
+    args = parser.parse_args(argv)
+
+    rng   = np.random.default_rng(22)
+    year  = 2025
+    users = [synthetic_user(rng, i, args.years, year) for i in range(args.users)]
+    if args.dsn:
+        from voltiq import migrations
+        pool = db.configure(args.dsn, maxconn=4)
+        migrations.ensure_schema(pool.connection)
+        populate_postgres(users)
+    else:
+        db.set_pool(StandinDatabase(latency=args.latency))
+        populate_standin(db.get_pool(), users)
+
+    metrics.configure(enabled=True)
+    results = run(users, args.iterations, year)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["pages"]
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        config = {k: getattr(args, k) for k in ("users", "years", "iterations", "latency")}
+        config["backend"] = "postgres" if args.dsn else "standin"
+        with open(args.baseline, "w") as f:
+            json.dump({"config": config, "pages": results}, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    failures = compare(results, baseline, args.tolerance, args.slack_ms)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
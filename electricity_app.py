@@ -3,21 +3,37 @@ import pandas as pd
 import plotly.express as px
 import numpy as np
 from datetime import datetime
-import hashlib
-import os
-import psycopg2
-import psycopg2.errors
-import json
-import re
 import io
-try:
-    import pdfplumber
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-
+from voltiq import db, hashing, metrics, migrations, prefetch
+from voltiq.appliances import (
+    APPLIANCES, SEASONAL_THRESHOLDS,
+    survey_monthly_units, scale_hours_to_units, apply_seasonal_multipliers,
+    yearly_appliance_breakdown, breakdown_from_hours, seasonal_hours_batch, APPLIANCE_NAMES, as_profile,
+)
+from voltiq.auth import register_user, authenticate, get_security_question, verify_security_answer, reset_password
+from voltiq.hashing import HashingBusy
+from voltiq.constants import MONTH_NAMES, MONTH_ORDER, CO2_FACTOR
+from voltiq.forecast import DEFAULT_MODEL, forecast_next
+from voltiq.bills import PDF_AVAILABLE, extract_bills
+from voltiq.importer import import_csv, save_readings
+from voltiq.archive import PARQUET_AVAILABLE, restore_archive, write_archive
+from voltiq.figures import cached_figure, figure_cache
+from voltiq.series import load_daily_series
+from voltiq.summary import summarise_year
+from voltiq.ticker import load_ticker_alerts, ticker_reads
+from voltiq.tariff import SUPPLIERS, calculate_bill, calculate_bills, get_tariff
+from voltiq.store import (
+    save_supplier, has_completed_survey, save_user_survey,
+    save_entry, delete_month_entry, save_appliance_data,
+    load_user_data, load_years_with_data, load_user_history, load_appliance_data, load_all_appliance_data,
+    load_year_summary, data_version, user_generation,
+)
 st.set_page_config(page_title="VoltIQ", page_icon="⚡", layout="wide")
 
+# Rerun instrumentation (voltiq.metrics) — a no-op unless SHOW_PERF_STATS is set
+metrics.configure(enabled=bool(st.secrets.get("SHOW_PERF_STATS", False)), log=st.secrets.get("METRICS_LOG"))
+metrics.begin_run()
+
 # Load fonts via HTML (works on Streamlit Cloud)
 st.markdown("""
 <link rel="preconnect" href="https://fonts.googleapis.com">
@@ -28,65 +44,64 @@ st.markdown("""
 # ─────────────────────────────────────────────
 # DATABASE
 # ─────────────────────────────────────────────
+def configure_pool():
+    """
+    Create the process-wide pool on first call (later calls are a no-op).
+    Sizes and checkout timeout can be tuned via optional DB_POOL_* secrets.
+    """
+    return db.configure(
+        st.secrets["DATABASE_URL"],
+        minconn=int(st.secrets.get("DB_POOL_MIN", 1)),
+        maxconn=int(st.secrets.get("DB_POOL_MAX", 10)),
+        timeout=float(st.secrets.get("DB_POOL_TIMEOUT", 10)),
+        check_after=float(st.secrets.get("DB_POOL_CHECK_AFTER", 30)),
+        sslmode="require",
+    )
+
 def get_connection():
-    return psycopg2.connect(st.secrets["DATABASE_URL"], sslmode="require")
+    """Borrow a pooled connection: ``with get_connection() as conn:``."""
+    return configure_pool().connection()
+
+def configure_hashing():
+    """
+    Create the process-wide password hashing executor on first call.
+    Concurrency, queue depth and queue timeout come from optional HASH_* secrets.
+    """
+    return hashing.configure(
+        max_workers=int(st.secrets.get("HASH_WORKERS", 2)),
+        max_pending=int(st.secrets.get("HASH_QUEUE", 16)),
+        queue_timeout=float(st.secrets.get("HASH_TIMEOUT", 5)),
+    )
+
+def configure_prefetch():
+    """
+    Create the process-wide page fetch pool on first call. PREFETCH_WORKERS
+    should stay below DB_POOL_MAX so writes still find a free connection.
+    """
+    return prefetch.configure(max_workers=int(st.secrets.get("PREFETCH_WORKERS", 4)))
 
 def init_db():
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                security_question TEXT NOT NULL DEFAULT '',
-                security_answer TEXT NOT NULL DEFAULT '',
-                supplier TEXT NOT NULL DEFAULT 'MSEDCL'
-            )
-        """)
-        # Add supplier column if upgrading existing DB — only catch duplicate column error
-        try:
-            cur.execute("ALTER TABLE users ADD COLUMN supplier TEXT NOT NULL DEFAULT 'MSEDCL'")
-            conn.commit()
-        except psycopg2.errors.DuplicateColumn:
-            conn.rollback()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS electricity_data (
-                id SERIAL PRIMARY KEY,
-                username TEXT NOT NULL,
-                year INTEGER NOT NULL,
-                month TEXT NOT NULL,
-                units REAL NOT NULL,
-                bill REAL NOT NULL,
-                rate REAL NOT NULL,
-                UNIQUE(username, year, month)
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS appliance_data (
-                id SERIAL PRIMARY KEY,
-                username TEXT NOT NULL,
-                year INTEGER NOT NULL,
-                month TEXT NOT NULL,
-                appliance_hours JSONB NOT NULL,
-                UNIQUE(username, year, month)
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS user_survey (
-                id SERIAL PRIMARY KEY,
-                username TEXT UNIQUE NOT NULL,
-                avg_appliance_hours JSONB NOT NULL,
-                completed_at TIMESTAMP DEFAULT NOW()
-            )
-        """)
-        conn.commit()
-        cur.close()
-    finally:
-        conn.close()
+    """Set up the pool and apply pending schema migrations — once per process, not on every rerun."""
+    configure_pool()
+    configure_hashing()
+    configure_prefetch()
+    migrations.ensure_schema(get_connection)
 
 init_db()
+metrics.checkpoint("init_db")
+
+def run_hashed(fn, *args):
+    """Call an auth helper that hashes; if hashing is saturated, say so and end this run."""
+    try:
+        return fn(*args)
+    except HashingBusy:
+        st.error("Too many sign-ins right now — please try again in a few seconds.")
+        st.stop()
+
+def show_chart(fig):
+    """st.plotly_chart at full width, timed — serialising a figure to the browser isn't free."""
+    with metrics.section("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
 
 def section_header(icon, title, subtitle=""):
     sub_html = f'<div style="font-size:12px;color:#6b7280;margin-top:3px;font-weight:400;letter-spacing:.3px;">{subtitle}</div>' if subtitle else ""
@@ -124,335 +139,6 @@ def alert_card(bg_color, border_color, content):
       font-family:'DM Sans','Segoe UI',system-ui,sans-serif;line-height:1.5;">{content}</div>
     ''', unsafe_allow_html=True)
 
-# ─────────────────────────────────────────────
-# SUPPLIER RATES
-# ─────────────────────────────────────────────
-SUPPLIERS = {
-    "MSEDCL": {
-        "full_name": "MSEDCL (Mahavitaran)",
-        "slabs": [(100, 2.90), (200, 6.50), (200, 8.00), (float('inf'), 11.85)],
-        "fixed_charge": 30,
-        "fac": 0.20,
-        "duty_pct": 0.16,
-        "color": "#e74c3c"
-    },
-    "Tata Power": {
-        "full_name": "Tata Power Mumbai",
-        "slabs": [(100, 3.34), (200, 6.68), (200, 9.29), (float('inf'), 12.43)],
-        "fixed_charge": 50,
-        "fac": 0.15,
-        "duty_pct": 0.16,
-        "color": "#2980b9"
-    },
-    "Adani Electricity": {
-        "full_name": "Adani Electricity Mumbai",
-        "slabs": [(100, 3.13), (200, 6.26), (200, 9.10), (float('inf'), 11.97)],
-        "fixed_charge": 45,
-        "fac": 0.18,
-        "duty_pct": 0.16,
-        "color": "#f39c12"
-    },
-    "BEST": {
-        "full_name": "BEST (Brihanmumbai Electric Supply)",
-        "slabs": [(100, 2.80), (200, 5.90), (200, 8.50), (float('inf'), 11.20)],
-        "fixed_charge": 25,
-        "fac": 0.10,
-        "duty_pct": 0.16,
-        "color": "#27ae60"
-    },
-}
-
-# ─────────────────────────────────────────────
-# BILL CALCULATOR
-# ─────────────────────────────────────────────
-def calculate_bill(units, supplier="MSEDCL"):
-    s = SUPPLIERS.get(supplier, SUPPLIERS["MSEDCL"])
-    energy_charge = 0.0
-    remaining = units
-    for slab_units, rate in s["slabs"]:
-        if remaining <= 0:
-            break
-        billed = min(remaining, slab_units)
-        energy_charge += billed * rate
-        remaining -= billed
-    fac = units * s["fac"]
-    fixed_charge = s["fixed_charge"]
-    # Electricity duty applies to energy + FAC + fixed (not just energy)
-    electricity_duty = (energy_charge + fac + fixed_charge) * s["duty_pct"]
-    total = energy_charge + fac + fixed_charge + electricity_duty
-    return {
-        "energy_charge": round(energy_charge, 2),
-        "fac": round(fac, 2),
-        "fixed_charge": fixed_charge,
-        "electricity_duty": round(electricity_duty, 2),
-        "total": round(total, 2)
-    }
-
-# ─────────────────────────────────────────────
-# AUTH HELPERS
-# ─────────────────────────────────────────────
-def hash_password(password, salt=None):
-    """Hash password using scrypt with a random salt. Returns 'salt$hash' string."""
-    if salt is None:
-        salt = os.urandom(16).hex()
-    hashed = hashlib.scrypt(password.encode(), salt=salt.encode(), n=16384, r=8, p=1).hex()
-    return f"{salt}${hashed}"
-
-def verify_password(password, stored):
-    """Verify password against stored 'salt$hash' string. Falls back to legacy sha256."""
-    if "$" in stored:
-        salt, _ = stored.split("$", 1)
-        return hash_password(password, salt) == stored
-    # Legacy sha256 fallback for existing accounts
-    return hashlib.sha256(password.encode()).hexdigest() == stored
-
-def register_user(username, password, security_question, security_answer):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO users (username, password, security_question, security_answer) VALUES (%s, %s, %s, %s)",
-            (username, hash_password(password), security_question, hash_password(security_answer.lower().strip()))
-        )
-        conn.commit()
-        cur.close()
-        return True
-    except psycopg2.IntegrityError:
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
-
-def verify_user(username, password):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT password FROM users WHERE username = %s", (username,))
-        row = cur.fetchone()
-        cur.close()
-        return row is not None and verify_password(password, row[0])
-    finally:
-        conn.close()
-
-def get_security_question(username):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT security_question FROM users WHERE username = %s", (username,))
-        row = cur.fetchone()
-        cur.close()
-        return row[0] if row else None
-    finally:
-        conn.close()
-
-def verify_security_answer(username, answer):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT security_question, security_answer FROM users WHERE username = %s", (username,))
-        row = cur.fetchone()
-        cur.close()
-        if row is None:
-            return False, None
-        return verify_password(answer.lower().strip(), row[1]), row[0]
-    finally:
-        conn.close()
-
-def reset_password(username, new_password):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("UPDATE users SET password = %s WHERE username = %s",
-                    (hash_password(new_password), username))
-        conn.commit()
-        cur.close()
-    finally:
-        conn.close()
-
-def save_supplier(username, supplier):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("UPDATE users SET supplier = %s WHERE username = %s", (supplier, username))
-        conn.commit()
-        cur.close()
-    finally:
-        conn.close()
-
-def load_supplier(username):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT supplier FROM users WHERE username = %s", (username,))
-        row = cur.fetchone()
-        cur.close()
-        return row[0] if row else "MSEDCL"
-    finally:
-        conn.close()
-
-# ─────────────────────────────────────────────
-# DATA HELPERS
-# ─────────────────────────────────────────────
-def save_entry(username, year, month, units, bill, rate):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO electricity_data (username, year, month, units, bill, rate)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT(username, year, month) DO UPDATE SET
-                units = EXCLUDED.units, bill = EXCLUDED.bill, rate = EXCLUDED.rate
-        """, (username, year, month, units, bill, rate))
-        conn.commit()
-        cur.close()
-    finally:
-        conn.close()
-
-def delete_month_entry(username, year, month):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM electricity_data WHERE username = %s AND year = %s AND month = %s", (username, year, month))
-        cur.execute("DELETE FROM appliance_data WHERE username = %s AND year = %s AND month = %s", (username, year, month))
-        conn.commit()
-        cur.close()
-    finally:
-        conn.close()
-
-def save_appliance_data(username, year, month, appliance_hours):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO appliance_data (username, year, month, appliance_hours)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT(username, year, month) DO UPDATE SET
-                appliance_hours = EXCLUDED.appliance_hours
-        """, (username, year, month, json.dumps(appliance_hours)))
-        conn.commit()
-        cur.close()
-    finally:
-        conn.close()
-
-def load_user_data(username, year):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT month, units, bill, rate FROM electricity_data WHERE username = %s AND year = %s", (username, year))
-        rows = cur.fetchall()
-        cur.close()
-        return rows
-    finally:
-        conn.close()
-
-def load_years_with_data(username):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT DISTINCT year FROM electricity_data WHERE username = %s ORDER BY year DESC", (username,))
-        rows = cur.fetchall()
-        cur.close()
-        return [r[0] for r in rows]
-    finally:
-        conn.close()
-
-def load_appliance_data(username, year, month):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT appliance_hours FROM appliance_data WHERE username = %s AND year = %s AND month = %s",
-                    (username, year, month))
-        row = cur.fetchone()
-        cur.close()
-        return row[0] if row else {}
-    finally:
-        conn.close()
-
-def load_all_appliance_data(username, year):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT month, appliance_hours FROM appliance_data WHERE username = %s AND year = %s",
-                    (username, year))
-        rows = cur.fetchall()
-        cur.close()
-        return rows
-    finally:
-        conn.close()
-
-def delete_user_data(username, year):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM electricity_data WHERE username = %s AND year = %s", (username, year))
-        cur.execute("DELETE FROM appliance_data WHERE username = %s AND year = %s", (username, year))
-        conn.commit()
-        cur.close()
-    finally:
-        conn.close()
-
-def has_completed_survey(username):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT avg_appliance_hours FROM user_survey WHERE username = %s", (username,))
-        row = cur.fetchone()
-        cur.close()
-        return row[0] if row else None
-    finally:
-        conn.close()
-
-def save_user_survey(username, avg_hours):
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO user_survey (username, avg_appliance_hours)
-            VALUES (%s, %s)
-            ON CONFLICT(username) DO UPDATE SET
-                avg_appliance_hours = EXCLUDED.avg_appliance_hours,
-                completed_at = NOW()
-        """, (username, json.dumps(avg_hours)))
-        conn.commit()
-        cur.close()
-    finally:
-        conn.close()
-
-def effective_hours(survey, appliance):
-    """
-    Return effective hours/day for an appliance.
-    New format: {"qty": 2, "hrs": 4.0} → 2 × 4.0 = 8.0
-    Old format: 4.0 (plain number)     → 4.0  (backward compatible)
-    """
-    val = survey.get(appliance, 0)
-    if isinstance(val, dict):
-        return float(val.get("qty", 0)) * float(val.get("hrs", 0))
-    return float(val)
-
-def scale_hours_to_units(avg_hours, actual_units):
-    """
-    Scale survey appliance hours so total kWh roughly matches actual_units.
-    Hours are capped at 24/day (physically impossible to exceed).
-    If the bill is far higher than what the survey appliances can explain,
-    the hours are capped and the remainder is left unattributed rather than
-    producing impossible values like 50 hrs/day.
-    """
-    if not avg_hours or actual_units == 0:
-        return avg_hours
-    raw_kwh_total = sum(
-        (APPLIANCES[a] * effective_hours(avg_hours, a) * 30) / 1000
-        for a in APPLIANCES if effective_hours(avg_hours, a) > 0
-    )
-    if raw_kwh_total == 0:
-        return avg_hours
-    scale = actual_units / raw_kwh_total
-    scaled = {}
-    for a in avg_hours:
-        raw_hrs = effective_hours(avg_hours, a)
-        # Cap at 24 hrs/day — physically impossible to exceed
-        scaled[a] = round(min(raw_hrs * scale, 24.0), 4)
-    return scaled
-
 # ─────────────────────────────────────────────
 # SESSION STATE
 # ─────────────────────────────────────────────
@@ -464,6 +150,7 @@ for key, default in [
     ("forgot_step", 1),
     ("forgot_username", ""),
     ("extracted", {}),
+    ("extracted_batch", []),
     ("supplier", "MSEDCL"),
     ("just_saved", False),
     ("saved_month", ""),
@@ -473,6 +160,8 @@ for key, default in [
     ("saved_hours", {}),
     ("show_onboarding_survey", False),
     ("avg_survey_hours", {}),
+    ("survey_loaded", False),
+    ("ticker_reads_saved", 0),
     ("confirm_logout", False),
     ("delete_confirm_month", ""),
 ]:
@@ -487,89 +176,16 @@ SECURITY_QUESTIONS = [
     "What city were you born in?",
 ]
 
-MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
-               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-
-# Module-level constant — used everywhere instead of inline dicts
-MONTH_ORDER = {m: i for i, m in enumerate(MONTH_NAMES)}
-
-# CO2 emission factor — CEA 2023 grid average for India (kg CO2/kWh)
-CO2_FACTOR = 0.716
+# Next-month forecast model — see voltiq.forecast; pick one from its backtest
+FORECAST_MODEL = st.secrets.get("FORECAST_MODEL", DEFAULT_MODEL)
 
 def get_user_survey_hours(username):
     """Return the user's survey hours from session state or DB. Deduplicates repeated pattern."""
+    # Login already fetched the survey; an empty dict then means "not filled", not "not loaded"
+    if st.session_state.get("survey_loaded"):
+        return st.session_state.get("avg_survey_hours") or {}
     return st.session_state.get("avg_survey_hours") or has_completed_survey(username) or {}
 
-APPLIANCES = {
-    "AC (1.5 ton)":          1500,
-    "Refrigerator":           150,
-    "Washing Machine":        500,
-    "TV (LED 43 inch)":       100,
-    "Fan (Ceiling)":           75,
-    "LED Bulb (10W)":          10,
-    "Water Heater (Geyser)": 2000,
-    "Microwave":             1200,
-    "Iron":                  1000,
-    "Computer/Laptop":        150,
-}
-
-# ─────────────────────────────────────────────
-# SEASONAL MULTIPLIERS (Maharashtra climate)
-# ─────────────────────────────────────────────
-# Each value = how much to scale the survey baseline for that month.
-# 1.0 = survey average. >1 = more usage. <1 = less usage.
-# Based on Maharashtra seasons:
-#   Hot summer  : Mar–Jun  (AC/Fan peak, Geyser off)
-#   Monsoon     : Jul–Sep  (moderate AC, Fan on, no Geyser)
-#   Winter      : Nov–Feb  (Geyser peak, AC off, Fan low)
-#   Transition  : Oct      (mild)
-SEASONAL_MULTIPLIERS = {
-    #                      Jan   Feb   Mar   Apr   May   Jun   Jul   Aug   Sep   Oct   Nov   Dec
-    "AC (1.5 ton)":       [0.1,  0.2,  0.7,  1.4,  2.0,  1.8,  1.2,  0.9,  0.7,  0.3,  0.1,  0.1],
-    "Fan (Ceiling)":      [0.4,  0.5,  0.8,  1.3,  1.8,  1.6,  1.4,  1.3,  1.1,  0.8,  0.5,  0.4],
-    "Water Heater (Geyser)":[1.8,1.6,  0.8,  0.3,  0.1,  0.1,  0.2,  0.2,  0.3,  0.7,  1.4,  1.8],
-    "Refrigerator":       [0.9,  0.9,  1.0,  1.1,  1.2,  1.2,  1.1,  1.0,  1.0,  1.0,  0.9,  0.9],
-    "Washing Machine":    [1.0,  1.0,  1.0,  1.0,  1.0,  1.1,  1.2,  1.2,  1.0,  1.0,  1.0,  1.0],
-    "TV (LED 43 inch)":   [1.1,  1.0,  1.0,  1.0,  1.0,  1.0,  1.1,  1.1,  1.0,  1.0,  1.1,  1.2],
-    "LED Bulb (10W)":     [1.1,  1.0,  0.9,  0.9,  0.9,  0.9,  1.0,  1.0,  1.0,  1.0,  1.1,  1.2],
-    "Microwave":          [1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0],
-    "Iron":               [1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0],
-    "Computer/Laptop":    [1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0],
-}
-
-def apply_seasonal_multipliers(base_hours: dict, month_name: str) -> dict:
-    """
-    Adjust survey baseline hours using seasonal weights for the given month.
-
-    Key design principle — bill-anchored, not assumption-anchored:
-    - Seasonal weights shift the *relative proportion* between appliances.
-    - A minimum floor (10% of base) is kept for every appliance so that if
-      the bill is unusually high (e.g. someone ran AC in January), that usage
-      can surface rather than being zeroed out by the season assumption.
-    - scale_hours_to_units() is always called after this, which forces the
-      total kWh to match the actual meter reading. So if January shows a high
-      bill, all appliances scale up proportionally — the seasonal weights only
-      determine the split, not the total.
-    """
-    month_idx = MONTH_ORDER.get(month_name, 0)
-    scaled = {}
-    for appliance, hrs in base_hours.items():
-        base = float(hrs)
-        if base == 0:
-            scaled[appliance] = 0.0
-            continue
-        multipliers = SEASONAL_MULTIPLIERS.get(appliance)
-        if multipliers:
-            seasonal_factor = multipliers[month_idx]
-            # Keep a 10% floor — prevents fully zeroing out appliances when
-            # the bill suggests they may have been used (e.g. AC in January)
-            floor_factor    = 0.1
-            effective_factor = max(seasonal_factor, floor_factor)
-            scaled[appliance] = round(base * effective_factor, 4)
-        else:
-            scaled[appliance] = base
-    return scaled
-
 # ─────────────────────────────────────────────
 # GLOBAL UI STYLES
 # ─────────────────────────────────────────────
@@ -774,13 +390,16 @@ if not st.session_state.logged_in:
             if st.button("Login", use_container_width=True):
                 if not username or not password:
                     st.error("Please enter both fields.")
-                elif verify_user(username, password):
+                elif (profile := run_hashed(authenticate, username, password)) is not None:
+                    # Supplier and survey arrive with the password hash; kept in
+                    # session state so later reruns never re-fetch them
                     st.session_state.logged_in = True
                     st.session_state.username = username
-                    st.session_state.supplier = load_supplier(username)
+                    st.session_state.supplier = profile.supplier
                     st.session_state.page = "input"
+                    st.session_state.survey_loaded = True
                     # Check if onboarding survey has been filled
-                    survey_data = has_completed_survey(username)
+                    survey_data = profile.survey
                     if survey_data is None:
                         st.session_state.show_onboarding_survey = True
                         st.session_state.avg_survey_hours = {}
@@ -814,7 +433,7 @@ if not st.session_state.logged_in:
                     st.warning("Password must be at least 4 characters.")
                 elif password != confirm_password:
                     st.error("Passwords do not match.")
-                elif register_user(username, password, security_question, security_answer):
+                elif run_hashed(register_user, username, password, security_question, security_answer):
                     st.success("Account created! Please log in.")
                     st.session_state.auth_page = "login"
                     st.rerun()
@@ -843,7 +462,7 @@ if not st.session_state.logged_in:
                 st.info(f"Question: {question}")
                 answer = st.text_input("Your Answer", key="forgot_answer")
                 if st.button("Verify", use_container_width=True):
-                    correct, _ = verify_security_answer(st.session_state.forgot_username, answer)
+                    correct, _ = run_hashed(verify_security_answer, st.session_state.forgot_username, answer)
                     if correct:
                         st.session_state.forgot_step = 3
                         st.rerun()
@@ -859,7 +478,7 @@ if not st.session_state.logged_in:
                     elif new_pass != confirm_pass:
                         st.error("Passwords do not match.")
                     else:
-                        reset_password(st.session_state.forgot_username, new_pass)
+                        run_hashed(reset_password, st.session_state.forgot_username, new_pass)
                         st.success("Password reset! Please log in.")
                         st.session_state.forgot_step = 1
                         st.session_state.forgot_username = ""
@@ -872,6 +491,8 @@ if not st.session_state.logged_in:
     st.markdown('</div>', unsafe_allow_html=True)
     st.stop()
 
+metrics.checkpoint("setup")
+
 # ─────────────────────────────────────────────
 # TOP NAV BAR
 # ─────────────────────────────────────────────
@@ -948,81 +569,39 @@ with nav_col4:
             st.rerun()
 
 
+metrics.checkpoint("navbar")
+
 # ─────────────────────────────────────────────
-# SCROLLING ALERT TICKER
+# PAGE DATA
 # ─────────────────────────────────────────────
-def build_ticker_alerts(username, supplier):
-    """Season-aware scrolling alerts — short and punchy."""
-    alerts = []
-    current_month = datetime.now().month - 1  # 0-indexed
-    is_summer  = current_month in [2,3,4,5]
-    is_monsoon = current_month in [6,7,8]
-    is_winter  = current_month in [10,11,0,1]
-
-    # 3 short season tips
-    if is_summer:
-        alerts += ["☀️ Summer: Set AC to 24°C — saves 24% vs 18°C",
-                   "☀️ Use fan + AC together — raise temp by 2°C with same comfort",
-                   "☀️ AC sleep timer: auto-off saves ~35 kWh/month"]
-    elif is_monsoon:
-        alerts += ["🌧️ Monsoon: Use fan-only mode before switching AC on",
-                   "🌧️ Washing machine — full loads only, clothes dry slower now",
-                   "🌧️ Cool rainy days — switch off AC, open windows"]
-    else:
-        alerts += ["❄️ Winter: Geyser on 15 min before use, off immediately after",
-                   "❄️ No need for AC this month — switch off at MCB",
-                   "❄️ Geyser left on all day costs ~Rs 115/day"]
-
-    # Last bill data
-    rows = load_user_data(username, datetime.now().year)
-    if not rows:
-        rows = load_user_data(username, datetime.now().year - 1)
-
-    if rows:
-        df_t = pd.DataFrame(rows, columns=["Month","Units","Bill","Rate"])
-        df_t["_o"] = df_t["Month"].map(MONTH_ORDER)
-        df_t = df_t.sort_values("_o").reset_index(drop=True)
-        last = df_t.iloc[-1]
-        units, bill, month = last["Units"], last["Bill"], last["Month"]
-
-        # Slab + saving
-        if units > 500:
-            s = round(bill - calculate_bill(500, supplier)["total"], 0)
-            tip = "Raise AC to 24°C" if is_summer else ("Cut geyser to 30 min" if is_winter else "Avoid AC + geyser together")
-            alerts.append(f"🔴 {month}: Rs {bill:.0f} · Slab 4 · Save Rs {s:.0f} → {tip}")
-        elif units > 300:
-            s = round(bill - calculate_bill(300, supplier)["total"], 0)
-            tip = "AC sleep timer on" if is_summer else ("Geyser off after use" if is_winter else "Unplug standby devices")
-            alerts.append(f"🟠 {month}: Rs {bill:.0f} · Slab 3 · Save Rs {s:.0f} → {tip}")
-        elif units > 100:
-            s = round(bill - calculate_bill(100, supplier)["total"], 0)
-            alerts.append(f"🟡 {month}: Rs {bill:.0f} · Slab 2 · Save Rs {s:.0f} → Use daylight, off fans in empty rooms")
-        else:
-            alerts.append(f"✅ {month}: Rs {bill:.0f} · Slab 1 · Great efficiency!")
-
-        # vs previous month
-        if len(df_t) >= 2:
-            prev = df_t.iloc[-2]
-            diff = round(bill - prev["Bill"], 0)
-            if diff > 0:
-                alerts.append(f"📈 Bill up Rs {diff:.0f} vs {prev['Month']} · {month}: Rs {bill:.0f}")
-            elif diff < 0:
-                alerts.append(f"📉 Bill down Rs {abs(diff):.0f} vs {prev['Month']} · Saved Rs {abs(diff):.0f}!")
+def page_reads():
+    """The store reads this rerun will make, as (fn, *args) calls for one concurrent fetch."""
+    username = st.session_state.username
+    calls    = ticker_reads(username, st.session_state.supplier)
+    if st.session_state.page == "dashboard":
+        # The selectbox keeps its value across reruns of the dashboard
+        year = st.session_state.get("dash_year_select", st.session_state.get("dash_year", datetime.now().year))
+        calls += [(load_years_with_data, username), (load_user_data, username, year),
+                  (load_year_summary, username, year), (load_all_appliance_data, username, year)]
+    elif st.session_state.page == "alerts":
+        calls.append((load_user_history, username))
+    elif st.session_state.get("just_saved"):
+        calls.append((load_user_history, username))
+        if not st.session_state.get("saved_hours"):
+            calls.append((load_all_appliance_data, username, st.session_state.saved_year))
+    return calls
+
+# Independent reads run side by side on pooled connections; pages then read
+# from page_data, which falls back to a direct call for anything unplanned
+page_data = prefetch.gather(page_reads())
+metrics.checkpoint("prefetch")
 
-        # CO2
-        co2 = round(units * 0.716, 1)
-        alerts.append(f"🌍 {month} CO₂: {co2} kg · {co2/22:.1f} trees/yr to offset")
-
-        # Yearly total
-        if len(df_t) >= 6:
-            alerts.append(f"📊 {len(df_t)} months · Rs {df_t['Bill'].sum():.0f} total this year")
-
-    else:
-        alerts.append("👋 Enter your first bill to get personalised alerts")
-
-    return alerts
-
-ticker_alerts = build_ticker_alerts(st.session_state.username, st.session_state.supplier)
+# ─────────────────────────────────────────────
+# SCROLLING ALERT TICKER
+# ─────────────────────────────────────────────
+# Cached per (user, supplier, calendar month, data generation) — see voltiq.ticker
+ticker_alerts, ticker_saved = load_ticker_alerts(st.session_state.username, st.session_state.supplier)
+st.session_state.ticker_reads_saved += ticker_saved
 ticker_text   = "   ·   ".join(ticker_alerts)
 
 st.markdown(f"""
@@ -1042,6 +621,7 @@ st.markdown(f"""
 }}
 </style>
 """, unsafe_allow_html=True)
+metrics.checkpoint("ticker")
 
 
 if st.session_state.get("show_onboarding_survey", False):
@@ -1080,10 +660,7 @@ if st.session_state.get("show_onboarding_survey", False):
                                       disabled=(qty == 0))
         onboard_hours[appliance] = {"qty": qty, "hrs": hrs_val if qty > 0 else 0.0}
 
-    total_survey_units = sum(
-        (APPLIANCES[a] * onboard_hours[a]["qty"] * onboard_hours[a]["hrs"] * 30) / 1000
-        for a in APPLIANCES if onboard_hours[a]["qty"] > 0 and onboard_hours[a]["hrs"] > 0
-    )
+    total_survey_units = survey_monthly_units(onboard_hours)
     if total_survey_units > 0:
         est_survey_bill = calculate_bill(total_survey_units, st.session_state.supplier)['total']
         st.info(f"📊 Based on your inputs — Estimated monthly usage: **{total_survey_units:.1f} kWh** | Estimated bill: **Rs {est_survey_bill:.0f}**")
@@ -1125,13 +702,14 @@ if st.session_state.page == "input":
             save_supplier(st.session_state.username, selected_supplier)
     with col_s2:
         sup = SUPPLIERS[st.session_state.supplier]
+        slab_rates = "/".join(f"Rs {r}" for r in get_tariff(st.session_state.supplier).rates)
         st.markdown(f"""
             <div style="background:{sup['color']}22;border:2px solid {sup['color']};
             padding:10px 14px;border-radius:8px;margin-top:4px;">
             <span style="font-size:13px;font-weight:bold;color:{sup['color']};">
             {sup['full_name']}</span><br>
             <span style="font-size:11px;color:#666;">
-            Slabs: Rs {sup['slabs'][0][1]}/Rs {sup['slabs'][1][1]}/Rs {sup['slabs'][2][1]}/Rs {sup['slabs'][3][1]} per unit
+            Slabs: {slab_rates} per unit
             </span></div>
         """, unsafe_allow_html=True)
 
@@ -1143,7 +721,7 @@ if st.session_state.page == "input":
         value=datetime.now().year, step=1, key="input_year"
     ))
 
-    manual_tab, upload_tab = st.tabs(["✏️ Manual Input", "📄 Upload Bill"])
+    manual_tab, upload_tab, import_tab = st.tabs(["✏️ Manual Input", "📄 Upload Bill", "📦 Bulk Import (CSV)"])
 
     # ── MANUAL INPUT ──
     with manual_tab:
@@ -1170,7 +748,7 @@ if st.session_state.page == "input":
         # Per-month appliance hours override
         with st.expander("🏠 Set appliance hours for this month (optional)", expanded=False):
             st.caption("Override your survey defaults for this specific month.")
-            survey_defaults = get_user_survey_hours(st.session_state.username)
+            survey_profile = as_profile(get_user_survey_hours(st.session_state.username))
 
             # Column headers
             ec1, ec2, ec3 = st.columns([2.5, 1, 1])
@@ -1185,11 +763,11 @@ if st.session_state.page == "input":
                     st.markdown(f"<div style='padding:7px 0;font-size:14px;color:#e2e8f0;'>{appliance} <span style='color:#6b7280;font-size:12px;'>({wattage}W)</span></div>", unsafe_allow_html=True)
                 with mc2:
                     # Pre-fill qty from survey defaults if available
-                    default_qty = int(survey_defaults.get(appliance, {}).get("qty", 0)) if isinstance(survey_defaults.get(appliance), dict) else (1 if float(survey_defaults.get(appliance, 0)) > 0 else 0) if survey_defaults else 0
+                    default_qty = int(survey_profile.qty[i])
                     qty = st.number_input("", min_value=0, max_value=20, value=default_qty, step=1,
                                          key=f"manual_qty_{i}", label_visibility="collapsed")
                 with mc3:
-                    default_hrs = float(survey_defaults.get(appliance, {}).get("hrs", 0.0)) if isinstance(survey_defaults.get(appliance), dict) else float(survey_defaults.get(appliance, 0.0)) if survey_defaults else 0.0
+                    default_hrs = float(survey_profile.hrs[i])
                     hrs_val = st.number_input("", min_value=0.0, max_value=24.0, value=default_hrs, step=0.5,
                                               key=f"manual_hrs_{i}", label_visibility="collapsed",
                                               disabled=(qty == 0))
@@ -1204,11 +782,7 @@ if st.session_state.page == "input":
                 effective_rate = round(bill_data['total'] / units_consumed, 2)
                 save_entry(st.session_state.username, selected_year, month, units_consumed, bill_data['total'], effective_rate)
                 # Use per-month override if filled, else scale survey hours with seasonal adjustment
-                has_manual_app = any(
-                    v.get("qty", 0) > 0 and v.get("hrs", 0) > 0
-                    if isinstance(v, dict) else v > 0
-                    for v in manual_app_hours.values()
-                )
+                has_manual_app = as_profile(manual_app_hours).has_usage()
                 if has_manual_app:
                     app_hours_to_save = manual_app_hours
                 else:
@@ -1226,67 +800,81 @@ if st.session_state.page == "input":
 
     # ── UPLOAD BILL ──
     with upload_tab:
-        st.markdown("#### Upload your electricity bill (PDF or Image)")
-        st.info("📌 PDF works best for digital bills. For Marathi or scanned bills, please use **Manual Input** tab instead.")
-        uploaded_file = st.file_uploader("Choose file", type=["pdf", "jpg", "jpeg", "png"], key="bill_upload")
-
-        if uploaded_file is not None:
-            mime_type = uploaded_file.type
-            is_image  = mime_type in ("image/jpeg", "image/png")
-            if is_image:
+        st.markdown("#### Upload your electricity bills (PDF or Image)")
+        st.info("📌 PDF works best for digital bills. Select several PDFs to import a whole year at once. For Marathi or scanned bills, please use **Manual Input** tab instead.")
+        uploaded_files = st.file_uploader("Choose files", type=["pdf", "jpg", "jpeg", "png"], key="bill_upload",
+                                          accept_multiple_files=True)
+
+        if uploaded_files:
+            pdf_files = [f for f in uploaded_files if f.type not in ("image/jpeg", "image/png")]
+            if len(pdf_files) < len(uploaded_files):
                 st.warning("⚠️ Image files cannot be auto-extracted. Please switch to **Manual Input** tab or upload the PDF version of your bill.")
-            elif not PDF_AVAILABLE:
+            if not PDF_AVAILABLE:
                 st.error("pdfplumber is not installed. Add `pdfplumber` to your requirements.txt and redeploy.")
-            else:
-                if st.button(" Extract Data ", use_container_width=True):
-                    with st.spinner("Reading your bill..."):
-                        try:
-                            file_bytes = uploaded_file.read()
-                            text = ""
-                            with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-                                for page in pdf.pages:
-                                    text += page.extract_text() or ""
-                            extracted = {}
-                            units_patterns = [
-                                r"Units\s*Consumed[:\s]+([\d,]+\.?\d*)",
-                                r"Net\s*Units[:\s]+([\d,]+\.?\d*)",
-                                r"Energy\s*Consumed[:\s]+([\d,]+\.?\d*)",
-                                r"Total\s*Units[:\s]+([\d,]+\.?\d*)",
-                                r"Consumption[:\s]+([\d,]+\.?\d*)\s*(?:kWh|KWH|Units)",
-                                r"([\d,]+\.?\d*)\s*(?:kWh|KWH|Units\s*Consumed)",
-                            ]
-                            for pat in units_patterns:
-                                m = re.search(pat, text, re.IGNORECASE)
-                                if m:
-                                    extracted["units"] = m.group(1).replace(",", "")
-                                    break
-                            month_map = {
-                                "january":"Jan","february":"Feb","march":"Mar","april":"Apr",
-                                "may":"May","june":"Jun","july":"Jul","august":"Aug",
-                                "september":"Sep","october":"Oct","november":"Nov","december":"Dec",
-                                "jan":"Jan","feb":"Feb","mar":"Mar","apr":"Apr","jun":"Jun",
-                                "jul":"Jul","aug":"Aug","sep":"Sep","oct":"Oct","nov":"Nov","dec":"Dec"
-                            }
-                            month_pat = r"(January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Oct|Nov|Dec)"
-                            m = re.search(month_pat, text, re.IGNORECASE)
-                            if m:
-                                extracted["month"] = month_map.get(m.group(1).lower(), m.group(1)[:3].capitalize())
-                            year_pat = r"(202[0-9]|203[0-9])"
-                            m = re.search(year_pat, text)
-                            if m:
-                                extracted["year"] = m.group(1)
-                            with st.expander("🔍 Debug: Raw PDF text"):
-                                st.text(text[:1000])
-                            if extracted.get("units"):
-                                st.session_state.extracted = extracted
-                                st.success(f"✅ Bill read! Units: {extracted.get('units')} | Month: {extracted.get('month','?')} | Year: {extracted.get('year','?')}")
-                                st.rerun()
-                            else:
-                                st.warning("⚠️ Could not auto-extract units. Please fill in manually below.")
-                                st.session_state.extracted = {"units": "0", "month": MONTH_NAMES[datetime.now().month-1], "year": str(datetime.now().year)}
-                                st.rerun()
-                        except Exception as e:
-                            st.error(f"Could not read bill: {e}. Please use Manual Input instead.")
+            elif pdf_files and st.button(" Extract Data ", use_container_width=True):
+                progress_bar = st.progress(0.0, text="Reading your bills...")
+                results = extract_bills(
+                    [(f.name, f.getvalue()) for f in pdf_files], supplier=st.session_state.supplier,
+                    progress=lambda done, total, r: progress_bar.progress(done / total, text=f"Read {done}/{total}: {r.name}"))
+                progress_bar.empty()
+                if len(results) == 1:
+                    r = results[0]
+                    if r.error:
+                        st.error(f"Could not read bill: {r.error}. Please use Manual Input instead.")
+                    else:
+                        with st.expander("🔍 Debug: Raw PDF text"):
+                            st.text(r.text)
+                        if r.units > 0:
+                            st.session_state.extracted = {"units": r.units, "month": r.month or MONTH_NAMES[0], "year": r.year,
+                                                          "amount": r.amount}
+                            st.success(f"✅ Bill read! Units: {r.units} | Month: {r.month or '?'} | Year: {r.year or '?'}"
+                                       f" | Amount: {f'Rs {r.amount:,.2f}' if r.amount else '?'}")
+                        else:
+                            st.warning("⚠️ Could not auto-extract units. Please fill in manually below.")
+                            st.session_state.extracted = {"units": 0, "month": MONTH_NAMES[datetime.now().month-1], "year": datetime.now().year}
+                        st.rerun()
+                else:
+                    st.session_state.extracted_batch = [
+                        {"File": r.name, "Year": r.year or selected_year,
+                         "Month": r.month if r.month in MONTH_NAMES else None,
+                         "Units": r.units, "Bill": r.amount, "Problem": r.error or ("" if r.units > 0 else "units not found")}
+                        for r in results
+                    ]
+                    st.rerun()
+
+        if st.session_state.extracted_batch:
+            st.markdown("---")
+            st.markdown("#### ✅ Confirm Extracted Bills")
+            st.caption("Fix any wrong or missing values; rows with zero units or no month are skipped.")
+            edited = st.data_editor(
+                pd.DataFrame(st.session_state.extracted_batch),
+                column_config={
+                    "File":    st.column_config.TextColumn(disabled=True),
+                    "Year":    st.column_config.NumberColumn(min_value=2000, max_value=2100, step=1),
+                    "Month":   st.column_config.SelectboxColumn(options=MONTH_NAMES),
+                    "Units":   st.column_config.NumberColumn(min_value=0.0, step=1.0),
+                    "Bill":    st.column_config.NumberColumn("Bill (Rs)", min_value=0.0, help="0 = calculate from your tariff"),
+                    "Problem": st.column_config.TextColumn(disabled=True),
+                },
+                hide_index=True, use_container_width=True, key="batch_editor",
+            )
+            valid = edited[(edited["Units"] > 0) & edited["Month"].isin(MONTH_NAMES) & edited["Year"].notna()]
+            # Later bills for the same month replace earlier ones, as on a re-upload
+            valid = valid.drop_duplicates(subset=["Year", "Month"], keep="last")
+            if st.button(f" Save {len(valid)} Bill(s) & Analyze", use_container_width=True, key="batch_save",
+                         disabled=valid.empty):
+                years   = valid["Year"].astype(int).tolist()
+                months  = valid["Month"].tolist()
+                units   = valid["Units"].astype(float).tolist()
+                printed = valid["Bill"].fillna(0).astype(float).tolist()
+                totals  = [p if p > 0 else c for p, c in zip(printed, calculate_bills(units, st.session_state.supplier)["total"].tolist())]
+                entries = [(y, m, u, b, round(b / u, 2)) for y, m, u, b in zip(years, months, units, totals)]
+                save_readings(st.session_state.username, entries, get_user_survey_hours(st.session_state.username))
+                st.session_state.extracted_batch = []
+                st.session_state.batch_saved     = len(entries)
+                st.rerun()
+        if st.session_state.get("batch_saved"):
+            st.success(f"✅ Saved {st.session_state.pop('batch_saved')} month(s) from your bills.")
 
         if st.session_state.extracted:
             ext = st.session_state.extracted
@@ -1306,6 +894,9 @@ if st.session_state.page == "input":
             with col2:
                 confirmed_month = st.selectbox("Month", MONTH_NAMES, index=MONTH_NAMES.index(ext_month), key="ext_month")
 
+            confirmed_amount = st.number_input("Bill Amount (Rs) — 0 to calculate from your tariff", min_value=0.0,
+                                               value=float(ext.get("amount") or 0.0), step=1.0, key="ext_amount")
+
             if confirmed_units > 0:
                 preview2 = calculate_bill(confirmed_units, st.session_state.supplier)
                 st.info(f"Estimated Bill: **Rs {preview2['total']}**")
@@ -1314,9 +905,9 @@ if st.session_state.page == "input":
                 if confirmed_units == 0:
                     st.error("Units cannot be zero.")
                 else:
-                    bill_data      = calculate_bill(confirmed_units, st.session_state.supplier)
-                    effective_rate = round(bill_data['total'] / confirmed_units, 2)
-                    save_entry(st.session_state.username, selected_year, confirmed_month, confirmed_units, bill_data['total'], effective_rate)
+                    bill_total     = confirmed_amount or calculate_bill(confirmed_units, st.session_state.supplier)['total']
+                    effective_rate = round(bill_total / confirmed_units, 2)
+                    save_entry(st.session_state.username, selected_year, confirmed_month, confirmed_units, bill_total, effective_rate)
                     avg_survey   = get_user_survey_hours(st.session_state.username)
                     seasonal     = apply_seasonal_multipliers(avg_survey, confirmed_month)
                     scaled_hours = scale_hours_to_units(seasonal, confirmed_units)
@@ -1324,12 +915,56 @@ if st.session_state.page == "input":
                     st.session_state.just_saved  = True
                     st.session_state.saved_month = confirmed_month
                     st.session_state.saved_units = confirmed_units
-                    st.session_state.saved_bill  = bill_data['total']
+                    st.session_state.saved_bill  = bill_total
                     st.session_state.saved_year  = selected_year
                     st.session_state.saved_hours = scaled_hours
                     st.session_state.extracted   = {}
                     st.rerun()
 
+    # ── BULK IMPORT ──
+    with import_tab:
+        st.markdown("#### Import past readings from a CSV file")
+        st.info(f"📌 Columns: **Month**, **Units** (or kWh), optional **Year**, **Date**, **Bill**/Amount and **Rate**. "
+                f"Rows without a Year or Date are saved under **{selected_year}**; missing bills are calculated for your supplier.")
+        csv_file = st.file_uploader("Choose CSV", type=["csv"], key="csv_import")
+        if csv_file is not None and st.button(" Import Readings ", use_container_width=True, key="csv_import_btn"):
+            with st.spinner("Importing readings..."):
+                report = import_csv(io.TextIOWrapper(csv_file, encoding="utf-8-sig", newline=""),
+                                    st.session_state.username, st.session_state.supplier,
+                                    default_year=selected_year,
+                                    survey=get_user_survey_hours(st.session_state.username))
+            if report.imported:
+                st.success(f"✅ Imported {report.imported} month(s) for {', '.join(map(str, sorted(report.years)))}.")
+            if report.errors:
+                st.warning(f"⚠️ {len(report.errors)} row(s) skipped.")
+                st.dataframe(pd.DataFrame(report.errors, columns=["Line", "Problem"]), hide_index=True, use_container_width=True)
+            elif not report.imported:
+                st.warning("⚠️ The file has no data rows.")
+
+        st.markdown("#### Restore a full VoltIQ backup")
+        st.caption("Every year, appliance hours, supplier and survey from a backup made on the Dashboard. Months already saved are overwritten; others are kept.")
+        if not PARQUET_AVAILABLE:
+            st.error("pyarrow is not installed. Add `pyarrow` to your requirements.txt and redeploy.")
+        else:
+            backup_file = st.file_uploader("Choose backup", type=["parquet"], key="archive_restore")
+            if backup_file is not None and st.button(" Restore Backup ", use_container_width=True, key="archive_restore_btn"):
+                try:
+                    with st.spinner("Restoring backup..."):
+                        info, report = restore_archive(backup_file, st.session_state.username)
+                except ValueError as e:
+                    st.error(f"❌ Could not read this backup: {e}")
+                else:
+                    if info.supplier:
+                        st.session_state.supplier = info.supplier
+                    if info.survey:
+                        st.session_state.avg_survey_hours = info.survey
+                        st.session_state.survey_loaded    = True
+                    st.success(f"✅ Restored {report.imported} month(s) for {', '.join(map(str, sorted(report.years))) or 'no years'} "
+                               f"(backup of {info.username}, {info.exported_at}).")
+                    if report.errors:
+                        st.warning(f"⚠️ {len(report.errors)} row(s) skipped.")
+                        st.dataframe(pd.DataFrame(report.errors, columns=["Row", "Problem"]), hide_index=True, use_container_width=True)
+
     # ── POST SAVE: Show current month summary + next month prediction ──
     if st.session_state.get("just_saved"):
         s_month  = st.session_state.saved_month
@@ -1354,14 +989,16 @@ if st.session_state.page == "input":
             st.metric("Effective Rate", f"Rs {eff_rate}/kWh")
 
         # Current month slab
-        if s_units <= 100:
-            slab_msg, slab_color = f"✅ Lowest slab — Rs {SUPPLIERS[supplier]['slabs'][0][1]}/unit", "#27ae60"
-        elif s_units <= 300:
-            slab_msg, slab_color = f"🟡 Slab 2 — Rs {SUPPLIERS[supplier]['slabs'][1][1]}/unit", "#f1c40f"
-        elif s_units <= 500:
-            slab_msg, slab_color = f"🟠 Slab 3 — Rs {SUPPLIERS[supplier]['slabs'][2][1]}/unit", "#0284c7"
+        tariff = get_tariff(supplier)
+        slab   = tariff.slab_index(s_units)
+        if slab == 0:
+            slab_msg, slab_color = f"✅ Lowest slab — Rs {tariff.rates[0]}/unit", "#27ae60"
+        elif slab == len(tariff.rates) - 1:
+            slab_msg, slab_color = f"🔴 Highest slab — Rs {tariff.rates[slab]}/unit", "#e74c3c"
+        elif slab == 1:
+            slab_msg, slab_color = f"🟡 Slab 2 — Rs {tariff.rates[1]}/unit", "#f1c40f"
         else:
-            slab_msg, slab_color = f"🔴 Highest slab — Rs {SUPPLIERS[supplier]['slabs'][3][1]}/unit", "#e74c3c"
+            slab_msg, slab_color = f"🟠 Slab {slab + 1} — Rs {tariff.rates[slab]}/unit", "#0284c7"
 
         st.markdown(f'''<div style="background:{slab_color}18;border:1px solid {slab_color}44;
           border-radius:14px;padding:14px 20px;margin:12px 0;display:flex;align-items:center;gap:12px;">
@@ -1370,12 +1007,10 @@ if st.session_state.page == "input":
           <div style="font-size:14px;color:#f9fafb;"><b style="color:{slab_color};">Current Slab · </b>{slab_msg}</div>
         </div>''', unsafe_allow_html=True)
 
-        # Load previous months for prediction
-        all_rows = load_user_data(st.session_state.username, s_year)
-        all_df = pd.DataFrame(all_rows, columns=['Month','Units','Bill','Rate']) if all_rows else pd.DataFrame()
-        if not all_df.empty:
-            all_df['_order'] = all_df['Month'].map(MONTH_ORDER)
-            all_df = all_df.sort_values('_order').drop(columns='_order').reset_index(drop=True)
+        # Load history up to the saved month for prediction (already ordered by year, month)
+        saved_pos = (s_year, MONTH_ORDER[s_month])
+        history_rows = [r for r in page_data.get(load_user_history, st.session_state.username)
+                        if (r[0], MONTH_ORDER[r[1]]) <= saved_pos]
 
         # Next month prediction
         st.markdown("---")
@@ -1383,20 +1018,9 @@ if st.session_state.page == "input":
 
         avg_survey = get_user_survey_hours(st.session_state.username)
 
-        if not all_df.empty and len(all_df) >= 2:
-            weights    = np.array([0.5, 0.3, 0.2]) if len(all_df) >= 3 else np.array([0.6, 0.4])
-            last_n     = all_df['Units'].iloc[-min(len(all_df),3):].values[::-1]
-            next_units = round(float(np.dot(weights[:len(last_n)], last_n[:len(weights)])), 1)
-        elif avg_survey:
-            # Use survey average hours to estimate expected usage
-            survey_units = sum(
-                (APPLIANCES[a] * effective_hours(avg_survey, a) * 30) / 1000
-                for a in APPLIANCES if effective_hours(avg_survey, a) > 0
-            )
-            # Blend: 60% current month actual, 40% survey baseline
-            next_units = round(s_units * 0.6 + survey_units * 0.4, 1) if survey_units > 0 else round(s_units * 1.05, 1)
-        else:
-            next_units = round(s_units * 1.05, 1)
+        units_history = [r[:3] for r in history_rows] or [(s_year, s_month, s_units)]
+        survey_units  = survey_monthly_units(avg_survey) if avg_survey else 0.0
+        next_units    = forecast_next(units_history, FORECAST_MODEL, avg_survey, survey_units)
 
         next_bill = calculate_bill(next_units, supplier)['total']
         curr_month_idx = MONTH_NAMES.index(s_month)
@@ -1425,24 +1049,6 @@ if st.session_state.page == "input":
             is_monsoon = month_idx in [6, 7, 8]        # Jul–Sep
             is_winter  = month_idx in [10, 11, 0, 1]   # Nov–Feb
 
-            # Realistic daily hour limits per appliance per month (Maharashtra household)
-            # AC: peak summer cap = 8 hrs (nights + evening). Winter = 0. Monsoon = 3–4.
-            # Geyser: winter = 1 hr max (30 min morning + 30 min evening). Summer = 0.
-            # Fan: running all day in summer is fine but 18+ hrs is excessive even in May.
-            SEASONAL_THRESHOLDS = {
-                #                          Jan  Feb  Mar  Apr  May  Jun  Jul  Aug  Sep  Oct  Nov  Dec
-                "AC (1.5 ton)":           [0,   0,   2,   5,   8,   7,   4,   3,   2,   1,   0,   0  ],
-                "Fan (Ceiling)":          [4,   5,   8,   12,  16,  16,  14,  14,  12,  8,   5,   4  ],
-                "Water Heater (Geyser)":  [1,   1,   0.5, 0.3, 0,   0,   0,   0,   0.3, 0.5, 1,   1  ],
-                "Refrigerator":           [24,  24,  24,  24,  24,  24,  24,  24,  24,  24,  24,  24 ],
-                "Washing Machine":        [1,   1,   1,   1,   1,   1.5, 1.5, 1.5, 1,   1,   1,   1  ],
-                "TV (LED 43 inch)":       [4,   4,   4,   4,   4,   4,   5,   5,   4,   4,   4,   5  ],
-                "LED Bulb (10W)":         [6,   6,   5,   5,   5,   5,   6,   6,   6,   6,   6,   7  ],
-                "Microwave":              [1,   1,   1,   1,   1,   1,   1,   1,   1,   1,   1,   1  ],
-                "Iron":                   [0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5],
-                "Computer/Laptop":        [6,   6,   6,   6,   6,   6,   6,   6,   6,   6,   6,   6  ],
-            }
-
             # Context-aware tips that change with the season
             reduction_tips = {
                 "AC (1.5 ton)": (
@@ -1478,18 +1084,13 @@ if st.session_state.page == "input":
             total_current_units = s_units
             total_current_bill  = s_bill
 
-            alert_data = []
-            for appliance, wattage in APPLIANCES.items():
-                raw_val = s_hours.get(appliance, 0)
-
-                # Extract qty and hrs_per_unit properly
-                if isinstance(raw_val, dict):
-                    qty      = int(raw_val.get("qty", 0))
-                    hrs_each = float(raw_val.get("hrs", 0))
-                else:
-                    # Old plain-number format — treat as 1 unit running that many hours
-                    qty      = 1 if float(raw_val) > 0 else 0
-                    hrs_each = float(raw_val)
+            # First pass: usage per appliance; bills are priced in one batch below
+            usage_rows = []
+            # Bare-hours entries read as 1 unit running that many hours
+            s_profile = as_profile(s_hours)
+            for j, (appliance, wattage) in enumerate(APPLIANCES.items()):
+                qty      = int(s_profile.qty[j])
+                hrs_each = float(s_profile.hrs[j])
 
                 if qty == 0 or hrs_each == 0:
                     continue
@@ -1499,7 +1100,6 @@ if st.session_state.page == "input":
 
                 # Total effective consumption: qty × wattage × hrs × 30 days
                 total_kwh = round((wattage * qty * hrs_each * 30) / 1000, 2)
-                current_cost = round(calculate_bill(total_kwh, supplier)['total'], 0)
 
                 # Seasonal limit is per-unit hrs/day — compare hrs_each against it
                 threshold_row = SEASONAL_THRESHOLDS.get(appliance, [8]*12)
@@ -1509,8 +1109,17 @@ if st.session_state.page == "input":
                 reduced_hrs_each  = min(hrs_each, limit) if limit > 0 else 0
                 reduced_total_kwh = round((wattage * qty * reduced_hrs_each * 30) / 1000, 2)
                 other_units       = total_current_units - total_kwh
-                new_total_bill    = calculate_bill(max(0, other_units) + reduced_total_kwh, supplier)['total']
-                bill_saving       = round(total_current_bill - new_total_bill, 0)
+                usage_rows.append((appliance, qty, hrs_each, limit, total_kwh, reduced_hrs_each,
+                                   max(0, other_units) + reduced_total_kwh))
+
+            current_costs = calculate_bills([r[4] for r in usage_rows], supplier)["total"]
+            reduced_bills = calculate_bills([r[6] for r in usage_rows], supplier)["total"]
+
+            alert_data = []
+            for (appliance, qty, hrs_each, limit, total_kwh, reduced_hrs_each, _), cost, new_total_bill in zip(
+                    usage_rows, current_costs, reduced_bills):
+                current_cost = round(float(cost), 0)
+                bill_saving  = round(total_current_bill - float(new_total_bill), 0)
 
                 if limit == 0 or hrs_each > limit:
                     status, border, bg, text_color = "🔴 HIGH USAGE", "#e74c3c", "rgba(231,76,60,.12)", "#fca5a5"
@@ -1551,7 +1160,7 @@ if st.session_state.page == "input":
                                        template="plotly_dark")
                     fig_alert.update_layout(height=420, xaxis_tickangle=-25,
                                             paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-                    st.plotly_chart(fig_alert, use_container_width=True)
+                    show_chart(fig_alert)
 
                     # Total saving banner below graph
                     total_possible_saving = sum(r['Bill Saving'] for r in alert_data if r['Bill Saving'] > 0)
@@ -1626,14 +1235,16 @@ if st.session_state.page == "input":
             section_header("💡", "Predicted Appliance-wise Cost", "Based on your current usage pattern")
             if using_survey_fallback:
                 st.caption("📋 Based on your onboarding survey average usage (no appliance data entered for this month yet).")
-            pred_data = []
-            for appliance, wattage in APPLIANCES.items():
-                hrs = effective_hours(display_hours, appliance)
-                if hrs == 0:
-                    continue
-                units_m = round((wattage * hrs * 30) / 1000, 2)
-                cost_m  = round(calculate_bill(units_m, supplier)["total"], 0)
-                pred_data.append({"Appliance": appliance, "Predicted Cost (Rs)": cost_m, "Units (kWh)": units_m})
+            display_profile = as_profile(display_hours)
+            pred_units = {
+                APPLIANCE_NAMES[j]: round(float(kwh), 2)
+                for j, kwh in enumerate(display_profile.monthly_kwh()) if display_profile.effective[j] != 0
+            }
+            pred_costs = calculate_bills(list(pred_units.values()), supplier)["total"]
+            pred_data = [
+                {"Appliance": appliance, "Predicted Cost (Rs)": round(float(cost_m), 0), "Units (kWh)": units_m}
+                for (appliance, units_m), cost_m in zip(pred_units.items(), pred_costs)
+            ]
             if pred_data:
                 pred_df = pd.DataFrame(pred_data).sort_values("Predicted Cost (Rs)", ascending=False)
                 fig_pred = px.bar(pred_df, x="Appliance", y="Predicted Cost (Rs)",
@@ -1645,7 +1256,7 @@ if st.session_state.page == "input":
                 fig_pred.update_traces(texttemplate="Rs %{text:.0f}", textposition="outside")
                 fig_pred.update_layout(height=400, xaxis_tickangle=-20, showlegend=False,
                                        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-                st.plotly_chart(fig_pred, use_container_width=True)
+                show_chart(fig_pred)
 
         st.markdown("")
         if st.button(" View Yearly Dashboard →", use_container_width=True):
@@ -1665,7 +1276,7 @@ elif st.session_state.page == "dashboard":
 
     # Year selector using actual years with data
     with st.spinner("Loading your data..."):
-        available_years = load_years_with_data(st.session_state.username)
+        available_years = page_data.get(load_years_with_data, st.session_state.username)
     current_year = datetime.now().year
     if current_year not in available_years:
         available_years = [current_year] + available_years
@@ -1678,20 +1289,23 @@ elif st.session_state.page == "dashboard":
         key="dash_year_select"
     )
 
-    rows = load_user_data(st.session_state.username, selected_year)
+    rows = page_data.get(load_user_data, st.session_state.username, selected_year)
 
     if rows:
         df = pd.DataFrame(rows, columns=["Month", "Units", "Bill", "Rate"])
         df["Month_Order"] = df["Month"].map(MONTH_ORDER)
         df = df.sort_values("Month_Order").reset_index(drop=True)
 
-        total_units = df["Units"].sum()
-        total_bill  = df["Bill"].sum()
-        avg_rate    = df["Rate"].mean()
-        last_units  = df["Units"].iloc[-1]
-        last_bill   = df["Bill"].iloc[-1]
+        # Headline numbers come from the materialised yearly_summary row
+        summary = page_data.get(load_year_summary, st.session_state.username, selected_year) or summarise_year(
+            rows, page_data.get(load_all_appliance_data, st.session_state.username, selected_year),
+            st.session_state.supplier)
+        total_units = summary["total_units"]
+        total_bill  = summary["total_bill"]
+        avg_rate    = summary["avg_rate"]
+        last_units  = summary["last_units"]
 
-        st.markdown(f'''<div style="font-size:13px;color:#6b7280;font-weight:600;text-transform:uppercase;letter-spacing:1px;margin-bottom:16px;">{selected_year} OVERVIEW · {len(df)}/12 MONTHS RECORDED</div>''', unsafe_allow_html=True)
+        st.markdown(f'''<div style="font-size:13px;color:#6b7280;font-weight:600;text-transform:uppercase;letter-spacing:1px;margin-bottom:16px;">{selected_year} OVERVIEW · {summary["months"]}/12 MONTHS RECORDED</div>''', unsafe_allow_html=True)
         col1, col2, col3, col4 = st.columns(4)
         with col1:
             st.metric("Total Units", f"{total_units:.0f} kWh")
@@ -1700,7 +1314,7 @@ elif st.session_state.page == "dashboard":
         with col3:
             st.metric("Avg Effective Rate", f"Rs {avg_rate:.2f}/kWh")
         with col4:
-            trend = "📈 UP" if df["Units"].iloc[-1] > df["Units"].iloc[0] else "📉 DOWN"
+            trend = "📈 UP" if summary["last_units"] > summary["first_units"] else "📉 DOWN"
             st.metric("Trend", trend)
 
         # ── CSV EXPORT ──
@@ -1713,101 +1327,90 @@ elif st.session_state.page == "dashboard":
             mime="text/csv",
         )
 
+        # ── FULL BACKUP ── all years, appliance hours, supplier and survey (voltiq.archive)
+        if PARQUET_AVAILABLE:
+            generation = user_generation(st.session_state.username)
+            if st.button("📦 Prepare Full Backup (Parquet)"):
+                with st.spinner("Packing every year..."):
+                    backup = io.BytesIO()
+                    write_archive(st.session_state.username, backup)
+                st.session_state.backup = (generation, backup.getvalue())
+            # Only offered while no write has happened since it was built
+            if st.session_state.get("backup", (None,))[0] == generation:
+                st.download_button(
+                    label="⬇️ Download Full Backup",
+                    data=st.session_state.backup[1],
+                    file_name=f"voltiq_{st.session_state.username}_backup.parquet",
+                    mime="application/vnd.apache.parquet",
+                )
+
         st.markdown("---")
+        metrics.checkpoint("dashboard.overview")
+
+        # Figures are rebuilt only when the year's data or the supplier changes
+        fig_key = (st.session_state.username, selected_year, st.session_state.supplier,
+                   data_version(st.session_state.username, selected_year))
 
         # ── CHART 1 — LINE ──
         section_header("📈","Daily Consumption Trend","Estimated daily usage from monthly totals")
-        daily_rows = []
-        for _, row in df.iterrows():
-            month_idx = MONTH_ORDER[row["Month"]] + 1
-            days_in_month = pd.Period(f"{selected_year}-{month_idx:02d}").days_in_month
-            daily_avg = row["Units"] / days_in_month
-            rng = np.random.default_rng(month_idx * 7)
-            noise = rng.normal(0, daily_avg * 0.1, days_in_month)
-            for d in range(1, days_in_month + 1):
-                daily_rows.append({"Date": f"{row['Month']} {d:02d}", "Units": round(max(0.1, daily_avg + noise[d-1]), 2), "Month": row["Month"]})
-        daily_df = pd.DataFrame(daily_rows)
-        fig_line = px.line(daily_df, x="Date", y="Units", color="Month",
-                           title=f"Estimated Daily Consumption ({selected_year}) — Simulated from monthly totals",
-                           labels={"Units": "Units (kWh)"},
-                           template="plotly_dark")
-        fig_line.update_traces(line=dict(width=1.5))
-        fig_line.update_layout(height=400, showlegend=True,
-                               paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-        fig_line.update_xaxes(showticklabels=False)
-        st.plotly_chart(fig_line, use_container_width=True)
+        def build_line():
+            daily_df = load_daily_series(st.session_state.username, selected_year)
+            fig_line = px.line(daily_df, x="Date", y="Units", color="Month",
+                               title=f"Estimated Daily Consumption ({selected_year}) — Simulated from monthly totals",
+                               labels={"Units": "Units (kWh)"},
+                               template="plotly_dark")
+            fig_line.update_traces(line=dict(width=1.5))
+            fig_line.update_layout(height=400, showlegend=True,
+                                   paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+            fig_line.update_xaxes(dtick="M1", tickformat="%b")
+            return fig_line
+        show_chart(cached_figure("line", *fig_key, build_line))
         st.caption("⚠️ Daily values are simulated from monthly totals using typical usage patterns — not actual meter readings.")
 
         st.markdown("---")
 
         # ── CHART 2 — BAR ──
         section_header("📊","Monthly Comparison","Units consumed vs bill amount per month")
-        fig_bar = px.bar(df, x="Month", y=["Units", "Bill"], barmode="group",
-                         title=f"Monthly Units & Bill Comparison ({selected_year})",
-                         labels={"value": "Units (kWh) / Bill (Rs)", "variable": "Metric"},
-                         color_discrete_map={"Units": "#38bdf8", "Bill": "#f59e0b"},
-                         template="plotly_dark")
-        fig_bar.update_layout(height=400,
-                              paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-        st.plotly_chart(fig_bar, use_container_width=True)
+        def build_bar():
+            fig_bar = px.bar(df, x="Month", y=["Units", "Bill"], barmode="group",
+                             title=f"Monthly Units & Bill Comparison ({selected_year})",
+                             labels={"value": "Units (kWh) / Bill (Rs)", "variable": "Metric"},
+                             color_discrete_map={"Units": "#38bdf8", "Bill": "#f59e0b"},
+                             template="plotly_dark")
+            fig_bar.update_layout(height=400,
+                                  paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+            return fig_bar
+        show_chart(cached_figure("bar", *fig_key, build_bar))
 
         st.markdown("---")
 
         # ── CHART 3 — PIE ──
         section_header("🥧","Appliance-wise Yearly Usage","How your energy is split across appliances")
-        appliance_rows = load_all_appliance_data(st.session_state.username, selected_year)
+        appliance_yearly_units = summary["appliance_units"]
+        appliance_yearly_cost  = summary["appliance_cost"]
+        appliance_months       = summary["appliance_months"]
 
         using_survey_fallback = False
-        if not appliance_rows:
+        if not appliance_months or summary["supplier"] != st.session_state.supplier:
             survey_avg = get_user_survey_hours(st.session_state.username)
-            if survey_avg:
+            if not appliance_months and survey_avg:
                 # Apply seasonal multipliers per month so summer months show
                 # more AC/Fan and winter months show more Geyser — not flat static data
-                appliance_rows = [
-                    (row["Month"], apply_seasonal_multipliers(survey_avg, row["Month"]))
-                    for _, row in df.iterrows()
-                ]
+                survey_months = df["Month"].tolist()
+                appliance_yearly_units, appliance_yearly_cost = breakdown_from_hours(
+                    rows, survey_months, seasonal_hours_batch(survey_avg, survey_months), st.session_state.supplier)
+                appliance_months = len(survey_months)
                 using_survey_fallback = True
+            else:
+                appliance_rows = page_data.get(load_all_appliance_data, st.session_state.username, selected_year)
+                appliance_yearly_units, appliance_yearly_cost = yearly_appliance_breakdown(
+                    rows, appliance_rows, st.session_state.supplier)
+                appliance_months = len(appliance_rows)
 
-        if appliance_rows:
+        if appliance_months:
             if using_survey_fallback:
                 st.caption(f"📋 No per-month appliance data found for {selected_year}. Using your onboarding survey averages scaled to each month's actual bill.")
 
-            month_bill_lookup  = dict(zip(df["Month"], df["Bill"]))
-            month_units_lookup = dict(zip(df["Month"], df["Units"]))
-            total_actual_bill  = df["Bill"].sum()
-            total_actual_units = df["Units"].sum()
-            supplier           = st.session_state.supplier
-
-            appliance_yearly_units = {}
-            appliance_yearly_cost  = {}
-
-            for month_name, hours_json in appliance_rows:
-                actual_bill  = month_bill_lookup.get(month_name, 0)
-                actual_units = month_units_lookup.get(month_name, 0)
-                if actual_bill == 0 or actual_units == 0:
-                    continue
-
-                month_kwh = {}
-                for appliance, wattage in APPLIANCES.items():
-                    hrs = effective_hours(hours_json, appliance)
-                    if hrs > 0:
-                        month_kwh[appliance] = (wattage * hrs * 30) / 1000
-
-                raw_total_kwh = sum(month_kwh.values())
-                if raw_total_kwh == 0:
-                    continue
-
-                for appliance, raw_kwh in month_kwh.items():
-                    scaled_kwh = (raw_kwh / raw_total_kwh) * actual_units
-                    appliance_yearly_units[appliance] = appliance_yearly_units.get(appliance, 0) + scaled_kwh
-
-                month_costs = {a: calculate_bill(kwh, supplier)["total"] for a, kwh in month_kwh.items()}
-                raw_cost_total = sum(month_costs.values())
-                for appliance, cost in month_costs.items():
-                    normalised = (cost / raw_cost_total) * actual_bill
-                    appliance_yearly_cost[appliance] = appliance_yearly_cost.get(appliance, 0) + normalised
-
             if appliance_yearly_units:
                 pie_df = pd.DataFrame({
                     "Appliance":        list(appliance_yearly_units.keys()),
@@ -1815,32 +1418,38 @@ elif st.session_state.page == "dashboard":
                     "Yearly Cost (Rs)": [round(appliance_yearly_cost[a], 0) for a in appliance_yearly_units]
                 }).sort_values("Yearly Cost (Rs)", ascending=False)
 
+                # The survey fallback isn't covered by data_version, so key those pies on their data
+                pie_variant = hash(tuple(pie_df.itertuples(index=False))) if using_survey_fallback else None
                 tab_units, tab_cost = st.tabs([" By Units (kWh)", " By Cost (Rs)"])
                 with tab_units:
-                    fig_pie_u = px.pie(pie_df, names="Appliance", values="Units (kWh)",
-                                       title=f"Appliance-wise Yearly Consumption — {selected_year} ({len(appliance_rows)} months)",
-                                       hole=0.35, template="plotly_dark")
-                    fig_pie_u.update_traces(textposition="inside", textinfo="percent+label")
-                    fig_pie_u.update_layout(height=500,
-                                            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-                    st.plotly_chart(fig_pie_u, use_container_width=True)
+                    def build_pie_units():
+                        fig_pie_u = px.pie(pie_df, names="Appliance", values="Units (kWh)",
+                                           title=f"Appliance-wise Yearly Consumption — {selected_year} ({appliance_months} months)",
+                                           hole=0.35, template="plotly_dark")
+                        fig_pie_u.update_traces(textposition="inside", textinfo="percent+label")
+                        fig_pie_u.update_layout(height=500,
+                                                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+                        return fig_pie_u
+                    show_chart(cached_figure(("pie_units", pie_variant), *fig_key, build_pie_units))
                     st.caption("📌 Shows raw kWh consumed by each appliance — based on wattage × usage hours.")
                 with tab_cost:
-                    fig_pie_c = px.pie(pie_df, names="Appliance", values="Yearly Cost (Rs)",
-                                       title=f"Appliance-wise Yearly Bill Share — {selected_year}",
-                                       hole=0.35, color_discrete_sequence=px.colors.sequential.RdBu,
-                                       template="plotly_dark")
-                    fig_pie_c.update_traces(textposition="inside", textinfo="percent+label")
-                    fig_pie_c.update_layout(height=500,
-                                            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-                    st.plotly_chart(fig_pie_c, use_container_width=True)
+                    def build_pie_cost():
+                        fig_pie_c = px.pie(pie_df, names="Appliance", values="Yearly Cost (Rs)",
+                                           title=f"Appliance-wise Yearly Bill Share — {selected_year}",
+                                           hole=0.35, color_discrete_sequence=px.colors.sequential.RdBu,
+                                           template="plotly_dark")
+                        fig_pie_c.update_traces(textposition="inside", textinfo="percent+label")
+                        fig_pie_c.update_layout(height=500,
+                                                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+                        return fig_pie_c
+                    show_chart(cached_figure(("pie_cost", pie_variant), *fig_key, build_pie_cost))
                     st.caption("📌 Shows bill share per appliance using slab-based pricing — high-wattage appliances cost disproportionately more due to higher slabs.")
 
                 a_col1, a_col2, a_col3 = st.columns(3)
                 with a_col1:
-                    st.metric("Total Yearly Units", f"{total_actual_units:.0f} kWh")
+                    st.metric("Total Yearly Units", f"{total_units:.0f} kWh")
                 with a_col2:
-                    st.metric("Total Yearly Bill", f"Rs {total_actual_bill:.0f}")
+                    st.metric("Total Yearly Bill", f"Rs {total_bill:.0f}")
                 with a_col3:
                     top_appliance = pie_df.iloc[0]["Appliance"]
                     st.metric("Top Consumer", top_appliance)
@@ -1853,22 +1462,24 @@ elif st.session_state.page == "dashboard":
 
         # ── CHART 4 — HEATMAP ──
         section_header("🌡️","Hourly Usage Heatmap","Estimated usage pattern across hours of the day")
-        hourly_weights = np.array([0.3,0.2,0.2,0.2,0.2,0.3,0.5,0.8,1.0,0.7,0.6,0.7,0.8,0.6,0.5,0.5,0.6,0.8,1.0,1.2,1.2,1.0,0.8,0.5])
-        hourly_weights = hourly_weights / hourly_weights.sum()
-        heatmap_data = []
-        for _, row in df.iterrows():
-            month_idx = MONTH_ORDER[row["Month"]] + 1
-            days_in_month = pd.Period(f"{selected_year}-{month_idx:02d}").days_in_month
-            heatmap_data.append((row["Units"] / days_in_month) * hourly_weights * 24)
-        fig_heat = px.imshow(np.array(heatmap_data),
-                             x=[f"{h:02d}:00" for h in range(24)], y=df["Month"].tolist(),
-                             color_continuous_scale="YlOrRd",
-                             title=f"Hourly Usage Heatmap ({selected_year})",
-                             labels={"x": "Hour of Day", "y": "Month", "color": "kWh"},
-                             aspect="auto", template="plotly_dark")
-        fig_heat.update_layout(height=400,
-                               paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-        st.plotly_chart(fig_heat, use_container_width=True)
+        def build_heat():
+            hourly_weights = np.array([0.3,0.2,0.2,0.2,0.2,0.3,0.5,0.8,1.0,0.7,0.6,0.7,0.8,0.6,0.5,0.5,0.6,0.8,1.0,1.2,1.2,1.0,0.8,0.5])
+            hourly_weights = hourly_weights / hourly_weights.sum()
+            heatmap_data = []
+            for _, row in df.iterrows():
+                month_idx = MONTH_ORDER[row["Month"]] + 1
+                days_in_month = pd.Period(f"{selected_year}-{month_idx:02d}").days_in_month
+                heatmap_data.append((row["Units"] / days_in_month) * hourly_weights * 24)
+            fig_heat = px.imshow(np.array(heatmap_data),
+                                 x=[f"{h:02d}:00" for h in range(24)], y=df["Month"].tolist(),
+                                 color_continuous_scale="YlOrRd",
+                                 title=f"Hourly Usage Heatmap ({selected_year})",
+                                 labels={"x": "Hour of Day", "y": "Month", "color": "kWh"},
+                                 aspect="auto", template="plotly_dark")
+            fig_heat.update_layout(height=400,
+                                   paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+            return fig_heat
+        show_chart(cached_figure("heat", *fig_key, build_heat))
         st.caption("Heatmap estimated based on typical Indian household hourly usage patterns.")
 
         st.markdown("---")
@@ -1903,6 +1514,13 @@ elif st.session_state.page == "dashboard":
                     st.session_state.delete_confirm_month = month_to_delete
                     st.rerun()
 
+        if st.secrets.get("SHOW_PERF_STATS", False):
+            fc = figure_cache.stats()
+            st.caption(f"⚡ Chart cache: {fc['hit_rate']:.0%} hit rate ({fc['hits']}/{fc['hits'] + fc['misses']}) · "
+                       f"{fc['saved_seconds']:.2f}s render time saved vs {fc['build_seconds']:.2f}s spent building · "
+                       f"{fc['entries']} figures, {fc['bytes'] / 1e6:.1f}/{fc['max_bytes'] / 1e6:.0f} MB, {fc['evictions']} evicted")
+            st.caption(f"⚡ Ticker cache: {st.session_state.ticker_reads_saved} store reads skipped this session")
+
     else:
         st.info(f"No data found for {selected_year}. Go to Enter Data page to add your monthly readings!")
         if st.button("Go to Enter Data →"):
@@ -1916,16 +1534,7 @@ elif st.session_state.page == "alerts":
     section_header("🔔", "Bill & Usage Alerts", "Personalized forecast and saving opportunities")
     supplier = st.session_state.supplier
 
-    years = load_years_with_data(st.session_state.username)
-    current_year = datetime.now().year
-    if current_year not in years:
-        years = [current_year] + years
-
-    all_rows = []
-    for yr in years:
-        rows = load_user_data(st.session_state.username, yr)
-        for r in rows:
-            all_rows.append((yr, r[0], r[1], r[2], r[3]))
+    all_rows = page_data.get(load_user_history, st.session_state.username)
 
     if not all_rows:
         st.info("No data found. Go to Enter Data to add your first bill entry!")
@@ -1934,20 +1543,14 @@ elif st.session_state.page == "alerts":
             st.rerun()
     else:
         all_df = pd.DataFrame(all_rows, columns=["Year","Month","Units","Bill","Rate"])
-        all_df["_o"] = all_df["Month"].map(MONTH_ORDER)
-        all_df = all_df.sort_values(["Year","_o"]).reset_index(drop=True)
         last_row        = all_df.iloc[-1]
         a_units         = last_row["Units"]
         a_bill          = last_row["Bill"]
         a_month         = last_row["Month"]
         a_year          = int(last_row["Year"])
 
-        if len(all_df) >= 2:
-            weights    = np.array([0.5, 0.3, 0.2]) if len(all_df) >= 3 else np.array([0.6, 0.4])
-            last_n     = all_df['Units'].iloc[-min(len(all_df),3):].values[::-1]
-            next_units = round(float(np.dot(weights[:len(last_n)], last_n[:len(weights)])), 1)
-        else:
-            next_units = round(a_units * 1.05, 1)
+        next_units      = forecast_next([r[:3] for r in all_rows], FORECAST_MODEL,
+                                        get_user_survey_hours(st.session_state.username))
         next_bill       = calculate_bill(next_units, supplier)['total']
         curr_month_idx  = MONTH_NAMES.index(a_month)
         next_month_name = MONTH_NAMES[(curr_month_idx + 1) % 12]
@@ -1985,18 +1588,21 @@ elif st.session_state.page == "alerts":
               <div style="font-size:16px;color:#f1f5f9;font-family:\'DM Sans\',\'Segoe UI\',system-ui,sans-serif;line-height:1.7;">{content}</div>
             </div>''', unsafe_allow_html=True)
 
-        if a_units > 500:
+        tariff     = get_tariff(supplier)
+        a_slab     = tariff.slab_index(a_units)
+        slab_floor = tariff.floors[a_slab]
+        if a_slab == 0:
+            big_alert("rgba(16,185,129,.18)","#10b981",
+                f"✅ <b style='font-size:17px;'>Excellent!</b><br>You're in the lowest slab (Rs {tariff.rates[0]}/unit). Keep usage under {tariff.ceilings[0]:.0f} kWh!")
+        elif a_slab == len(tariff.rates) - 1:
             big_alert("rgba(239,68,68,.18)","#ef4444",
-                f"🔴 <b style='font-size:17px;'>Very High Usage!</b><br>You're in the highest slab (Rs {SUPPLIERS[supplier]['slabs'][3][1]}/unit). Cutting by {a_units-500:.0f} kWh saves <b style='color:#fca5a5;'>Rs {a_bill-calculate_bill(500,supplier)['total']:.0f}</b> next month!")
-        elif a_units > 300:
-            big_alert("rgba(249,115,22,.18)","#f97316",
-                f"🟠 <b style='font-size:17px;'>High Slab Alert!</b><br>Reducing by {a_units-300:.0f} kWh could save <b style='color:#fdba74;'>Rs {a_bill-calculate_bill(300,supplier)['total']:.0f}</b> next month!")
-        elif a_units > 100:
+                f"🔴 <b style='font-size:17px;'>Very High Usage!</b><br>You're in the highest slab (Rs {tariff.rates[a_slab]}/unit). Cutting by {a_units-slab_floor:.0f} kWh saves <b style='color:#fca5a5;'>Rs {a_bill-calculate_bill(slab_floor,supplier)['total']:.0f}</b> next month!")
+        elif a_slab == 1:
             big_alert("rgba(234,179,8,.18)","#eab308",
-                f"🟡 <b style='font-size:17px;'>Slab Reduction Tip</b><br>Reduce by {a_units-100:.0f} kWh to drop to the lowest slab and save <b style='color:#fde68a;'>Rs {a_bill-calculate_bill(100,supplier)['total']:.0f}</b>!")
+                f"🟡 <b style='font-size:17px;'>Slab Reduction Tip</b><br>Reduce by {a_units-slab_floor:.0f} kWh to drop to the lowest slab and save <b style='color:#fde68a;'>Rs {a_bill-calculate_bill(slab_floor,supplier)['total']:.0f}</b>!")
         else:
-            big_alert("rgba(16,185,129,.18)","#10b981",
-                f"✅ <b style='font-size:17px;'>Excellent!</b><br>You're in the lowest slab (Rs {SUPPLIERS[supplier]['slabs'][0][1]}/unit). Keep usage under 100 kWh!")
+            big_alert("rgba(249,115,22,.18)","#f97316",
+                f"🟠 <b style='font-size:17px;'>High Slab Alert!</b><br>Reducing by {a_units-slab_floor:.0f} kWh could save <b style='color:#fdba74;'>Rs {a_bill-calculate_bill(slab_floor,supplier)['total']:.0f}</b> next month!")
 
         if next_units > a_units * 1.15:
             big_alert("rgba(56,189,248,.18)","#38bdf8",
@@ -2023,282 +1629,15 @@ elif st.session_state.page == "alerts":
 
 st.markdown("---")
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# ─────────────────────────────────────────────
+# PERF DEBUG PANEL (SHOW_PERF_STATS)
+# ─────────────────────────────────────────────
+metrics.checkpoint(f"page.{st.session_state.page}")
+if metrics.enabled():
+    trace = metrics.end_run(st.session_state.page)
+    with st.expander(f"🛠 Rerun trace — {trace.seconds * 1000:.0f} ms · {trace.queries} queries · "
+                     f"{trace.bytes / 1024:.1f} KB fetched"):
+        st.dataframe(pd.DataFrame(
+            [("  " * depth + name, seconds * 1000, queries, nbytes) for name, seconds, queries, nbytes, depth in trace.sections],
+            columns=["Section", "ms", "Queries", "Bytes"]), use_container_width=True, hide_index=True)
+        st.code(metrics.export_prometheus(), language="text")
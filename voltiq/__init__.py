@@ -0,0 +1,26 @@
+"""
+Headless core of the VoltIQ app — importable from batch jobs and workers
+without Streamlit. Nothing here does I/O at import time; the database pool
+is created by ``db.configure()`` / ``db.configure_from_env()`` on demand.
+
+    tariff      supplier tariffs, calculate_bill / calculate_bills
+    appliances  appliance wattages, seasonal model, hour scaling
+    forecast    next-month forecast models and their backtest (also a CLI)
+    series      simulated daily consumption series (memoised)
+    figures     size-bounded cache of built Plotly figures
+    store       cached persistence for profiles and monthly data
+    prefetch    concurrent fetch phase for a page's store reads
+    summary     per-year aggregates materialised in yearly_summary
+    ticker      season-aware alert ticker, cached per data generation
+    importer    bulk CSV import of historical readings (also a CLI)
+    archive     full-account Parquet backup and restore (also a CLI)
+    bills       parallel PDF bill extraction (also a CLI)
+    bill_rules  supplier-specific, confidence-scored bill field rules
+    auth        password hashing and account helpers
+    hashing     bounded executor every scrypt call runs on
+    db          process-wide connection pool
+    metrics     opt-in rerun timing, query counts, Prometheus export
+    migrations  versioned schema migrations
+    constants   month names and order, CO2 factor
+    numeric     NumPy helpers that match the scalar paths bit-for-bit
+"""
@@ -0,0 +1,392 @@
+"""
+Appliance model: wattages, seasonal usage weights and the helpers that turn
+survey hours into monthly kWh.
+
+Appliance hours come in two JSONB shapes — ``{"qty": 2, "hrs": 4.0}`` per
+appliance, or a bare number of hours (older rows). ApplianceProfile reads
+either shape once into fixed-layout arrays; the helpers below work on it.
+"""
+import numpy as np
+
+from voltiq.constants import MONTH_ORDER
+from voltiq.numeric import round_like_python
+from voltiq.tariff import calculate_bills
+
+APPLIANCES = {
+    "AC (1.5 ton)":          1500,
+    "Refrigerator":           150,
+    "Washing Machine":        500,
+    "TV (LED 43 inch)":       100,
+    "Fan (Ceiling)":           75,
+    "LED Bulb (10W)":          10,
+    "Water Heater (Geyser)": 2000,
+    "Microwave":             1200,
+    "Iron":                  1000,
+    "Computer/Laptop":        150,
+}
+
+# ─────────────────────────────────────────────
+# SEASONAL MULTIPLIERS (Maharashtra climate)
+# ─────────────────────────────────────────────
+# Each value = how much to scale the survey baseline for that month.
+# 1.0 = survey average. >1 = more usage. <1 = less usage.
+# Based on Maharashtra seasons:
+#   Hot summer  : Mar–Jun  (AC/Fan peak, Geyser off)
+#   Monsoon     : Jul–Sep  (moderate AC, Fan on, no Geyser)
+#   Winter      : Nov–Feb  (Geyser peak, AC off, Fan low)
+#   Transition  : Oct      (mild)
+SEASONAL_MULTIPLIERS = {
+    #                      Jan   Feb   Mar   Apr   May   Jun   Jul   Aug   Sep   Oct   Nov   Dec
+    "AC (1.5 ton)":       [0.1,  0.2,  0.7,  1.4,  2.0,  1.8,  1.2,  0.9,  0.7,  0.3,  0.1,  0.1],
+    "Fan (Ceiling)":      [0.4,  0.5,  0.8,  1.3,  1.8,  1.6,  1.4,  1.3,  1.1,  0.8,  0.5,  0.4],
+    "Water Heater (Geyser)":[1.8,1.6,  0.8,  0.3,  0.1,  0.1,  0.2,  0.2,  0.3,  0.7,  1.4,  1.8],
+    "Refrigerator":       [0.9,  0.9,  1.0,  1.1,  1.2,  1.2,  1.1,  1.0,  1.0,  1.0,  0.9,  0.9],
+    "Washing Machine":    [1.0,  1.0,  1.0,  1.0,  1.0,  1.1,  1.2,  1.2,  1.0,  1.0,  1.0,  1.0],
+    "TV (LED 43 inch)":   [1.1,  1.0,  1.0,  1.0,  1.0,  1.0,  1.1,  1.1,  1.0,  1.0,  1.1,  1.2],
+    "LED Bulb (10W)":     [1.1,  1.0,  0.9,  0.9,  0.9,  0.9,  1.0,  1.0,  1.0,  1.0,  1.1,  1.2],
+    "Microwave":          [1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0],
+    "Iron":               [1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0],
+    "Computer/Laptop":    [1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0],
+}
+
+# Realistic daily hour limits per appliance per month (Maharashtra household)
+# AC: peak summer cap = 8 hrs (nights + evening). Winter = 0. Monsoon = 3–4.
+# Geyser: winter = 1 hr max (30 min morning + 30 min evening). Summer = 0.
+# Fan: running all day in summer is fine but 18+ hrs is excessive even in May.
+SEASONAL_THRESHOLDS = {
+    #                          Jan  Feb  Mar  Apr  May  Jun  Jul  Aug  Sep  Oct  Nov  Dec
+    "AC (1.5 ton)":           [0,   0,   2,   5,   8,   7,   4,   3,   2,   1,   0,   0  ],
+    "Fan (Ceiling)":          [4,   5,   8,   12,  16,  16,  14,  14,  12,  8,   5,   4  ],
+    "Water Heater (Geyser)":  [1,   1,   0.5, 0.3, 0,   0,   0,   0,   0.3, 0.5, 1,   1  ],
+    "Refrigerator":           [24,  24,  24,  24,  24,  24,  24,  24,  24,  24,  24,  24 ],
+    "Washing Machine":        [1,   1,   1,   1,   1,   1.5, 1.5, 1.5, 1,   1,   1,   1  ],
+    "TV (LED 43 inch)":       [4,   4,   4,   4,   4,   4,   5,   5,   4,   4,   4,   5  ],
+    "LED Bulb (10W)":         [6,   6,   5,   5,   5,   5,   6,   6,   6,   6,   6,   7  ],
+    "Microwave":              [1,   1,   1,   1,   1,   1,   1,   1,   1,   1,   1,   1  ],
+    "Iron":                   [0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5],
+    "Computer/Laptop":        [6,   6,   6,   6,   6,   6,   6,   6,   6,   6,   6,   6  ],
+}
+
+APPLIANCE_NAMES = tuple(APPLIANCES)   # the fixed column order of every profile array
+APPLIANCE_INDEX = {a: j for j, a in enumerate(APPLIANCE_NAMES)}
+SEASONAL_FLOOR  = 0.1
+_WATTS          = np.array([APPLIANCES[a] for a in APPLIANCE_NAMES], dtype=float)
+# (12, n_appliances) seasonal factors with the 10% floor already applied
+_SEASONAL_FACTORS = np.maximum(
+    np.array([SEASONAL_MULTIPLIERS[a] for a in APPLIANCE_NAMES], dtype=float).T, SEASONAL_FLOOR)
+# Hours/day of a typical household, for when there is no survey to go on
+_TYPICAL_HOURS = np.array([np.mean(SEASONAL_THRESHOLDS[a]) for a in APPLIANCE_NAMES])
+
+
+# ─────────────────────────────────────────────
+# PROFILE
+# ─────────────────────────────────────────────
+class ApplianceProfile:
+    """
+    Fixed-layout appliance usage: float arrays of quantity and hours/day per
+    unit, indexed by APPLIANCE_NAMES. The JSONB shape is sniffed once, in
+    from_json(); everything downstream works on the arrays.
+
+    ``present`` and ``legacy`` record which keys the JSON had and which were
+    bare hours, so to_json() gives back the document it was built from. A
+    bare value h is held as qty 1 (0 when h is 0) and hrs h, so qty x hrs is
+    exactly h. Keys outside APPLIANCES have no wattage; they are carried in
+    ``extra`` untouched and take no part in any calculation.
+    """
+    __slots__ = ("qty", "hrs", "present", "legacy", "extra")
+
+    def __init__(self, qty, hrs, present, legacy, extra=None):
+        self.qty     = qty
+        self.hrs     = hrs
+        self.present = present
+        self.legacy  = legacy
+        self.extra   = extra or {}
+
+    @classmethod
+    def from_json(cls, data):
+        n = len(APPLIANCE_NAMES)
+        qty, hrs = np.zeros(n), np.zeros(n)
+        present, legacy = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        extra = {}
+        for name, val in (data or {}).items():
+            j = APPLIANCE_INDEX.get(name)
+            if j is None:
+                extra[name] = val
+                continue
+            present[j] = True
+            if isinstance(val, dict):
+                qty[j] = float(val.get("qty", 0))
+                hrs[j] = float(val.get("hrs", 0))
+            else:
+                hrs[j] = float(val)
+                qty[j] = 1.0 if hrs[j] else 0.0
+                legacy[j] = True
+        return cls(qty, hrs, present, legacy, extra)
+
+    @classmethod
+    def from_hours(cls, hours, present=None, extra=None):
+        """Bare-hours profile (the shape seasonal/scaled estimates are stored in)."""
+        hours = np.asarray(hours, dtype=float)
+        present = np.ones(len(hours), dtype=bool) if present is None else present
+        return cls((hours != 0).astype(float), hours, present, np.ones(len(hours), dtype=bool), dict(extra or {}))
+
+    def to_json(self):
+        out = {}
+        for j in np.flatnonzero(self.present):
+            if self.legacy[j]:
+                out[APPLIANCE_NAMES[j]] = float(self.hrs[j])
+            else:
+                out[APPLIANCE_NAMES[j]] = {"qty": int(self.qty[j]), "hrs": float(self.hrs[j])}
+        out.update(self.extra)
+        return out
+
+    @property
+    def effective(self):
+        """Effective hours/day per appliance (qty x hours per unit)."""
+        return self.qty * self.hrs
+
+    def monthly_kwh(self):
+        """Per-appliance kWh over 30 days, in APPLIANCE_NAMES order."""
+        return (_WATTS * self.effective * 30) / 1000
+
+    def total_monthly_kwh(self):
+        eff = self.effective
+        # Summed in APPLIANCES order so the total matches a running sum() bit for bit
+        return sum(self.monthly_kwh()[eff > 0].tolist())
+
+    def has_usage(self):
+        return bool((self.effective > 0).any())
+
+    def seasonal(self, month_name):
+        """Hours adjusted by the month's seasonal weights (10% floor), as bare hours."""
+        factors = _SEASONAL_FACTORS[MONTH_ORDER.get(month_name, 0)]
+        return ApplianceProfile.from_hours(round_like_python(self.effective * factors, 4),
+                                        self.present.copy(), self.extra)
+
+    def scaled_to(self, actual_units):
+        """
+        Hours scaled so total kWh matches ``actual_units``, each capped at
+        24/day. Returns self unchanged when there is nothing to scale.
+        """
+        if not self or actual_units == 0:
+            return self
+        total = self.total_monthly_kwh()
+        if total == 0:
+            return self
+        scaled = round_like_python(np.minimum(self.effective * (actual_units / total), 24.0), 4)
+        return ApplianceProfile.from_hours(np.where(self.present, scaled, 0.0), self.present.copy(), self.extra)
+
+    def __bool__(self):
+        return bool(self.present.any() or self.extra)
+
+    def __repr__(self):
+        return f"ApplianceProfile({self.to_json()!r})"
+
+
+def as_profile(hours):
+    """``hours`` as an ApplianceProfile — JSONB dicts (either shape) are converted once."""
+    return hours if isinstance(hours, ApplianceProfile) else ApplianceProfile.from_json(hours)
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+def effective_hours(survey, appliance):
+    """
+    Return effective hours/day for an appliance.
+    New format: {"qty": 2, "hrs": 4.0} → 2 × 4.0 = 8.0
+    Old format: 4.0 (plain number)     → 4.0  (backward compatible)
+    """
+    if isinstance(survey, ApplianceProfile):
+        j = APPLIANCE_INDEX.get(appliance)
+        return float(survey.effective[j]) if j is not None else 0.0
+    val = survey.get(appliance, 0)
+    if isinstance(val, dict):
+        return float(val.get("qty", 0)) * float(val.get("hrs", 0))
+    return float(val)
+
+def survey_monthly_units(avg_hours):
+    """Unscaled monthly kWh implied by survey hours (wattage × hours × 30 days)."""
+    return as_profile(avg_hours).total_monthly_kwh()
+
+def scale_hours_to_units(avg_hours, actual_units):
+    """
+    Scale survey appliance hours so total kWh roughly matches actual_units.
+    Hours are capped at 24/day (physically impossible to exceed).
+    If the bill is far higher than what the survey appliances can explain,
+    the hours are capped and the remainder is left unattributed rather than
+    producing impossible values like 50 hrs/day.
+    Takes and returns JSONB-shaped dicts; see ApplianceProfile.scaled_to().
+    """
+    if not avg_hours:
+        return avg_hours
+    profile = as_profile(avg_hours)
+    scaled  = profile.scaled_to(actual_units)
+    return avg_hours if scaled is profile else scaled.to_json()
+
+def apply_seasonal_multipliers(base_hours: dict, month_name: str) -> dict:
+    """
+    Adjust survey baseline hours using seasonal weights for the given month.
+
+    Key design principle — bill-anchored, not assumption-anchored:
+    - Seasonal weights shift the *relative proportion* between appliances.
+    - A minimum floor (10% of base) is kept for every appliance so that if
+      the bill is unusually high (e.g. someone ran AC in January), that usage
+      can surface rather than being zeroed out by the season assumption.
+    - scale_hours_to_units() is always called after this, which forces the
+      total kWh to match the actual meter reading. So if January shows a high
+      bill, all appliances scale up proportionally — the seasonal weights only
+      determine the split, not the total.
+
+    The base is each appliance's effective hours, so {"qty","hrs"} surveys
+    work as well as bare hours. Returns bare hours per appliance.
+    """
+    return as_profile(base_hours).seasonal(month_name).to_json()
+
+
+# ─────────────────────────────────────────────
+# BATCH ESTIMATE
+# ─────────────────────────────────────────────
+def seasonal_hours_batch(avg_hours, month_names):
+    """
+    apply_seasonal_multipliers() for many months at once: an
+    (n_months, len(APPLIANCE_NAMES)) array of effective hours/day, each
+    appliance's base weighted by the month's floored seasonal factor.
+    ``avg_hours`` is an ApplianceProfile or a JSONB dict of either shape.
+    """
+    month_idx = np.array([MONTH_ORDER.get(m, 0) for m in month_names], dtype=int)
+    return round_like_python(as_profile(avg_hours).effective * _SEASONAL_FACTORS[month_idx], 4)
+
+
+def estimate_hours_batch(avg_hours, month_names, units):
+    """
+    apply_seasonal_multipliers() then scale_hours_to_units() for many months
+    in one NumPy pass. Returns an (n_months, len(APPLIANCE_NAMES)) array of
+    hours/day with the same rounding and 24 h cap as the scalar functions.
+    """
+    units     = np.asarray(units, dtype=float)
+    seasonal  = seasonal_hours_batch(avg_hours, month_names).reshape(len(units), len(APPLIANCE_NAMES))
+
+    # Summed column by column, in APPLIANCES order, so totals match sum() bit for bit
+    kwh_total = np.zeros(len(units))
+    for j in range(len(APPLIANCE_NAMES)):
+        kwh_total = kwh_total + (_WATTS[j] * seasonal[:, j] * 30) / 1000
+    scalable = (units != 0) & (kwh_total != 0)
+    scale = np.divide(units, kwh_total, out=np.zeros_like(units), where=scalable)
+    scaled = round_like_python(np.minimum(seasonal * scale[:, None], 24.0), 4)
+    return np.where(scalable[:, None], scaled, seasonal)
+
+
+def seasonal_load_index(avg_hours=None):
+    """
+    (12,) multiplier on a household's mean monthly kWh for each calendar
+    month, implied by SEASONAL_MULTIPLIERS weighted by the profile's kWh
+    per appliance. With no (or an empty) profile, a typical household — the
+    annual mean of SEASONAL_THRESHOLDS — is used.
+    """
+    base = as_profile(avg_hours).effective
+    if not (_WATTS * base).any():
+        base = _TYPICAL_HOURS
+    monthly = _SEASONAL_FACTORS @ (_WATTS * base)
+    return monthly / monthly.mean()
+
+
+def usage_rows(hours):
+    """
+    ``hours`` (JSONB of either shape, or a profile) as appliance_usage rows:
+    (appliance, qty, hrs, kwh) per appliance present, kwh being the unscaled
+    wattage x qty x hrs over 30 days, as in monthly_kwh(). Keys outside
+    APPLIANCES have no wattage and are left out.
+    """
+    profile = as_profile(hours)
+    kwh = profile.monthly_kwh()
+    return [(APPLIANCE_NAMES[j], float(profile.qty[j]), float(profile.hrs[j]), float(kwh[j]))
+            for j in np.flatnonzero(profile.present)]
+
+
+def hours_rows_to_dicts(matrix, keys=APPLIANCE_NAMES):
+    """Rows of an estimate_hours_batch() matrix as {appliance: hours} dicts limited to ``keys``."""
+    cols = [(j, a) for j, a in enumerate(APPLIANCE_NAMES) if a in keys]
+    return [{a: float(row[j]) for j, a in cols} for row in matrix]
+
+
+# ─────────────────────────────────────────────
+# COST ATTRIBUTION
+# ─────────────────────────────────────────────
+def appliance_hours_matrix(appliance_rows):
+    """(months, hours) for (month, appliance_hours) rows: hours is (n, len(APPLIANCE_NAMES)) effective hours/day."""
+    months = [m for m, _ in appliance_rows]
+    hours  = np.array([as_profile(h).effective for _, h in appliance_rows],
+                      dtype=float).reshape(len(months), len(APPLIANCE_NAMES))
+    return months, hours
+
+
+def attribute_usage(hours, units, bills, supplier):
+    """
+    Split each row's metered ``units`` and ``bills`` across appliances.
+
+    ``hours`` is (n, A) in APPLIANCE_NAMES order. Each row's wattage x hours
+    kWh is scaled to the metered units; its cost share comes from pricing
+    every appliance's kWh on the supplier's slabs in one calculate_bills
+    call (so heavy loads weigh more), scaled to the actual bill. Returns
+    (kwh, cost, used): two (n, A) arrays and the row mask; rows with no
+    bill, no units or no appliance kWh are all-zero and ``used`` False.
+    """
+    hours  = np.asarray(hours, dtype=float)
+    units  = np.asarray(units, dtype=float)
+    bills  = np.asarray(bills, dtype=float)
+    active = hours > 0
+    raw    = np.where(active, (_WATTS * hours * 30) / 1000, 0.0)
+
+    prices = np.zeros_like(raw)
+    prices[active] = calculate_bills(raw[active], supplier)["total"]
+
+    # Column by column, in APPLIANCES order, so totals match sum() bit for bit
+    raw_total  = np.zeros(len(raw))
+    cost_total = np.zeros(len(raw))
+    for j in range(raw.shape[1]):
+        raw_total  = raw_total + raw[:, j]
+        cost_total = cost_total + prices[:, j]
+
+    used  = (units != 0) & (bills != 0) & (raw_total != 0)
+    cells = active & used[:, None]
+    kwh   = np.zeros_like(raw)
+    cost  = np.zeros_like(raw)
+    rows  = np.nonzero(cells)[0]
+    kwh[cells]  = (raw[cells] / raw_total[rows]) * units[rows]
+    cost[cells] = (prices[cells] / cost_total[rows]) * bills[rows]
+    return kwh, cost, used
+
+
+def yearly_appliance_breakdown(month_rows, appliance_rows, supplier):
+    """
+    Attribute a year's metered units and bills to appliances.
+    ``month_rows`` are (month, units, bill, ...) and ``appliance_rows`` are
+    (month, appliance_hours); see attribute_usage(). Returns
+    ({appliance: kWh}, {appliance: Rs}) for appliances with any usage,
+    in order of first appearance.
+    """
+    months, hours = appliance_hours_matrix(appliance_rows)
+    return breakdown_from_hours(month_rows, months, hours, supplier)
+
+
+def breakdown_from_hours(month_rows, months, hours, supplier):
+    """yearly_appliance_breakdown() for an (n, A) hours matrix whose rows are ``months``."""
+    month_units = {r[0]: r[1] for r in month_rows}
+    month_bill  = {r[0]: r[2] for r in month_rows}
+    kwh, cost, used = attribute_usage(hours,
+                                      [month_units.get(m, 0) for m in months],
+                                      [month_bill.get(m, 0) for m in months], supplier)
+
+    # Months accumulate in row order, matching a running per-appliance sum
+    yearly_kwh, yearly_cost = np.zeros(len(APPLIANCE_NAMES)), np.zeros(len(APPLIANCE_NAMES))
+    for i in np.flatnonzero(used):
+        yearly_kwh  = yearly_kwh + kwh[i]
+        yearly_cost = yearly_cost + cost[i]
+    present = np.asarray(hours)[used] > 0
+    if not present.any():
+        return {}, {}
+    first = np.where(present.any(axis=0), present.argmax(axis=0), len(present))
+    order = [j for j in sorted(range(len(APPLIANCE_NAMES)), key=lambda j: (first[j], j)) if first[j] < len(present)]
+    return ({APPLIANCE_NAMES[j]: float(yearly_kwh[j]) for j in order},
+            {APPLIANCE_NAMES[j]: float(yearly_cost[j]) for j in order})
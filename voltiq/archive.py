@@ -0,0 +1,317 @@
+"""
+Full-account archives: every year's readings and appliance hours, plus the
+supplier and survey, in one Parquet file — for backups, restores and for
+handing data to analysts (pandas, DuckDB, Spark read it as-is).
+
+Row groups hold whole years, up to ``row_group_months`` rows (ten full
+years) each, so both directions stream: export loads a year at a time and
+writes a row group once that many months have built up, and restore reads
+a row group, upserts it in one transaction and moves on — neither holds
+more than about ten years of the account at once. Readers can skip to a
+year through the row groups' ``year`` statistics. A group per single year
+would be the finest split, but at ~12 rows a group Parquet's per-group
+overhead makes the file larger and slower to read than the same data as
+CSV (benchmarks/bench_archive.py). Columns:
+
+    year        int16
+    month       string      "Jan".."Dec" (dictionary-encoded by Parquet)
+    units       float64     null for a month with appliance hours only
+    bill        float64
+    rate        float64
+    appliances  string      the stored appliance_hours JSON, either shape; null if none
+
+The username, supplier, survey (JSON) and export time travel as file
+metadata under ``voltiq.*`` keys. Restoring upserts months — existing
+months not in the archive are left alone, and within a row group a later
+row for a month replaces an earlier one — then the supplier and survey. It
+refuses an archive whose supplier or survey the app could not use.
+
+pyarrow is optional; PARQUET_AVAILABLE says whether it imported.
+
+    python -m voltiq.archive export asha asha.parquet
+    python -m voltiq.archive restore asha.parquet [--user asha2] [--no-profile]
+"""
+import argparse
+import json
+import math
+import sys
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import psycopg2
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+from voltiq import db, prefetch
+from voltiq.constants import MONTH_ORDER
+from voltiq.importer import ImportReport, RowError
+from voltiq.store import (
+    has_completed_survey, load_all_appliance_data, load_all_years, load_supplier, load_user_data,
+    save_entries_bulk, save_supplier, save_user_survey,
+)
+from voltiq.tariff import SUPPLIERS
+
+FORMAT_VERSION = "1"
+ROW_GROUP_MONTHS = 120    # ten years of months per row group
+COLUMNS = ("year", "month", "units", "bill", "rate", "appliances")
+
+ArchiveInfo = namedtuple("ArchiveInfo", "username supplier survey exported_at years")
+
+
+def _require_pyarrow():
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet archives need pyarrow (pip install pyarrow)")
+
+
+def _schema(metadata=None):
+    return pa.schema([
+        ("year",       pa.int16()),
+        ("month",      pa.string()),
+        ("units",      pa.float64()),
+        ("bill",       pa.float64()),
+        ("rate",       pa.float64()),
+        ("appliances", pa.string()),
+    ], metadata=metadata)
+
+
+def year_table(year, rows, appliance_rows):
+    """
+    One year as an Arrow table in month order: ``rows`` are (month, units,
+    bill, rate), ``appliance_rows`` (month, appliance_hours).
+    """
+    readings = {r[0]: r[1:] for r in rows}
+    hours    = dict(appliance_rows)
+    months   = sorted(readings.keys() | hours.keys(), key=MONTH_ORDER.__getitem__)
+    values   = [readings.get(m, (None, None, None)) for m in months]
+    return pa.Table.from_pydict({
+        "year":       [year] * len(months),
+        "month":      months,
+        "units":      [v[0] for v in values],
+        "bill":       [v[1] for v in values],
+        "rate":       [v[2] for v in values],
+        "appliances": [json.dumps(hours[m]) if m in hours else None for m in months],
+    }, schema=_schema())
+
+
+# ─────────────────────────────────────────────
+# EXPORT
+# ─────────────────────────────────────────────
+def write_archive(username, sink, compression="zstd", row_group_months=ROW_GROUP_MONTHS):
+    """
+    Stream ``username``'s account to ``sink`` (a path or binary file object)
+    in row groups of whole years. Returns the number of months written.
+    """
+    _require_pyarrow()
+    years = load_all_years(username)
+    metadata = {
+        "voltiq.format":      FORMAT_VERSION,
+        "voltiq.username":    username,
+        "voltiq.supplier":    load_supplier(username),
+        "voltiq.survey":      json.dumps(has_completed_survey(username)),
+        "voltiq.exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with pq.ParquetWriter(sink, _schema(metadata), compression=compression) as writer:
+        return write_years(writer, (_load_year(username, year) for year in years), row_group_months)
+
+
+def _load_year(username, year):
+    # The two reads for a year are independent
+    page_data = prefetch.gather([(load_user_data, username, year), (load_all_appliance_data, username, year)])
+    return year_table(year, page_data.get(load_user_data, username, year),
+                      page_data.get(load_all_appliance_data, username, year))
+
+
+def write_years(writer, tables, row_group_months=ROW_GROUP_MONTHS):
+    """
+    Write per-year ``tables`` to a ParquetWriter, buffering whole years
+    into row groups of up to ``row_group_months`` rows (a single larger
+    year gets a group of its own). Returns the number of rows written.
+    """
+    pending, buffered, written = [], 0, 0
+    for table in tables:
+        if pending and buffered + table.num_rows > row_group_months:
+            writer.write_table(pa.concat_tables(pending), row_group_size=buffered)
+            pending, buffered = [], 0
+        pending.append(table)
+        buffered += table.num_rows
+        written  += table.num_rows
+    if buffered:
+        writer.write_table(pa.concat_tables(pending), row_group_size=buffered)
+    return written
+
+
+# ─────────────────────────────────────────────
+# RESTORE
+# ─────────────────────────────────────────────
+def read_info(source):
+    """An archive's metadata. Raises ValueError if ``source`` is not a VoltIQ archive."""
+    _require_pyarrow()
+    return _info(pq.ParquetFile(source))
+
+
+def _info(parquet_file):
+    meta = {k.decode(): v.decode() for k, v in (parquet_file.schema_arrow.metadata or {}).items()}
+    if "voltiq.format" not in meta or not set(COLUMNS) <= set(parquet_file.schema_arrow.names):
+        raise ValueError("not a VoltIQ archive")
+    if meta["voltiq.format"] != FORMAT_VERSION:
+        raise ValueError(f"unsupported archive format {meta['voltiq.format']!r}")
+    return ArchiveInfo(meta.get("voltiq.username"), meta.get("voltiq.supplier"),
+                       json.loads(meta.get("voltiq.survey") or "null"), meta.get("voltiq.exported_at"),
+                       parquet_file.num_row_groups)
+
+
+def _check_profile(info):
+    # The supplier and survey go straight into the session, where an
+    # unknown supplier or a non-dict survey would break every page
+    if info.supplier is not None and info.supplier not in SUPPLIERS:
+        raise ValueError(f"unknown supplier {info.supplier!r}")
+    if info.survey is not None and not isinstance(info.survey, dict):
+        raise ValueError("survey must be a JSON object")
+
+
+def normalise_record(record):
+    """
+    Validate one archive row (a dict of COLUMNS) into (entry, appliance_row),
+    either of which may be None. Raises ValueError with the reason.
+    """
+    year, month = record["year"], record["month"]
+    if month not in MONTH_ORDER:
+        raise ValueError(f"unrecognised month: {month!r}")
+    if year is None or not 2000 <= year <= 2100:
+        raise ValueError(f"year out of range: {year}")
+
+    entry = None
+    if record["units"] is not None:
+        units, bill, rate = record["units"], record["bill"], record["rate"]
+        if not all(v is not None and math.isfinite(v) for v in (units, bill, rate)):
+            raise ValueError("Units, Bill and Rate must all be finite numbers")
+        if units <= 0 or bill < 0:
+            raise ValueError(f"invalid reading: units={units}, bill={bill}")
+        entry = (year, month, units, bill, rate)
+
+    appliance_row = None
+    if record["appliances"] is not None:
+        try:
+            hours = json.loads(record["appliances"])
+        except ValueError:
+            raise ValueError("appliance hours are not valid JSON")
+        if not isinstance(hours, dict):
+            raise ValueError("appliance hours must be a JSON object")
+        appliance_row = (year, month, hours)
+
+    if entry is None and appliance_row is None:
+        raise ValueError("row has neither a reading nor appliance hours")
+    return entry, appliance_row
+
+
+def _row_groups(parquet_file):
+    # Yields ({(year, month): (row, entry, appliance_row)}, errors) per row
+    # group; a later row for the same month replaces an earlier one, as in
+    # import_csv, since one upsert can't touch a month twice
+    row = 0
+    for i in range(parquet_file.num_row_groups):
+        batch, errors = {}, []
+        for record in parquet_file.read_row_group(i, columns=list(COLUMNS)).to_pylist():
+            row += 1
+            try:
+                entry, appliance_row = normalise_record(record)
+            except ValueError as e:
+                errors.append(RowError(row, str(e)))
+                continue
+            key = (record["year"], record["month"])
+            if key in batch:
+                errors.append(RowError(batch[key][0], f"superseded by row {row} ({key[1]} {key[0]})"))
+            batch[key] = (row, entry, appliance_row)
+        yield batch, errors
+
+
+def _split(batch):
+    entries        = [entry for _, entry, _ in batch.values() if entry]
+    appliance_rows = [appliance_row for _, _, appliance_row in batch.values() if appliance_row]
+    return entries, appliance_rows
+
+
+def iter_years(source):
+    """
+    Yield (entries, appliance_rows, errors) per row group, reading one row
+    group at a time. ``errors`` are RowError with 1-based row numbers.
+    """
+    _require_pyarrow()
+    parquet_file = pq.ParquetFile(source)
+    _info(parquet_file)
+    for batch, errors in _row_groups(parquet_file):
+        yield (*_split(batch), errors)
+
+
+def restore_archive(source, username, profile=True):
+    """
+    Upsert every valid month of an archive into ``username``'s account,
+    one transaction per row group; with ``profile`` also its supplier and
+    survey, once the months are in. A row group the database rejects is
+    reported as row errors, like a failed import batch.
+    Returns (ArchiveInfo, ImportReport). Raises ValueError, before writing
+    anything, if the profile would be restored and is not one the app can use.
+    """
+    _require_pyarrow()
+    parquet_file = pq.ParquetFile(source)
+    info = _info(parquet_file)
+    if profile:
+        _check_profile(info)
+    report = ImportReport()
+    for batch, errors in _row_groups(parquet_file):
+        report.errors.extend(errors)
+        entries, appliance_rows = _split(batch)
+        try:
+            save_entries_bulk(username, entries, appliance_rows)
+        except psycopg2.Error as e:
+            report.errors.extend(RowError(row, f"database error: {e}".strip()) for row, _, _ in batch.values())
+            continue
+        report.imported += len(entries)
+        report.years.update(e[0] for e in entries)
+        report.years.update(r[0] for r in appliance_rows)
+    if profile:
+        # save_supplier() also reprices the months just restored
+        if info.supplier:
+            save_supplier(username, info.supplier)
+        if info.survey:
+            save_user_survey(username, info.survey)
+    return info, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or restore a full VoltIQ account as Parquet.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export")
+    export.add_argument("username")
+    export.add_argument("path")
+    restore = commands.add_parser("restore")
+    restore.add_argument("path")
+    restore.add_argument("--user", help="restore into this account instead of the archived one")
+    restore.add_argument("--no-profile", action="store_true", help="leave supplier and survey untouched")
+    args = parser.parse_args(argv)
+
+    if not PARQUET_AVAILABLE:
+        print("Parquet archives need pyarrow (pip install pyarrow)", file=sys.stderr)
+        return 1
+    db.configure_from_env()
+    if args.command == "export":
+        months = write_archive(args.username, args.path)
+        print(f"Exported {months} month(s) for {args.username} to {args.path}")
+        return 0
+
+    username = args.user or read_info(args.path).username
+    info, report = restore_archive(args.path, username, profile=not args.no_profile)
+    print(f"Restored {report.imported} month(s) for {username} across {sorted(report.years) or 'no'} years "
+          f"(archive of {info.username}, exported {info.exported_at})")
+    for err in report.errors:
+        print(f"  row {err.line}: {err.message}", file=sys.stderr)
+    return 0 if report.imported or not report.errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Account helpers: password hashing, registration, login and password reset.
+
+Every scrypt call runs on the bounded executor in voltiq.hashing, so these
+helpers raise HashingBusy when it is saturated. A login that matches a
+legacy sha256 hash re-hashes it with scrypt in the background: only the
+hash takes a hashing slot, and the UPDATE that stores it runs on the fetch
+pool (voltiq.prefetch), so a slow connection checkout never holds one.
+"""
+import hashlib
+import logging
+import os
+
+import psycopg2
+
+from voltiq import db, metrics, prefetch
+from voltiq.hashing import HashingBusy, get_executor
+from voltiq.store import load_login_profile
+
+logger = logging.getLogger(__name__)
+
+
+def hash_password(password, salt=None):
+    """Hash password using scrypt with a random salt. Returns 'salt$hash' string."""
+    if salt is None:
+        salt = os.urandom(16).hex()
+    hashed = hashlib.scrypt(password.encode(), salt=salt.encode(), n=16384, r=8, p=1).hex()
+    return f"{salt}${hashed}"
+
+def verify_password(password, stored):
+    """Verify password against stored 'salt$hash' string. Falls back to legacy sha256."""
+    if "$" in stored:
+        salt, _ = stored.split("$", 1)
+        return hash_password(password, salt) == stored
+    # Legacy sha256 fallback for existing accounts
+    return hashlib.sha256(password.encode()).hexdigest() == stored
+
+def is_legacy_hash(stored):
+    return "$" not in stored
+
+def _hash(password):
+    return get_executor().run(hash_password, password)
+
+def _verify(password, stored):
+    # Legacy sha256 is cheap and doesn't need a hashing slot
+    if is_legacy_hash(stored):
+        return verify_password(password, stored)
+    return get_executor().run(verify_password, password, stored)
+
+def _store_upgraded_hash(username, column, upgraded, legacy):
+    """Replace a verified sha256 hash with its scrypt upgrade, unless it changed meanwhile."""
+    try:
+        with db.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"UPDATE users SET {column} = %s WHERE username = %s AND {column} = %s",
+                        (upgraded, username, legacy))
+            conn.commit()
+            cur.close()
+    except Exception:
+        logger.exception("could not store the upgraded %s hash for %s", column, username)
+
+def _on_rehashed(future, username, column, legacy):
+    # Runs on the hashing worker as soon as its slot is released; hand the
+    # DB write to the fetch pool rather than holding the worker for it
+    error = future.exception()
+    if error is not None:
+        logger.warning("could not upgrade the legacy %s hash for %s: %s", column, username, error)
+        return
+    prefetch.get_executor().submit(_store_upgraded_hash, username, column, future.result(), legacy)
+
+def _schedule_rehash(username, column, secret, legacy):
+    # Best effort: if hashing is saturated the next successful login retries
+    try:
+        future = get_executor().submit(hash_password, secret, block=False)
+    except HashingBusy:
+        return
+    future.add_done_callback(lambda f: _on_rehashed(f, username, column, legacy))
+
+@metrics.timed("auth.register_user")
+def register_user(username, password, security_question, security_answer):
+    # Hash before checkout so a pooled connection isn't held during scrypt
+    password_hash = _hash(password)
+    answer_hash   = _hash(security_answer.lower().strip())
+    with db.connection() as conn:
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO users (username, password, security_question, security_answer) VALUES (%s, %s, %s, %s)",
+                (username, password_hash, security_question, answer_hash)
+            )
+            conn.commit()
+            cur.close()
+            return True
+        except psycopg2.IntegrityError:
+            conn.rollback()
+            return False
+
+@metrics.timed("auth.authenticate")
+def authenticate(username, password):
+    """
+    Verify a login and return the user's LoginProfile (supplier and survey
+    come back in the same query as the hash), or None if it doesn't match.
+    """
+    profile = load_login_profile(username)
+    if profile is None or not _verify(password, profile.password_hash):
+        return None
+    if is_legacy_hash(profile.password_hash):
+        _schedule_rehash(username, "password", password, profile.password_hash)
+    return profile
+
+def verify_user(username, password):
+    return authenticate(username, password) is not None
+
+@metrics.timed("auth.get_security_question")
+def get_security_question(username):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT security_question FROM users WHERE username = %s", (username,))
+        row = cur.fetchone()
+        cur.close()
+        return row[0] if row else None
+
+@metrics.timed("auth.verify_security_answer")
+def verify_security_answer(username, answer):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT security_question, security_answer FROM users WHERE username = %s", (username,))
+        row = cur.fetchone()
+        cur.close()
+    if row is None:
+        return False, None
+    answer  = answer.lower().strip()
+    correct = _verify(answer, row[1])
+    if correct and is_legacy_hash(row[1]):
+        _schedule_rehash(username, "security_answer", answer, row[1])
+    return correct, row[0]
+
+@metrics.timed("auth.reset_password")
+def reset_password(username, new_password):
+    password_hash = _hash(new_password)
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE users SET password = %s WHERE username = %s",
+                    (password_hash, username))
+        conn.commit()
+        cur.close()
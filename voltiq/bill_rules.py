@@ -0,0 +1,211 @@
+"""
+Supplier-specific extraction rules for PDF electricity bills.
+
+Every rule is compiled once at import. A rule proposes a candidate value
+for one field with a base confidence; candidates that fail a plausibility
+check are dropped, and the highest-confidence candidate wins (the earliest
+in the text on a tie). Supplier rules are tried alongside the generic ones,
+but score higher, so a recognised layout beats a loose match elsewhere.
+
+Fields: units (kWh), amount (Rs), month ("Jan".."Dec"), year, period
+((start, end) dates). Month and year fall back to the billing period's end.
+"""
+import re
+from datetime import date, datetime
+
+from voltiq.constants import MONTH_NAMES
+
+REQUIRED_FIELDS = ("units", "amount", "month", "year")
+MIN_CONFIDENCE  = 0.5    # below this a field still counts as "missing" for early stop
+
+_NUM   = r"([\d,]+(?:\.\d+)?)"
+_MON   = r"(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+_YEAR  = r"((?:20)?\d{2})"
+_DATE  = r"(\d{1,2}[-/. ](?:\d{1,2}|[A-Za-z]{3,9})[-/. ]\d{2,4})"
+_DATE_FORMATS = ("%d-%m-%Y", "%d-%m-%y", "%d-%b-%Y", "%d-%b-%y", "%d-%B-%Y", "%d-%B-%y")
+
+
+class Rule:
+    """One pattern for one field. ``kind`` picks how the match groups are converted."""
+    __slots__ = ("field", "pattern", "confidence", "kind")
+
+    def __init__(self, field, pattern, confidence, kind=None):
+        self.field      = field
+        self.pattern    = re.compile(pattern, re.IGNORECASE)
+        self.confidence = confidence
+        self.kind       = kind or field
+
+
+def _number(text):
+    return float(text.replace(",", ""))
+
+
+def _month(text):
+    return text[:3].capitalize()
+
+
+def _year(text):
+    year = int(text)
+    return year + 2000 if year < 100 else year
+
+
+def _date(text):
+    text = re.sub(r"[/. ]", "-", text.strip())
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _convert(rule, match):
+    """Turn a match into [(field, value)]; a rule may yield several fields (e.g. month + year)."""
+    if rule.kind in ("units", "amount"):
+        return [(rule.field, _number(match.group(1)))]
+    if rule.kind == "month_year":
+        return [("month", _month(match.group(1))), ("year", _year(match.group(2)))]
+    if rule.kind == "period":
+        start, end = _date(match.group(1)), _date(match.group(2))
+        return [("period", (start, end))] if start and end else []
+    if rule.kind == "bill_date":
+        # Bills are issued the month after the consumption they charge for
+        d = _date(match.group(1))
+        if d is None:
+            return []
+        prev = date(d.year - (d.month == 1), (d.month - 2) % 12 + 1, 1)
+        return [("month", MONTH_NAMES[prev.month - 1]), ("year", prev.year)]
+    raise ValueError(f"unknown rule kind {rule.kind!r}")
+
+
+def _plausible(field, value):
+    if field == "units":
+        return 0 < value <= 100_000
+    if field == "amount":
+        return 0 < value <= 10_000_000
+    if field == "year":
+        return 2000 <= value <= date.today().year + 1
+    if field == "month":
+        return value in MONTH_NAMES
+    if field == "period":
+        start, end = value
+        return start < end and (end - start).days <= 95
+    return True
+
+
+# ─────────────────────────────────────────────
+# RULE SETS
+# ─────────────────────────────────────────────
+GENERIC_RULES = (
+    Rule("units",  rf"Units\s*Consumed[:\s]+{_NUM}", 0.7),
+    Rule("units",  rf"Net\s*Units[:\s]+{_NUM}", 0.7),
+    Rule("units",  rf"Energy\s*Consumed[:\s]+{_NUM}", 0.65),
+    Rule("units",  rf"Total\s*Units[:\s]+{_NUM}", 0.65),
+    Rule("units",  rf"Consumption[:\s]+{_NUM}\s*(?:kWh|Units)", 0.6),
+    Rule("units",  rf"{_NUM}\s*(?:kWh|Units\s*Consumed)", 0.3),
+    Rule("amount", rf"(?:Net\s*)?Amount\s*Payable[^\d\n]{{0,20}}{_NUM}", 0.6),
+    Rule("amount", rf"Total\s*(?:Bill\s*)?Amount[^\d\n]{{0,20}}{_NUM}", 0.55),
+    Rule("amount", rf"(?:Rs\.?|₹)\s*{_NUM}", 0.2),
+    Rule("period", rf"(?:Bill(?:ing)?\s*Period|Period)[:\s]+{_DATE}\s*(?:to|-|–)\s*{_DATE}", 0.7, "period"),
+    Rule("month",  rf"Bill(?:ing)?\s*Month[:\s]+{_MON}[\s\-,/']*{_YEAR}\b", 0.75, "month_year"),
+    Rule("month",  rf"\b{_MON}[\s\-,/']+(20\d{{2}})\b", 0.35, "month_year"),
+    Rule("month",  rf"Bill\s*Date[:\s]+{_DATE}", 0.4, "bill_date"),
+)
+
+SUPPLIER_RULES = {
+    "MSEDCL": (
+        Rule("units",  rf"(?:Consumption|Units)\s*\(?\s*(?:KWH|Units)?\s*\)?[:\s]+{_NUM}", 0.8),
+        Rule("units",  rf"Current\s*Consumption[:\s]+{_NUM}", 0.9),
+        Rule("amount", rf"Bill\s*Amount\s*(?:\(Rs\.?\))?[:\s]+{_NUM}", 0.85),
+        Rule("amount", rf"Amount\s*Payable\s*(?:Before|By)\s*Due\s*Date[^\d\n]{{0,20}}{_NUM}", 0.9),
+        Rule("month",  rf"BILL\s*OF\s*SUPPLY\s*FOR\s*(?:THE\s*MONTH\s*OF\s*)?{_MON}[\s\-,/']*{_YEAR}\b", 0.95, "month_year"),
+        Rule("month",  rf"Bill\s*Month[:\s]+{_MON}[\s\-,/']*{_YEAR}\b", 0.9, "month_year"),
+    ),
+    "Tata Power": (
+        Rule("units",  rf"Units\s*(?:Billed|Consumed)\s*(?:\(kWh\))?[:\s]+{_NUM}", 0.9),
+        Rule("amount", rf"Amount\s*Payable[^\d\n]{{0,20}}{_NUM}", 0.9),
+        Rule("amount", rf"Current\s*Bill\s*Amount[^\d\n]{{0,20}}{_NUM}", 0.8),
+        Rule("period", rf"Billing\s*Period[:\s]+{_DATE}\s*(?:to|-|–)\s*{_DATE}", 0.95, "period"),
+    ),
+    "Adani Electricity": (
+        Rule("units",  rf"Total\s*Consumption\s*(?:\(kWh\))?[:\s]+{_NUM}", 0.9),
+        Rule("units",  rf"Units\s*Consumed\s*(?:\(kWh\))?[:\s]+{_NUM}", 0.85),
+        Rule("amount", rf"(?:Total\s*)?Amount\s*Payable[^\d\n]{{0,20}}{_NUM}", 0.9),
+        Rule("period", rf"(?:Bill\s*Period|Period\s*of\s*Supply)[:\s]+{_DATE}\s*(?:to|-|–)\s*{_DATE}", 0.95, "period"),
+        Rule("month",  rf"Bill\s*Month[:\s]+{_MON}[\s\-,/']*{_YEAR}\b", 0.9, "month_year"),
+    ),
+    "BEST": (
+        Rule("units",  rf"(?:Total|Net)\s*Units[:\s]+{_NUM}", 0.9),
+        Rule("amount", rf"Net\s*Bill\s*Amount[^\d\n]{{0,20}}{_NUM}", 0.9),
+        Rule("amount", rf"Amount\s*Payable[^\d\n]{{0,20}}{_NUM}", 0.8),
+        Rule("month",  rf"Bill\s*(?:for\s*the\s*)?Month[:\s]+{_MON}[\s\-,/']*{_YEAR}\b", 0.9, "month_year"),
+        Rule("period", rf"Reading\s*Period[:\s]+{_DATE}\s*(?:to|-|–)\s*{_DATE}", 0.85, "period"),
+    ),
+}
+
+SUPPLIER_MARKERS = {
+    "MSEDCL":            re.compile(r"MSEDCL|Maharashtra\s*State\s*Electricity\s*Distribution|mahadiscom", re.IGNORECASE),
+    "Tata Power":        re.compile(r"Tata\s*Power", re.IGNORECASE),
+    "Adani Electricity": re.compile(r"Adani\s*Electricity", re.IGNORECASE),
+    "BEST":              re.compile(r"\bB\.?E\.?S\.?T\.?\s*Undertaking|Brihan\s*mumbai\s*Electric", re.IGNORECASE),
+}
+
+
+def detect_supplier(text):
+    """The supplier whose name appears first in ``text``, or None."""
+    found = [(m.start(), name) for name, pat in SUPPLIER_MARKERS.items() for m in [pat.search(text)] if m]
+    return min(found)[1] if found else None
+
+
+# ─────────────────────────────────────────────
+# SCORING
+# ─────────────────────────────────────────────
+def score_candidates(text, supplier=None):
+    """
+    Best (value, confidence) per field found in ``text``. ``supplier`` is a
+    hint; a supplier named in the text itself takes precedence.
+    """
+    supplier = detect_supplier(text) or supplier
+    rules    = SUPPLIER_RULES.get(supplier, ()) + GENERIC_RULES
+    best     = {}   # field -> (confidence, -position, value)
+    for rule in rules:
+        for match in rule.pattern.finditer(text):
+            try:
+                pairs = _convert(rule, match)
+            except ValueError:
+                continue
+            for field, value in pairs:
+                if not _plausible(field, value):
+                    continue
+                key = (rule.confidence, -match.start(), value)
+                if field not in best or key[:2] > best[field][:2]:
+                    best[field] = key
+    result = {field: (value, conf) for field, (conf, _, value) in best.items()}
+
+    # The billing period's end month is the month being billed
+    if "period" in result:
+        (_, end), conf = result["period"]
+        for field, value in (("month", MONTH_NAMES[end.month - 1]), ("year", end.year)):
+            if result.get(field, (None, 0))[1] < conf * 0.9:
+                result[field] = (value, conf * 0.9)
+    return result
+
+
+def is_complete(scored, required=REQUIRED_FIELDS, min_confidence=MIN_CONFIDENCE):
+    return all(scored.get(f, (None, 0))[1] >= min_confidence for f in required)
+
+
+def extract_fields(pages, supplier=None, required=REQUIRED_FIELDS):
+    """
+    Score page texts as they arrive and stop pulling pages from the
+    ``pages`` iterator as soon as every ``required`` field is confidently
+    found. Returns (scored, text_read, pages_read).
+    """
+    text, scored, n = "", {}, 0
+    for page_text in pages:
+        n    += 1
+        text += (page_text or "") + "\n"
+        scored = score_candidates(text, supplier)
+        if is_complete(scored, required):
+            break
+    return scored, text, n
@@ -0,0 +1,205 @@
+"""
+Reading units, amount, month/year and billing period out of PDF electricity
+bills. The field rules live in voltiq.bill_rules; pages are pulled one at a
+time and reading stops once every required field has been found.
+
+pdfplumber is CPU-bound and holds the GIL, so batches are fanned out over a
+process pool (spawned, not forked — the Streamlit server is multi-threaded).
+Each worker arms SIGALRM for its own file so one pathological PDF times out
+on its own instead of stalling the batch; an overall deadline backs that up
+on platforms without SIGALRM.
+
+    python -m voltiq.bills bills/*.pdf                      # print CSV for voltiq.importer
+    python -m voltiq.bills bills/*.pdf --user asha --save   # write straight to the database
+"""
+import argparse
+import csv
+import io
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+
+try:
+    import pdfplumber
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+from voltiq.bill_rules import detect_supplier, extract_fields
+from voltiq.constants import MONTH_NAMES
+
+DEFAULT_TIMEOUT = 30.0   # seconds per file
+
+
+@dataclass
+class BillExtraction:
+    name:       str
+    units:      float = 0.0
+    month:      str = None
+    year:       int = None
+    amount:     float = 0.0     # as printed on the bill, Rs
+    period:     tuple = None    # (start, end) dates of the billing period
+    supplier:   str = None      # supplier whose rules were applied
+    confidence: dict = field(default_factory=dict)   # field -> 0..1
+    pages_read: int = 0
+    text:       str = ""        # first 1000 characters, for the debug view
+    error:      str = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.units > 0
+
+
+def iter_page_text(file_bytes):
+    """Yield page texts lazily; closing the generator early skips the remaining pages."""
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+
+
+def parse_bill_pages(name, pages, supplier=None):
+    scored, text, n = extract_fields(pages, supplier)
+    return BillExtraction(
+        name,
+        supplier=detect_supplier(text) or supplier,
+        confidence={f: round(conf, 2) for f, (_, conf) in scored.items()},
+        pages_read=n,
+        text=text[:1000],
+        **{f: value for f, (value, _) in scored.items()},
+    )
+
+
+class _FileTimeout(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise _FileTimeout()
+
+
+def extract_bill(name, file_bytes, timeout=None, supplier=None):
+    """Extract one bill; never raises, failures are reported in ``.error``."""
+    armed = bool(timeout) and hasattr(signal, "SIGALRM")
+    if armed:
+        previous = signal.signal(signal.SIGALRM, _alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        pages = iter_page_text(file_bytes)
+        try:
+            return parse_bill_pages(name, pages, supplier)
+        finally:
+            pages.close()
+    except _FileTimeout:
+        return BillExtraction(name, error=f"timed out after {timeout:g}s")
+    except Exception as e:
+        return BillExtraction(name, error=f"could not read PDF: {e}")
+    finally:
+        if armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def extract_bills(files, max_workers=None, timeout=DEFAULT_TIMEOUT, progress=None, supplier=None):
+    """
+    Extract many bills in parallel. ``files`` is a list of (name, bytes) and
+    ``supplier`` the rule set to prefer when a bill doesn't name its supplier;
+    results come back in the same order. ``progress(done, total, result)``
+    is called from the calling thread as each file finishes.
+    """
+    files = list(files)
+    if not files:
+        return []
+    workers = max(1, min(len(files), max_workers or os.cpu_count() or 1))
+    results = [None] * len(files)
+    # Per-file alarms do the real work; this only catches workers that never answer
+    deadline = time.monotonic() + timeout * math.ceil(len(files) / workers) + 10
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        pending = {pool.submit(extract_bill, name, data, timeout, supplier): i for i, (name, data) in enumerate(files)}
+        done = 0
+        while pending:
+            finished, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+            if not finished:
+                break
+            for future in finished:
+                i = pending.pop(future)
+                try:
+                    results[i] = future.result()
+                except Exception as e:   # worker crashed (BrokenProcessPool etc.)
+                    results[i] = BillExtraction(files[i][0], error=f"worker failed: {e}")
+                done += 1
+                if progress:
+                    progress(done, len(files), results[i])
+        for future, i in pending.items():
+            future.cancel()
+            results[i] = BillExtraction(files[i][0], error=f"timed out after {timeout:g}s")
+            if progress:
+                done += 1
+                progress(done, len(files), results[i])
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract units, amount and month from PDF electricity bills.")
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per file")
+    parser.add_argument("--year", type=int, default=None, help="year for bills where none was found")
+    parser.add_argument("--supplier", default=None, help="rule set for bills that don't name their supplier")
+    parser.add_argument("--user", help="with --save, the account to write to")
+    parser.add_argument("--save", action="store_true", help="write results to the database in one transaction")
+    args = parser.parse_args(argv)
+    if not PDF_AVAILABLE:
+        parser.error("pdfplumber is not installed")
+    if args.save and not args.user:
+        parser.error("--save needs --user")
+
+    if args.save:
+        from voltiq import db
+        from voltiq.importer import save_readings
+        from voltiq.store import has_completed_survey, load_supplier
+        from voltiq.tariff import calculate_bill
+        db.configure_from_env()
+        supplier = args.supplier or load_supplier(args.user)
+    else:
+        supplier = args.supplier
+
+    files = []
+    for path in args.pdfs:
+        with open(path, "rb") as f:
+            files.append((path, f.read()))
+
+    def report(done, total, r):
+        status = r.error or f"{r.supplier or 'generic'} rules, {r.pages_read} page(s)"
+        print(f"[{done}/{total}] {r.name}: {status}", file=sys.stderr)
+
+    results = extract_bills(files, args.workers, args.timeout, progress=report, supplier=supplier)
+
+    usable = [r for r in results if r.ok and r.month in MONTH_NAMES and (r.year or args.year)]
+    if not args.save:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["File", "Year", "Month", "Units", "Bill"])
+        for r in usable:
+            writer.writerow([r.name, r.year or args.year, r.month, r.units, r.amount or ""])
+        return 0 if usable else 1
+
+    entries = {}
+    for r in usable:
+        total = r.amount or calculate_bill(r.units, supplier)["total"]
+        entries[(r.year or args.year, r.month)] = (r.year or args.year, r.month, r.units, total, round(total / r.units, 2))
+    save_readings(args.user, entries.values(), has_completed_survey(args.user))
+    print(f"Saved {len(entries)} month(s) for {args.user}; {len(results) - len(usable)} file(s) skipped",
+          file=sys.stderr)
+    return 0 if entries else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+In-process read-through cache with TTL expiry and LRU eviction.
+
+Lives in an imported module so entries survive Streamlit reruns and are
+shared by every session in the process. Keys are tuples that always start
+with a kind and the username, e.g. ``("rows", "asha", 2025)``.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire ``ttl`` seconds after being stored.
+    The least recently used entry is evicted once ``maxsize`` is reached.
+    """
+
+    def __init__(self, maxsize=2048, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self._data   = OrderedDict()   # key -> (expires_at, value)
+        self._lock   = threading.Lock()
+        # Bumped on every invalidation so a load that raced with a write
+        # never stores the pre-write result
+        self._epoch  = 0
+        self.hits    = 0
+        self.misses  = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` on a miss."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            epoch = self._epoch
+        value = loader()
+        with self._lock:
+            if epoch == self._epoch:
+                self._store(key, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._data.clear()
+
+    def __contains__(self, key):
+        """Whether ``key`` holds a live entry — a peek that leaves hit/miss counts and LRU order alone."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[0] > time.monotonic()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Shared by every session in the process — see voltiq.store for the key layout
+data_cache = TTLCache(maxsize=2048, ttl=300.0)
@@ -0,0 +1,10 @@
+"""Constants shared by the app and the core modules."""
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Module-level constant — used everywhere instead of inline dicts
+MONTH_ORDER = {m: i for i, m in enumerate(MONTH_NAMES)}
+
+# CO2 emission factor — CEA 2023 grid average for India (kg CO2/kWh)
+CO2_FACTOR = 0.716
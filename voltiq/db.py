@@ -0,0 +1,198 @@
+"""
+Process-wide PostgreSQL connection pool.
+
+Streamlit re-executes the app script on every rerun, but imported modules
+stay in sys.modules for the life of the process — so the pool lives here
+rather than in electricity_app.py, and every session shares it.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+from voltiq import metrics
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of psycopg2 connections.
+
+    - Keeps at least ``minconn`` connections open and never more than ``maxconn``.
+    - ``getconn()`` blocks up to ``timeout`` seconds for a free connection.
+    - Connections idle longer than ``check_after`` seconds are pinged with
+      ``SELECT 1`` before being handed out; dead ones are replaced.
+    - Returned connections are rolled back so no transaction leaks between callers.
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=10.0, check_after=30.0, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"invalid pool size: minconn={minconn}, maxconn={maxconn}")
+        self.dsn            = dsn
+        self.minconn        = minconn
+        self.maxconn        = maxconn
+        self.timeout        = timeout
+        self.check_after    = check_after
+        self.connect_kwargs = connect_kwargs
+        self._idle   = []   # [(conn, last_returned_monotonic)] — LIFO keeps hot connections hot
+        self._size   = 0    # open connections, idle + checked out
+        self._closed = False
+        self._cond   = threading.Condition()
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        return psycopg2.connect(self.dsn, **self.connect_kwargs)
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.check_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def getconn(self, timeout=None):
+        """Check out a healthy connection, opening a new one if below ``maxconn``."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("connection pool is closed")
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"no database connection free after {self.maxconn} in use")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    conn, last_used = None, None
+                    self._size += 1
+            # Network I/O happens outside the lock so other callers aren't blocked
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            if self._is_healthy(conn, last_used):
+                return conn
+            self._discard(conn)
+
+    def putconn(self, conn):
+        """Return a connection; open transactions are rolled back, broken ones dropped."""
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        if conn.closed or self._closed or conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """``with pool.connection() as conn:`` — checkout and guaranteed return."""
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "in_use": self._size - len(self._idle),
+                    "maxconn": self.maxconn}
+
+
+# ─────────────────────────────────────────────
+# PROCESS-WIDE POOL
+# ─────────────────────────────────────────────
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(dsn, minconn=1, maxconn=10, timeout=10.0, check_after=30.0, **connect_kwargs):
+    """Create the shared pool on first call; later calls return the existing one."""
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(dsn, minconn=minconn, maxconn=maxconn, timeout=timeout,
+                                   check_after=check_after, **connect_kwargs)
+    return _pool
+
+
+def configure_from_env(**connect_kwargs):
+    """
+    Create the shared pool from environment variables, for batch jobs and CLIs
+    that run without Streamlit: DATABASE_URL plus optional DB_POOL_MIN,
+    DB_POOL_MAX, DB_POOL_TIMEOUT and DB_POOL_CHECK_AFTER.
+    """
+    connect_kwargs.setdefault("sslmode", os.environ.get("DB_SSLMODE", "require"))
+    return configure(
+        os.environ["DATABASE_URL"],
+        minconn=int(os.environ.get("DB_POOL_MIN", 1)),
+        maxconn=int(os.environ.get("DB_POOL_MAX", 10)),
+        timeout=float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        check_after=float(os.environ.get("DB_POOL_CHECK_AFTER", 30)),
+        **connect_kwargs,
+    )
+
+
+def set_pool(pool):
+    """Install an already-built pool (e.g. a benchmark stand-in); returns the previous one."""
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    return previous
+
+
+def get_pool():
+    if _pool is None:
+        raise RuntimeError("voltiq.db.configure() must be called before using the database")
+    return _pool
+
+
+def connection(timeout=None):
+    """Borrow a connection from the shared pool: ``with db.connection() as conn:``."""
+    if metrics.enabled():
+        return metrics.instrumented(get_pool().connection(timeout))
+    return get_pool().connection(timeout)
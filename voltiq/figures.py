@@ -0,0 +1,132 @@
+"""
+Process-wide cache of built Plotly figures.
+
+Building a figure with plotly.express costs tens of milliseconds, and the
+dashboard used to rebuild all of them on every rerun — including reruns
+triggered by unrelated widgets. Figures are cached under
+``(chart, username, year, supplier, data_version)``, so a write makes the
+old figures unreachable and they age out under LRU pressure.
+
+The cache is bounded by the figures' serialised size rather than their
+count: a 365-point line chart and a 12-slice pie differ by two orders of
+magnitude. Serialising a figure costs about as much as building it, so
+sizes are measured once per (chart kind, data points) — the points being
+the elements of its traces' data arrays, which is what the JSON grows
+with: a one-month and a twelve-month daily line, or a three- and a
+ten-slice pie, are measured separately, and a figure of the same kind
+and point count reuses the measurement. Each entry remembers how long it
+took to build, so hits report the render time they saved.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from voltiq import metrics
+
+
+_DATA_ARRAYS = ("x", "y", "z", "values", "labels", "text", "customdata")
+
+
+def _figure_bytes(fig):
+    return len(fig.to_json())
+
+
+def _figure_points(fig):
+    """Elements in the figure's trace data arrays — cheap, and proportional to its JSON."""
+    points = 0
+    for trace in fig.data:
+        for name in _DATA_ARRAYS:
+            value = getattr(trace, name, None)
+            if value is not None and not isinstance(value, str):
+                points += int(np.size(value))
+    return points
+
+
+class FigureCache:
+    """LRU cache bounded by ``max_bytes`` of serialised figure JSON."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, sizeof=_figure_bytes, points=_figure_points):
+        self.max_bytes   = max_bytes
+        self.sizeof      = sizeof
+        self.points      = points
+        self._data       = OrderedDict()   # key -> (figure, nbytes, build_seconds)
+        self._sizes      = {}              # (kind, points) -> nbytes measured on its first miss
+        self._lock       = threading.Lock()
+        self.nbytes      = 0
+        self.hits        = 0
+        self.misses      = 0
+        self.evictions   = 0
+        self.build_seconds = 0.0   # spent building on misses
+        self.saved_seconds = 0.0   # build time avoided by hits
+
+    def get_or_build(self, key, build, kind=None):
+        """
+        Return the cached figure for ``key``, calling ``build()`` on a miss.
+        Figures of the same ``kind`` and point count share one size
+        measurement; without a kind every miss is measured.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry[2]
+                return entry[0]
+            self.misses += 1
+        start   = time.perf_counter()
+        with metrics.section("figure.build"):
+            fig = build()
+        elapsed = time.perf_counter() - start
+        shape   = (kind, self.points(fig)) if kind is not None else None
+        nbytes  = self._sizes.get(shape) if shape is not None else None
+        if nbytes is None:
+            nbytes = self.sizeof(fig)
+            if shape is not None:
+                self._sizes[shape] = nbytes
+        with self._lock:
+            self.build_seconds += elapsed
+            if nbytes <= self.max_bytes:
+                old = self._data.pop(key, None)
+                if old is not None:
+                    self.nbytes -= old[1]
+                self._data[key] = (fig, nbytes, elapsed)
+                self.nbytes += nbytes
+                while self.nbytes > self.max_bytes:
+                    _, (_, evicted, _) = self._data.popitem(last=False)
+                    self.nbytes -= evicted
+                    self.evictions += 1
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":       len(self._data),
+                "bytes":         self.nbytes,
+                "max_bytes":     self.max_bytes,
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "hit_rate":      self.hits / lookups if lookups else 0.0,
+                "evictions":     self.evictions,
+                "build_seconds": self.build_seconds,
+                "saved_seconds": self.saved_seconds,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(chart, username, year, supplier, version, build):
+    """``figure_cache.get_or_build`` with the dashboard's key layout."""
+    return figure_cache.get_or_build((chart, username, year, supplier, version), build, kind=chart)
@@ -0,0 +1,288 @@
+"""
+Next-month consumption forecast shared by the post-save view and the
+Bill & Alerts page, plus the batch models and backtest behind it.
+
+Models share one interface: ``predict(Y, last_month)`` where ``Y`` is an
+(n_series, n_months) calendar grid of kWh from history_matrix() — right
+aligned so the last column is each series' latest month, NaN where a month
+is missing — and ``last_month`` is that latest month (0 = Jan). It returns
+the (n_series,) forecasts for the month after, computed for every series
+at once. backtest() scores the models on every one-step-ahead forecast a
+set of histories allows.
+
+    python -m voltiq.forecast                # backtest all users' history
+"""
+import argparse
+import time
+from itertools import groupby
+
+import numpy as np
+
+from voltiq.appliances import seasonal_load_index
+from voltiq.constants import MONTH_ORDER
+
+HISTORY_MONTHS = 36   # grid width: three seasons of history is plenty for every model
+
+
+def predict_next_units(units_history, survey_units=0.0):
+    """
+    Forecast next month's kWh from readings ordered oldest → newest.
+
+    - 2+ readings: weighted average of the latest three (0.5 / 0.3 / 0.2,
+      newest first), or 0.6 / 0.4 with only two.
+    - 1 reading with survey_units: 60% actual + 40% survey baseline.
+    - Otherwise: latest reading + 5%.
+    """
+    units = [float(u) for u in units_history]
+    # Written out term by term, as in _weighted_recent(), so the batched
+    # models reproduce it exactly (a BLAS dot product may fuse the adds)
+    if len(units) >= 3:
+        return round(units[-1] * 0.5 + units[-2] * 0.3 + units[-3] * 0.2, 1)
+    if len(units) == 2:
+        return round(units[-1] * 0.6 + units[-2] * 0.4, 1)
+    latest = units[-1] if units else 0.0
+    if survey_units > 0:
+        return round(latest * 0.6 + survey_units * 0.4, 1)
+    return round(latest * 1.05, 1)
+
+
+# ─────────────────────────────────────────────
+# BATCH LAYOUT
+# ─────────────────────────────────────────────
+def history_matrix(histories, n_months=HISTORY_MONTHS):
+    """
+    Lay out histories of (year, month, units), oldest → newest, on the
+    calendar grid the models take. Returns (Y, last_month).
+    """
+    lengths = np.array([len(h) for h in histories], dtype=int)
+    flat    = [r for h in histories for r in h]
+    period  = np.array([r[0] * 12 + MONTH_ORDER[r[1]] for r in flat], dtype=int)
+    units   = np.array([r[2] for r in flat], dtype=float)
+    series  = np.repeat(np.arange(len(histories)), lengths)
+    last    = period[np.cumsum(lengths) - 1] if len(flat) else np.zeros(len(histories), dtype=int)
+    col     = n_months - 1 - (last[series] - period)
+    keep    = col >= 0
+    Y = np.full((len(histories), n_months), np.nan)
+    Y[series[keep], col[keep]] = units[keep]
+    return Y, last % 12
+
+
+def _calendar_months(Y, last_month):
+    """(n, n_months) calendar month (0-11) of every grid cell."""
+    return (last_month[:, None] - np.arange(Y.shape[1])[::-1]) % 12
+
+
+def _latest(Y, k):
+    """
+    The latest ``k`` observed readings per series, newest first, with their
+    grid columns: ``(values, columns, count)``; missing slots are NaN / -1.
+    """
+    observed = ~np.isnan(Y)
+    rank     = np.cumsum(observed[:, ::-1], axis=1)[:, ::-1]   # 1 = newest reading
+    values   = np.full((len(Y), k), np.nan)
+    columns  = np.full((len(Y), k), -1)
+    for i in range(k):
+        hit = observed & (rank == i + 1)
+        found = hit.any(axis=1)
+        columns[found, i] = hit[found].argmax(axis=1)
+        values[found, i]  = Y[found, columns[found, i]]
+    return values, columns, np.minimum(observed.sum(axis=1), k)
+
+
+def _weighted_recent(values, count):
+    """predict_next_units()'s 0.5/0.3/0.2 (or 0.6/0.4) weighting, row-wise."""
+    three = values[:, 0] * 0.5 + values[:, 1] * 0.3 + values[:, 2] * 0.2
+    two   = values[:, 0] * 0.6 + values[:, 1] * 0.4
+    return np.where(count >= 3, three, np.where(count == 2, two, values[:, 0]))
+
+
+# ─────────────────────────────────────────────
+# MODELS
+# ─────────────────────────────────────────────
+class WeightedMovingAverage:
+    """The app's original rule: 0.5/0.3/0.2 of the latest readings, +5% on one reading."""
+    name = "wma"
+
+    def predict(self, Y, last_month):
+        values, _, count = _latest(Y, 3)
+        return np.where(count == 1, values[:, 0] * 1.05, _weighted_recent(values, count))
+
+
+class SeasonalNaive:
+    """Same calendar month last year; the latest reading when that month is missing."""
+    name = "seasonal_naive"
+
+    def predict(self, Y, last_month):
+        latest = _latest(Y, 1)[0][:, 0]
+        if Y.shape[1] < 12:
+            return latest
+        year_ago = Y[:, -12]
+        return np.where(np.isnan(year_ago), latest, year_ago)
+
+
+class HoltWinters:
+    """
+    Additive Holt-Winters with a damped trend and a 12-month season, run
+    over all series in lockstep. Missing months advance the state on its
+    own forecast without updating it.
+    """
+    name = "holt_winters"
+
+    def __init__(self, alpha=0.4, beta=0.05, gamma=0.3, phi=0.9):
+        self.alpha, self.beta, self.gamma, self.phi = alpha, beta, gamma, phi
+
+    def predict(self, Y, last_month):
+        n, T   = Y.shape
+        rows   = np.arange(n)
+        months = _calendar_months(Y, last_month)
+        level, trend = np.full(n, np.nan), np.zeros(n)
+        season = np.zeros((n, 12))
+        for t in range(T):
+            y, m = Y[:, t], months[:, t]
+            s = season[rows, m]
+            started  = ~np.isnan(level)
+            observed = ~np.isnan(y)
+            update   = started & observed
+            damped   = level + self.phi * trend
+            new_level = np.where(update, self.alpha * (y - s) + (1 - self.alpha) * damped, damped)
+            new_trend = np.where(update, self.beta * (new_level - level) + (1 - self.beta) * self.phi * trend,
+                                 self.phi * trend)
+            season[rows, m] = np.where(update, self.gamma * (y - new_level) + (1 - self.gamma) * s, s)
+            level = np.where(started, new_level, y)   # the first reading seeds the level
+            trend = np.where(started, new_trend, 0.0)
+        target = (last_month + 1) % 12
+        return np.maximum(level + self.phi * trend + season[rows, target], 0.0)
+
+
+class SeasonalMultiplier:
+    """
+    The weighted moving average taken on deseasonalised readings, then
+    re-seasonalised for the target month. The seasonal shape comes from
+    SEASONAL_MULTIPLIERS through seasonal_load_index(), weighted by the
+    household's survey profile when one is given. A list of surveys gives
+    each series of the batch its own shape.
+    """
+    name = "seasonal_multiplier"
+
+    def __init__(self, survey=None):
+        if isinstance(survey, list):
+            self.index = np.array([seasonal_load_index(s) for s in survey]).reshape(-1, 12)
+        else:
+            self.index = seasonal_load_index(survey)
+
+    def predict(self, Y, last_month):
+        index   = np.broadcast_to(self.index, (len(Y), 12))
+        values, columns, count = _latest(Y, 3)
+        months  = (last_month[:, None] - (Y.shape[1] - 1 - columns)) % 12
+        base    = _weighted_recent(values / np.take_along_axis(index, months, axis=1), count)
+        return base * index[np.arange(len(Y)), (last_month + 1) % 12]
+
+
+MODELS = {model.name: model for model in (WeightedMovingAverage, SeasonalNaive, HoltWinters, SeasonalMultiplier)}
+DEFAULT_MODEL = WeightedMovingAverage.name
+
+
+def get_model(name=DEFAULT_MODEL, survey=None):
+    """Instantiate a model by name; the seasonal-multiplier model takes the user's survey."""
+    if name not in MODELS:
+        raise ValueError(f"unknown forecast model {name!r}; choose from {', '.join(MODELS)}")
+    return MODELS[name](survey) if name == SeasonalMultiplier.name else MODELS[name]()
+
+
+def forecast_next(history, model=DEFAULT_MODEL, survey=None, survey_units=0.0):
+    """
+    Next month's kWh, rounded to 0.1, from one user's (year, month, units)
+    history, oldest → newest. Below two readings every model falls back to
+    predict_next_units(), which can lean on the survey baseline.
+    """
+    if model == DEFAULT_MODEL or len(history) < 2:
+        return predict_next_units([r[2] for r in history], survey_units)
+    Y, last_month = history_matrix([history])
+    return round(float(get_model(model, survey).predict(Y, last_month)[0]), 1)
+
+
+# ─────────────────────────────────────────────
+# BACKTEST
+# ─────────────────────────────────────────────
+def backtest_windows(histories, min_history=3, n_months=HISTORY_MONTHS):
+    """
+    Every one-step-ahead case the histories allow: a grid row for each
+    reading that has ``min_history`` earlier readings and directly follows
+    the previous one. Returns (Y, last_month, actual, series), where
+    ``series`` is each case's position in ``histories``.
+    """
+    kept  = [i for i, h in enumerate(histories) if h]
+    histories = [histories[i] for i in kept]
+    spans = [(h[-1][0] * 12 + MONTH_ORDER[h[-1][1]]) - (h[0][0] * 12 + MONTH_ORDER[h[0][1]]) + 1 for h in histories]
+    width = max(spans, default=0) + n_months
+    Y_full, last_full = history_matrix(histories, n_months=width)
+    grids, lasts, actuals, series = [], [], [], []
+    for i, span in enumerate(spans):
+        row = Y_full[i, width - span - n_months:]                 # n_months of NaN lead-in, then the history
+        windows = np.lib.stride_tricks.sliding_window_view(row[:-1], n_months)
+        targets = row[n_months:]
+        seen    = np.cumsum(~np.isnan(row))[n_months - 1:-1]      # readings up to each window's end
+        usable  = ~np.isnan(targets) & ~np.isnan(windows[:, -1]) & (seen >= min_history)
+        grids.append(windows[usable])
+        actuals.append(targets[usable])
+        # Window j ends on the history's month j - 1
+        lasts.append((last_full[i] - span + np.flatnonzero(usable)) % 12)
+        series.append(np.full(usable.sum(), kept[i]))
+    if not grids:
+        return np.empty((0, n_months)), np.empty(0, dtype=int), np.empty(0), np.empty(0, dtype=int)
+    return np.concatenate(grids), np.concatenate(lasts), np.concatenate(actuals), np.concatenate(series)
+
+
+def backtest(histories, models=None, surveys=None, min_history=3, n_months=HISTORY_MONTHS):
+    """
+    Score each model on every backtest_windows() case in one batched call.
+    ``surveys``, aligned with ``histories``, gives the default
+    seasonal-multiplier model each household's own profile. Returns one
+    dict per model: name, cases, mae, seconds, us_per_forecast.
+    """
+    Y, last_month, actual, series = backtest_windows(histories, min_history, n_months)
+    if models is None:
+        models = [cls() for cls in MODELS.values() if cls is not SeasonalMultiplier]
+        models.append(SeasonalMultiplier([surveys[i] for i in series] if surveys is not None else None))
+    results = []
+    for model in models:
+        start   = time.perf_counter()
+        predict = model.predict(Y, last_month)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "model":           model.name,
+            "cases":           len(actual),
+            "mae":             float(np.abs(predict - actual).mean()) if len(actual) else float("nan"),
+            "seconds":         elapsed,
+            "us_per_forecast": elapsed / len(actual) * 1e6 if len(actual) else 0.0,
+        })
+    return results
+
+
+def print_backtest(results):
+    print(f"{'model':<20} | {'cases':>7} | {'MAE kWh':>8} | {'ms':>8} | {'us/forecast':>11}")
+    for r in sorted(results, key=lambda r: r["mae"]):
+        print(f"{r['model']:<20} | {r['cases']:>7} | {r['mae']:>8.2f} | {r['seconds'] * 1000:>8.2f} | "
+              f"{r['us_per_forecast']:>11.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the forecast models over every user's history.")
+    parser.add_argument("--min-history", type=int, default=3, help="readings required before a forecast is scored")
+    args = parser.parse_args(argv)
+
+    from voltiq import db
+    from voltiq.store import load_all_histories, load_all_surveys
+
+    db.configure_from_env()
+    users, histories = [], []
+    for username, rows in groupby(load_all_histories(), key=lambda r: r[0]):
+        users.append(username)
+        histories.append([r[1:] for r in rows])
+    surveys = load_all_surveys()
+    print(f"{len(histories)} users, {sum(len(h) for h in histories)} readings")
+    print_backtest(backtest(histories, surveys=[surveys.get(u) for u in users], min_history=args.min_history))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Process-wide, bounded executor for password hashing.
+
+One scrypt call (n=16384, r=8) takes ~16 MiB and tens of milliseconds.
+Run directly on Streamlit's script threads, a burst of logins hashes in
+parallel with no upper bound on CPU or memory. Every hash in voltiq.auth
+goes through this executor instead: at most ``max_workers`` run at once,
+at most ``max_pending`` more wait for a worker, and a job that waits longer
+than ``queue_timeout`` is dropped with HashingBusy rather than hashed late.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HashingBusy(Exception):
+    """Raised when a hash could not start within the queue timeout."""
+
+
+class HashingExecutor:
+    """
+    Thread pool with admission control. hashlib.scrypt releases the GIL, so
+    worker threads hash in parallel while the caller just waits on a future.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, queue_timeout=5.0):
+        if max_workers < 1 or max_pending < 0:
+            raise ValueError(f"invalid hashing limits: max_workers={max_workers}, max_pending={max_pending}")
+        self.max_workers   = max_workers
+        self.max_pending   = max_pending
+        self.queue_timeout = queue_timeout
+        self._pool  = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voltiq-hash")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock  = threading.Lock()
+        self.completed = 0
+        self.rejected  = 0
+        self.wait_seconds = 0.0   # total time jobs spent queued before a worker picked them up
+
+    def submit(self, fn, *args, block=True):
+        """
+        Queue ``fn(*args)`` and return its Future. Raises HashingBusy if no
+        slot frees up within the queue timeout (immediately if not ``block``).
+        """
+        queued_at = time.monotonic()
+        if not self._slots.acquire(blocking=block, timeout=self.queue_timeout if block else None):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy(f"password hashing is saturated ({self.max_workers} running, {self.max_pending} queued)")
+
+        def run():
+            try:
+                waited = time.monotonic() - queued_at
+                if waited > self.queue_timeout:
+                    with self._lock:
+                        self.rejected += 1
+                    raise HashingBusy(f"password hash waited {waited:.1f}s for a worker")
+                result = fn(*args)
+                with self._lock:
+                    self.completed += 1
+                    self.wait_seconds += waited
+                return result
+            finally:
+                self._slots.release()
+
+        try:
+            return self._pool.submit(run)
+        except RuntimeError:
+            self._slots.release()
+            raise
+
+    def run(self, fn, *args):
+        """submit() and wait for the result."""
+        return self.submit(fn, *args).result()
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {"max_workers": self.max_workers, "max_pending": self.max_pending,
+                    "completed": self.completed, "rejected": self.rejected,
+                    "wait_seconds": self.wait_seconds}
+
+
+# ─────────────────────────────────────────────
+# PROCESS-WIDE EXECUTOR
+# ─────────────────────────────────────────────
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def configure(max_workers=2, max_pending=16, queue_timeout=5.0):
+    """Create the shared executor on first call; later calls return the existing one."""
+    global _executor
+    if _executor is not None:
+        return _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = HashingExecutor(max_workers, max_pending, queue_timeout)
+    return _executor
+
+
+def configure_from_env():
+    """Create the shared executor from optional HASH_WORKERS, HASH_QUEUE and HASH_TIMEOUT."""
+    return configure(
+        max_workers=int(os.environ.get("HASH_WORKERS", 2)),
+        max_pending=int(os.environ.get("HASH_QUEUE", 16)),
+        queue_timeout=float(os.environ.get("HASH_TIMEOUT", 5)),
+    )
+
+
+def get_executor():
+    """The shared executor, created with default limits if nothing configured it."""
+    return _executor if _executor is not None else configure()
@@ -0,0 +1,217 @@
+"""
+Bulk import of historical meter readings from CSV.
+
+Two layouts are recognised (headers are case-insensitive):
+
+    Date, Units, Amount, Month          data.csv style — year from Date, else --year
+    Year, Month, Units, Bill, Rate      the dashboard's CSV export, any number of years
+
+Rows are validated and normalised one at a time while the file streams in;
+a bad row is reported with its line number and skipped, never aborting the
+batch. Valid rows are written with one multi-row upsert per batch, and
+their appliance-hour estimates are computed in one vectorised pass.
+
+    python -m voltiq.importer readings.csv --user asha --supplier MSEDCL --year 2024
+"""
+import argparse
+import csv
+import math
+import sys
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import psycopg2
+
+from voltiq import db
+from voltiq.appliances import estimate_hours_batch, hours_rows_to_dicts
+from voltiq.constants import MONTH_NAMES
+from voltiq.store import has_completed_survey, load_supplier, save_entries_bulk
+from voltiq.tariff import calculate_bill
+
+RowError = namedtuple("RowError", "line message")
+
+_MONTH_ALIASES = {}
+for _i, _name in enumerate(MONTH_NAMES):
+    _full = datetime(2000, _i + 1, 1).strftime("%B")
+    for _alias in (_name, _full, str(_i + 1), f"{_i + 1:02d}"):
+        _MONTH_ALIASES[_alias.lower()] = _name
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y")
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    errors:   list = field(default_factory=list)   # [RowError]
+    years:    set = field(default_factory=set)
+
+
+def _field(row, *names):
+    for name in names:
+        value = row.get(name)
+        if value is not None and value.strip():
+            return value.strip()
+    return None
+
+
+def _number(text, label):
+    try:
+        value = float(text.replace(",", ""))
+    except ValueError:
+        raise ValueError(f"{label} is not a number: {text!r}")
+    if not math.isfinite(value):
+        raise ValueError(f"{label} is not finite: {text!r}")
+    return value
+
+
+def _parse_date(text):
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date: {text!r}")
+
+
+def normalise_row(row, supplier="MSEDCL", default_year=None):
+    """
+    Turn one CSV row (keys already lower-cased) into (year, month, units, bill, rate).
+    Raises ValueError with a human-readable reason for invalid rows.
+    """
+    date_text = _field(row, "date")
+    date = _parse_date(date_text) if date_text else None
+
+    month_text = _field(row, "month")
+    if month_text:
+        month = _MONTH_ALIASES.get(month_text.lower())
+        if month is None:
+            raise ValueError(f"unrecognised month: {month_text!r}")
+    elif date:
+        month = MONTH_NAMES[date.month - 1]
+    else:
+        raise ValueError("no Month or Date")
+
+    year_text = _field(row, "year")
+    if year_text:
+        year = int(_number(year_text, "Year"))
+    elif date:
+        year = date.year
+    elif default_year:
+        year = int(default_year)
+    else:
+        raise ValueError("no Year or Date, and no default year given")
+    if not 2000 <= year <= 2100:
+        raise ValueError(f"year out of range: {year}")
+
+    units_text = _field(row, "units", "kwh")
+    if units_text is None:
+        raise ValueError("no Units")
+    units = _number(units_text, "Units")
+    if units <= 0:
+        raise ValueError(f"Units must be positive: {units_text!r}")
+
+    bill_text = _field(row, "bill", "amount")
+    bill = _number(bill_text, "Bill") if bill_text else 0.0
+    if bill < 0:
+        raise ValueError(f"Bill cannot be negative: {bill_text!r}")
+    if bill == 0:
+        bill = calculate_bill(units, supplier)["total"]
+
+    rate_text = _field(row, "rate")
+    rate = _number(rate_text, "Rate") if rate_text else 0.0
+    if rate <= 0:
+        rate = round(bill / units, 2)
+    return year, month, units, bill, rate
+
+
+def iter_rows(stream, supplier="MSEDCL", default_year=None):
+    """Yield (line_number, entry, error) for every data row; exactly one of entry/error is set."""
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [(h or "").strip().lower() for h in reader.fieldnames]
+    for row in reader:
+        if not any((v or "").strip() for v in row.values() if isinstance(v, str)):
+            continue   # blank line
+        try:
+            yield reader.line_num, normalise_row(row, supplier, default_year), None
+        except ValueError as e:
+            yield reader.line_num, None, str(e)
+
+
+def save_readings(username, entries, survey=None):
+    """
+    Write (year, month, units, bill, rate) entries in one transaction, with a
+    seasonal, bill-scaled appliance-hours estimate per month when ``survey``
+    hours are given (as the single-bill upload flow does).
+    """
+    entries = list(entries)
+    appliance_rows = []
+    if survey and entries:
+        matrix = estimate_hours_batch(survey, [e[1] for e in entries], [e[2] for e in entries])
+        appliance_rows = [(e[0], e[1], hours)
+                          for e, hours in zip(entries, hours_rows_to_dicts(matrix, survey))]
+    save_entries_bulk(username, entries, appliance_rows)
+
+
+def _flush(username, batch, survey, report):
+    entries = [entry for _, entry in batch.values()]
+    try:
+        save_readings(username, entries, survey)
+    except psycopg2.Error as e:
+        report.errors.extend(RowError(line, f"database error: {e}".strip()) for line, _ in batch.values())
+    else:
+        report.imported += len(entries)
+        report.years.update(e[0] for e in entries)
+    batch.clear()
+
+
+def import_csv(stream, username, supplier="MSEDCL", default_year=None, survey=None, batch_size=500):
+    """
+    Import every valid row of a text-mode CSV ``stream`` for ``username``.
+    When ``survey`` hours are given, each imported month also gets a
+    seasonal, bill-scaled appliance-hours estimate (as the upload flow does).
+    Later rows for the same month replace earlier ones.
+    """
+    report = ImportReport()
+    batch  = {}   # (year, month) -> (line, entry)
+    for line, entry, error in iter_rows(stream, supplier, default_year):
+        if error:
+            report.errors.append(RowError(line, error))
+            continue
+        key = entry[:2]
+        if key in batch:
+            report.errors.append(RowError(batch[key][0], f"superseded by line {line} ({key[1]} {key[0]})"))
+        batch[key] = (line, entry)
+        if len(batch) >= batch_size:
+            _flush(username, batch, survey, report)
+    if batch:
+        _flush(username, batch, survey, report)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import monthly meter readings from CSV.")
+    parser.add_argument("csv_path")
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--supplier", default=None, help="defaults to the user's saved supplier")
+    parser.add_argument("--year", type=int, default=None, help="year for rows without Year/Date")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--no-appliances", action="store_true", help="skip appliance-hour estimates")
+    args = parser.parse_args(argv)
+
+    db.configure_from_env()
+    supplier = args.supplier or load_supplier(args.user)
+    survey   = None if args.no_appliances else has_completed_survey(args.user)
+    with open(args.csv_path, newline="", encoding="utf-8-sig") as f:
+        report = import_csv(f, args.user, supplier, args.year, survey, args.batch_size)
+
+    print(f"Imported {report.imported} month(s) for {args.user} across {sorted(report.years) or 'no'} years")
+    for err in report.errors:
+        print(f"  line {err.line}: {err.message}", file=sys.stderr)
+    return 0 if report.imported or not report.errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
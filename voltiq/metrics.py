@@ -0,0 +1,380 @@
+"""
+Opt-in instrumentation for page reruns: timed sections, DB query counts and
+approximate bytes fetched, kept both as a per-rerun trace and as
+process-wide totals for a Prometheus-style text export.
+
+Disabled by default. While disabled, section() hands back one shared no-op
+context manager, @timed wrappers make a single global check and
+db.connection() yields the raw connection, so the hooks cost about a
+function call each.
+
+    metrics.configure(enabled=True)
+    metrics.begin_run("dashboard")
+    with metrics.section("ticker"):
+        ...
+    metrics.checkpoint("charts")   # everything since the previous checkpoint
+    trace = metrics.end_run()      # also logged as one JSON line if configured
+    text  = metrics.export_prometheus()
+
+Sections nest; a query counts towards every section open when it runs.
+Traces are per thread, which is per session under Streamlit; work handed
+to other threads (voltiq.prefetch) records into a child trace that
+merge() folds back into the rerun.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_enabled = False
+_log     = None                 # file-like for end_run() JSON lines, or None
+_log_path = None
+_local   = threading.local()    # .trace for the rerun on this thread
+_lock    = threading.Lock()
+_NULL    = nullcontext()
+
+# name -> [calls, seconds, queries, bytes]
+_totals = {}
+_runs   = {"count": 0, "seconds": 0.0, "queries": 0, "bytes": 0}
+RUN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_run_buckets = [0] * len(RUN_BUCKETS)
+
+
+def configure(enabled=True, log=None):
+    """
+    Switch instrumentation on or off; ``log`` is a path or stream for
+    per-rerun JSON lines. A file this module opened is closed once the log
+    moves elsewhere; a stream passed in is left to its owner.
+    """
+    global _enabled, _log, _log_path
+    with _lock:
+        if isinstance(log, str):
+            # Cheap to call on every rerun: the file is opened once per path
+            if log != _log_path:
+                opened = open(log, "a", buffering=1, encoding="utf-8")
+                _close_log()
+                _log, _log_path = opened, log
+            log = _log
+        else:
+            _close_log()
+        _enabled, _log = enabled, log
+
+
+def _close_log():
+    # Caller holds _lock
+    global _log_path
+    if _log_path is not None:
+        _log.close()
+        _log_path = None
+
+
+def configure_from_env():
+    """configure() from VOLTIQ_METRICS (1/true) and an optional VOLTIQ_METRICS_LOG path."""
+    configure(os.environ.get("VOLTIQ_METRICS", "").lower() in ("1", "true", "yes"),
+              os.environ.get("VOLTIQ_METRICS_LOG") or None)
+
+
+def enabled():
+    return _enabled
+
+
+# ─────────────────────────────────────────────
+# TRACES
+# ─────────────────────────────────────────────
+class Trace:
+    """One rerun: its sections in completion order, plus query and byte totals."""
+
+    def __init__(self, name):
+        self.name     = name
+        self.started  = time.perf_counter()
+        self.sections = []    # (name, seconds, queries, bytes, depth)
+        self.queries  = 0
+        self.bytes    = 0
+        self.seconds  = None
+        self._stack   = []    # open frames: [name, start, queries, bytes]
+        self._mark    = (self.started, 0, 0)
+
+    def as_dict(self):
+        return {
+            "run":      self.name,
+            "seconds":  self.seconds if self.seconds is not None else time.perf_counter() - self.started,
+            "queries":  self.queries,
+            "bytes":    self.bytes,
+            "sections": [{"name": n, "seconds": s, "queries": q, "bytes": b, "depth": d}
+                         for n, s, q, b, d in self.sections],
+        }
+
+
+def begin_run(name="rerun"):
+    """Start a fresh trace for this thread's rerun; returns it (None when disabled)."""
+    if not _enabled:
+        return None
+    _local.trace = Trace(name)
+    return _local.trace
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def end_run(name=None):
+    """Close this thread's trace (renaming it if given), fold it into the run totals and log it."""
+    trace = current_trace()
+    if not _enabled or trace is None:
+        return None
+    _local.trace = None
+    trace.name = name or trace.name
+    trace.seconds = time.perf_counter() - trace.started
+    with _lock:
+        _runs["count"]   += 1
+        _runs["seconds"] += trace.seconds
+        _runs["queries"] += trace.queries
+        _runs["bytes"]   += trace.bytes
+        for i, bound in enumerate(RUN_BUCKETS):
+            if trace.seconds <= bound:
+                _run_buckets[i] += 1
+        # Under the lock so configure() can't close the file mid-write
+        if _log is not None:
+            _log.write(json.dumps(trace.as_dict()) + "\n")
+    return trace
+
+
+def begin_child():
+    """
+    Start a trace on a worker thread doing part of a rerun's work; the
+    rerun's thread folds it back in with merge(take_child()).
+    """
+    if not _enabled:
+        return None
+    _local.trace = Trace("child")
+    return _local.trace
+
+
+def take_child():
+    """Detach and return this worker thread's child trace."""
+    trace = current_trace()
+    _local.trace = None
+    return trace
+
+
+def merge(child):
+    """Fold a worker's child trace into this thread's trace, under its open sections."""
+    trace = current_trace()
+    if child is None or trace is None:
+        return
+    depth = len(trace._stack)
+    trace.sections.extend((n, s, q, b, d + depth) for n, s, q, b, d in child.sections)
+    trace.queries += child.queries
+    trace.bytes   += child.bytes
+    for frame in trace._stack:
+        frame[2] += child.queries
+        frame[3] += child.bytes
+
+
+def _record(name, seconds, queries, nbytes, depth):
+    trace = current_trace()
+    if trace is not None:
+        trace.sections.append((name, seconds, queries, nbytes, depth))
+    with _lock:
+        total = _totals.setdefault(name, [0, 0.0, 0, 0])
+        total[0] += 1
+        total[1] += seconds
+        total[2] += queries
+        total[3] += nbytes
+
+
+# ─────────────────────────────────────────────
+# SECTIONS
+# ─────────────────────────────────────────────
+class _Section:
+    __slots__ = ("name", "frame", "trace")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = current_trace()
+        self.frame = [self.name, time.perf_counter(), 0, 0]
+        if self.trace is not None:
+            self.trace._stack.append(self.frame)
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.frame[1]
+        depth = 0
+        if self.trace is not None:
+            self.trace._stack.pop()
+            depth = len(self.trace._stack)
+        _record(self.name, elapsed, self.frame[2], self.frame[3], depth)
+        return False
+
+
+def section(name):
+    """``with section("dashboard.charts"):`` — times the block when enabled."""
+    return _Section(name) if _enabled else _NULL
+
+
+def timed(name):
+    """Decorator form of section() for helpers such as the store's DB functions."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Section(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def checkpoint(name):
+    """
+    Record everything since the previous checkpoint (or the start of the
+    run) as section ``name`` — for long stretches of script that a with
+    block would have to re-indent.
+    """
+    trace = current_trace()
+    if not _enabled or trace is None:
+        return
+    now = time.perf_counter()
+    since, queries, nbytes = trace._mark
+    _record(name, now - since, trace.queries - queries, trace.bytes - nbytes, 0)
+    trace._mark = (now, trace.queries, trace.bytes)
+
+
+# ─────────────────────────────────────────────
+# DATABASE
+# ─────────────────────────────────────────────
+def _approx_bytes(rows):
+    """Rough wire size of fetched rows: text/bytes by length, everything else by repr."""
+    total = 0
+    for row in rows:
+        for value in row:
+            if isinstance(value, (str, bytes)):
+                total += len(value)
+            elif isinstance(value, (int, float)) or value is None:
+                total += 8
+            else:
+                total += len(repr(value))
+    return total
+
+
+def record_query(nbytes=0, executed=1):
+    """Count ``executed`` statements and ``nbytes`` fetched against the open sections."""
+    trace = current_trace()
+    if trace is not None:
+        trace.queries += executed
+        trace.bytes   += nbytes
+        for frame in trace._stack:
+            frame[2] += executed
+            frame[3] += nbytes
+    else:
+        with _lock:
+            total = _totals.setdefault("(untraced)", [0, 0.0, 0, 0])
+            total[2] += executed
+            total[3] += nbytes
+
+
+class _InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        record_query()
+        return self._cursor.execute(*args, **kwargs)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            record_query(_approx_bytes((row,)), executed=0)
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        record_query(_approx_bytes(rows), executed=0)
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        record_query(_approx_bytes(rows), executed=0)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            record_query(_approx_bytes((row,)), executed=0)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _InstrumentedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return _InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@contextmanager
+def instrumented(connection_cm):
+    """Wrap a pool's ``connection()`` context so its cursors report to the current trace."""
+    with connection_cm as conn:
+        yield _InstrumentedConnection(conn)
+
+
+# ─────────────────────────────────────────────
+# EXPORT
+# ─────────────────────────────────────────────
+def snapshot():
+    """Process-wide totals: {"runs": {...}, "sections": {name: {...}}}."""
+    with _lock:
+        return {
+            "runs":     dict(_runs, buckets=dict(zip(RUN_BUCKETS, _run_buckets))),
+            "sections": {name: {"calls": c, "seconds": s, "queries": q, "bytes": b}
+                         for name, (c, s, q, b) in _totals.items()},
+        }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def export_prometheus():
+    """Process-wide totals in the Prometheus text exposition format."""
+    snap  = snapshot()
+    runs  = snap["runs"]
+    lines = [
+        "# HELP voltiq_rerun_seconds Wall time of instrumented script reruns.",
+        "# TYPE voltiq_rerun_seconds histogram",
+    ]
+    for bound, count in runs["buckets"].items():   # end_run() fills them cumulatively
+        lines.append(f'voltiq_rerun_seconds_bucket{{le="{bound}"}} {count}')
+    lines += [
+        f'voltiq_rerun_seconds_bucket{{le="+Inf"}} {runs["count"]}',
+        f"voltiq_rerun_seconds_sum {runs['seconds']}",
+        f"voltiq_rerun_seconds_count {runs['count']}",
+    ]
+    for metric, field, kind, help_text in (
+        ("voltiq_section_calls_total",   "calls",   "counter", "Times each section ran."),
+        ("voltiq_section_seconds_total", "seconds", "counter", "Wall time spent in each section."),
+        ("voltiq_db_queries_total",      "queries", "counter", "Statements executed inside each section."),
+        ("voltiq_db_fetched_bytes_total", "bytes",  "counter", "Approximate bytes fetched inside each section."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for name, values in sorted(snap["sections"].items()):
+            lines.append(f'{metric}{{section="{_label(name)}"}} {values[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget all totals (the current thread's trace is left alone)."""
+    with _lock:
+        _totals.clear()
+        _runs.update(count=0, seconds=0.0, queries=0, bytes=0)
+        _run_buckets[:] = [0] * len(RUN_BUCKETS)
@@ -0,0 +1,235 @@
+"""
+Versioned schema migrations.
+
+Each migration is applied at most once per database, in order, and recorded
+in ``schema_version``. ``ensure_schema()`` runs the check at most once per
+process, so Streamlit reruns don't touch the schema at all.
+"""
+import json
+import threading
+from collections import defaultdict
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from voltiq.appliances import usage_rows
+from voltiq.summary import summarise_year
+from voltiq.tariff import calculate_bills
+
+# Arbitrary constant for pg_advisory_xact_lock — every app worker uses the same key
+MIGRATION_LOCK_KEY = 0x566F6C74  # "Volt"
+
+# Backfills carry their own SQL rather than calling voltiq.store, whose
+# queries follow the latest schema: an old migration must still run
+# against the schema as it stood at its own version. The pure helpers
+# they compute with (summaries, usage rows, tariffs) have no schema.
+
+# yearly_summary's columns as migration 3 created them
+_SUMMARY_V3 = (
+    "months", "total_units", "total_bill", "avg_rate",
+    "first_month", "first_units", "last_month", "last_units", "last_bill",
+    "appliance_months", "appliance_units", "appliance_cost", "supplier",
+)
+
+
+def _backfill_yearly_summary(cur):
+    cur.execute("SELECT username, year, month, units, bill, rate FROM electricity_data")
+    months = defaultdict(list)
+    for username, year, *row in cur.fetchall():
+        months[username, year].append(tuple(row))
+    cur.execute("SELECT username, year, month, appliance_hours FROM appliance_data")
+    appliances = defaultdict(list)
+    for username, year, *row in cur.fetchall():
+        appliances[username, year].append(tuple(row))
+    cur.execute("SELECT username, supplier FROM users")
+    suppliers = dict(cur.fetchall())
+
+    rows = []
+    for (username, year), month_rows in months.items():
+        summary = summarise_year(month_rows, appliances[username, year], suppliers.get(username, "MSEDCL"))
+        summary["appliance_units"] = json.dumps(summary["appliance_units"])
+        summary["appliance_cost"]  = json.dumps(summary["appliance_cost"])
+        rows.append((username, year, *(summary[f] for f in _SUMMARY_V3)))
+    execute_values(cur, f"""
+        INSERT INTO yearly_summary (username, year, {", ".join(_SUMMARY_V3)}) VALUES %s
+        ON CONFLICT(username, year) DO NOTHING
+    """, rows)
+
+
+def _backfill_appliance_usage(cur):
+    # Both JSONB shapes go through ApplianceProfile, exactly as the app reads
+    # them; each appliance's kWh is priced alone on the user's slabs
+    cur.execute("""
+        SELECT a.username, a.year, a.month, a.appliance_hours, COALESCE(u.supplier, 'MSEDCL')
+        FROM appliance_data a LEFT JOIN users u ON u.username = a.username
+    """)
+    by_supplier = defaultdict(list)
+    for username, year, month, hours, supplier in cur.fetchall():
+        by_supplier[supplier].extend((username, year, month, *row) for row in usage_rows(hours))
+
+    rows = []
+    for supplier, usage in by_supplier.items():
+        kwh   = np.array([r[6] for r in usage], dtype=float)
+        price = np.zeros_like(kwh)
+        price[kwh > 0] = calculate_bills(kwh[kwh > 0], supplier)["total"]
+        rows.extend((*r, p) for r, p in zip(usage, price.tolist()))
+    execute_values(cur, """
+        INSERT INTO appliance_usage (username, year, month, appliance, qty, hrs, kwh, price) VALUES %s
+        ON CONFLICT DO NOTHING
+    """, rows)
+
+
+# (version, description, statements). A statement is SQL text or a callable
+# taking the cursor, for data backfills that need Python.
+# Never edit an applied migration — append a new one.
+MIGRATIONS = [
+    (1, "base schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            security_question TEXT NOT NULL DEFAULT '',
+            security_answer TEXT NOT NULL DEFAULT '',
+            supplier TEXT NOT NULL DEFAULT 'MSEDCL'
+        )
+        """,
+        # Databases created before suppliers existed
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS supplier TEXT NOT NULL DEFAULT 'MSEDCL'",
+        """
+        CREATE TABLE IF NOT EXISTS electricity_data (
+            id SERIAL PRIMARY KEY,
+            username TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            units REAL NOT NULL,
+            bill REAL NOT NULL,
+            rate REAL NOT NULL,
+            UNIQUE(username, year, month)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS appliance_data (
+            id SERIAL PRIMARY KEY,
+            username TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            appliance_hours JSONB NOT NULL,
+            UNIQUE(username, year, month)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_survey (
+            id SERIAL PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            avg_appliance_hours JSONB NOT NULL,
+            completed_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+    ]),
+    (2, "covering index for per-year reads", [
+        # The UNIQUE(username, year, month) index already serves prefix lookups;
+        # INCLUDE lets load_user_data answer from the index without heap fetches.
+        """
+        CREATE INDEX IF NOT EXISTS idx_electricity_data_user_year
+            ON electricity_data (username, year) INCLUDE (month, units, bill, rate)
+        """,
+    ]),
+    (3, "materialised per-user yearly summary", [
+        """
+        CREATE TABLE IF NOT EXISTS yearly_summary (
+            username TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            months INTEGER NOT NULL,
+            total_units DOUBLE PRECISION NOT NULL,
+            total_bill DOUBLE PRECISION NOT NULL,
+            avg_rate DOUBLE PRECISION NOT NULL,
+            first_month TEXT NOT NULL,
+            first_units DOUBLE PRECISION NOT NULL,
+            last_month TEXT NOT NULL,
+            last_units DOUBLE PRECISION NOT NULL,
+            last_bill DOUBLE PRECISION NOT NULL,
+            appliance_months INTEGER NOT NULL DEFAULT 0,
+            appliance_units JSONB NOT NULL DEFAULT '{}',
+            appliance_cost JSONB NOT NULL DEFAULT '{}',
+            supplier TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (username, year)
+        )
+        """,
+        _backfill_yearly_summary,
+    ]),
+    (4, "normalised appliance usage", [
+        # One row per (month, appliance) of appliance_data; kwh is wattage x
+        # qty x hrs over 30 days and price that kWh alone on the user's slabs
+        """
+        CREATE TABLE IF NOT EXISTS appliance_usage (
+            username TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            appliance TEXT NOT NULL,
+            qty DOUBLE PRECISION NOT NULL,
+            hrs DOUBLE PRECISION NOT NULL,
+            kwh DOUBLE PRECISION NOT NULL,
+            price DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (username, year, month, appliance)
+        )
+        """,
+        # yearly_summary needs no rebuild: the SQL aggregate over these rows
+        # gives the same appliance totals as migration 3's Python attribution,
+        # to 1e-12 relative — checked by benchmarks/bench_attribution.py
+        _backfill_appliance_usage,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn):
+    """
+    Apply every pending migration in one transaction and return the schema version.
+    A transaction-scoped advisory lock serialises concurrent workers: the
+    second one waits, then sees the recorded version and applies nothing.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    current = cur.fetchone()[0]
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        for statement in statements:
+            if callable(statement):
+                statement(cur)
+            else:
+                cur.execute(statement)
+        cur.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (version, description))
+        current = version
+    conn.commit()
+    cur.close()
+    return current
+
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema(get_connection):
+    """Run ``migrate()`` once per process; ``get_connection`` yields a pooled connection."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        with get_connection() as conn:
+            migrate(conn)
+        _schema_ready = True
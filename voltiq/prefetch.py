@@ -0,0 +1,124 @@
+"""
+Concurrent fetch phase for page reruns.
+
+A page's store reads are mostly independent of each other — the dashboard
+wants the user's years, the selected year's rows, its summary and its
+appliance rows — but run one after another, each waits out its own round
+trip. gather() runs such a batch on a small process-wide thread pool, each
+call borrowing its own pooled connection, so a cold page waits roughly for
+its slowest read instead of the sum of them:
+
+    page_data = prefetch.gather([
+        (load_years_with_data, username),
+        (load_user_data, username, year),
+        (load_year_summary, username, year),
+    ])
+    rows = page_data.get(load_user_data, username, year)
+
+The calls go through the usual cached store helpers, so a warm rerun costs
+a few cache hits, and anything the page didn't plan for is still a plain
+call away: PageData.get() falls back to calling the loader. psycopg2
+releases the GIL while it waits on the server, so threads are enough here.
+
+Keep ``max_workers`` below the DB pool's ``maxconn``, so that concurrent
+sessions prefetching at once still leave connections for writes.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from voltiq import metrics
+
+
+class PageData:
+    """Results of one gather(), looked up by the call that produced them."""
+
+    def __init__(self, results):
+        self._results = results   # (fn, args) -> value
+
+    def get(self, fn, *args):
+        """The gathered ``fn(*args)``, or a fresh call if it wasn't part of the batch."""
+        key = (fn, args)
+        if key in self._results:
+            return self._results[key]
+        return fn(*args)
+
+    def __contains__(self, call):
+        fn, *args = call
+        return (fn, tuple(args)) in self._results
+
+    def __len__(self):
+        return len(self._results)
+
+
+def _run(fn, args, traced):
+    # Worker side: the rerun's trace lives on the page's thread, so record
+    # into a child trace and let gather() merge it back
+    if traced:
+        metrics.begin_child()
+    try:
+        result = fn(*args)
+    finally:
+        child = metrics.take_child() if traced else None
+    return result, child
+
+
+def gather(calls):
+    """
+    Run ``calls`` — ``(fn, *args)`` tuples — concurrently and return a
+    PageData. Duplicate calls run once. The first exception raised by a
+    call is re-raised here, after every call has finished.
+    """
+    keys = list(dict.fromkeys((fn, tuple(args)) for fn, *args in calls))
+    if len(keys) <= 1:
+        return PageData({key: key[0](*key[1]) for key in keys})
+
+    traced   = metrics.current_trace() is not None
+    executor = get_executor()
+    futures  = [executor.submit(_run, fn, args, traced) for fn, args in keys]
+    results, error = {}, None
+    for key, future in zip(keys, futures):
+        try:
+            results[key], child = future.result()
+        except Exception as exc:
+            error = error or exc
+            continue
+        metrics.merge(child)
+    if error is not None:
+        raise error
+    return PageData(results)
+
+
+def fetch_sequential(calls):
+    """gather() without the thread pool — the comparison point for benchmarks."""
+    return PageData({(fn, tuple(args)): fn(*args) for fn, *args in calls})
+
+
+# ─────────────────────────────────────────────
+# PROCESS-WIDE EXECUTOR
+# ─────────────────────────────────────────────
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def configure(max_workers=4):
+    """Create the shared fetch pool on first call; later calls return the existing one."""
+    global _executor
+    if max_workers < 1:
+        raise ValueError(f"invalid prefetch workers: {max_workers}")
+    if _executor is not None:
+        return _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voltiq-fetch")
+    return _executor
+
+
+def configure_from_env():
+    """Create the shared fetch pool from an optional PREFETCH_WORKERS."""
+    return configure(max_workers=int(os.environ.get("PREFETCH_WORKERS", 4)))
+
+
+def get_executor():
+    """The shared fetch pool, created with the default size if nothing configured it."""
+    return _executor if _executor is not None else configure()
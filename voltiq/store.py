@@ -0,0 +1,491 @@
+"""
+Persistence for user profiles (supplier, survey) and electricity_data /
+appliance_data.
+
+electricity_data / appliance_data reads go through ``data_cache``; every
+write invalidates exactly the keys it affects, so a reader never sees data older than the last write made by
+this process. Key layout:
+
+    ("rows", username, year)        load_user_data
+    ("years", username)             load_years_with_data
+    ("appliances", username, year)  load_all_appliance_data / load_appliance_data
+    ("history", username)           load_user_history
+    ("summary", username, year)     load_year_summary
+
+Each write also bumps the user's generation (``user_generation``), a
+process-local counter that derived caches can key on without a query.
+
+yearly_summary is maintained inside the same transaction as every write
+to electricity_data / appliance_data (and on supplier changes), so it is
+never out of step with the rows it summarises. So is appliance_usage, the
+normalised copy of appliance_data: one row per (month, appliance) with
+qty, hrs, the unscaled kWh and that kWh's price on the user's supplier
+slabs, which lets the yearly appliance totals be one SQL aggregate.
+"""
+import json
+import threading
+from collections import namedtuple
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from voltiq import db, metrics
+from voltiq.appliances import APPLIANCE_NAMES, usage_rows
+from voltiq.cache import data_cache
+from voltiq.constants import MONTH_NAMES
+from voltiq.summary import SUMMARY_FIELDS, summarise_totals
+from voltiq.tariff import calculate_bills
+
+
+LoginProfile = namedtuple("LoginProfile", "password_hash supplier survey")
+
+_generations = {}   # username -> writes made by this process
+_generations_lock = threading.Lock()
+
+
+def _invalidate(username, *keys):
+    with _generations_lock:
+        _generations[username] = _generations.get(username, 0) + 1
+    data_cache.invalidate(*keys)
+
+
+def user_generation(username):
+    """Counter that changes on every write this process makes for ``username``."""
+    return _generations.get(username, 0)
+
+
+def _entry_keys(username, year):
+    return ("rows", username, year), ("years", username), ("history", username), ("summary", username, year)
+
+
+def _appliance_keys(username, year):
+    return ("appliances", username, year), ("summary", username, year)
+
+
+def _supplier(cur, username):
+    cur.execute("SELECT supplier FROM users WHERE username = %s", (username,))
+    row = cur.fetchone()
+    return row[0] if row else "MSEDCL"
+
+
+def write_usage(cur, username, appliance_rows, supplier):
+    """
+    Replace the appliance_usage rows of every (year, month, appliance_hours)
+    in ``appliance_rows`` on ``cur``'s open transaction — one DELETE and one
+    INSERT over unnest()ed arrays, however many months. Each appliance's
+    kWh is priced alone on ``supplier``'s slabs, as attribute_usage() does.
+    """
+    documents = {(year, month): hours for year, month, hours in appliance_rows}
+    if not documents:
+        return
+    cols = ([], [], [], [], [], [])   # year, month, appliance, qty, hrs, kwh
+    for (year, month), hours in documents.items():
+        for row in usage_rows(hours):
+            for col, value in zip(cols, (year, month, *row)):
+                col.append(value)
+    kwh   = np.array(cols[5], dtype=float)
+    price = np.zeros_like(kwh)
+    price[kwh > 0] = calculate_bills(kwh[kwh > 0], supplier)["total"]
+
+    years, months = zip(*documents)
+    cur.execute("""
+        DELETE FROM appliance_usage
+        WHERE username = %s AND (year, month) IN (SELECT * FROM unnest(%s::int[], %s::text[]))
+    """, (username, list(years), list(months)))
+    if cols[0]:
+        cur.execute("""
+            INSERT INTO appliance_usage (username, year, month, appliance, qty, hrs, kwh, price)
+            SELECT %s, * FROM unnest(%s::int[], %s::text[], %s::text[], %s::float8[], %s::float8[],
+                                     %s::float8[], %s::float8[])
+        """, (username, *cols, price.tolist()))
+
+
+def appliance_totals(cur, username, year):
+    """
+    (appliance_months, {appliance: kWh}, {appliance: Rs}) for one year in a
+    single SQL aggregate over appliance_usage: each month's metered units
+    and bill split in proportion to the appliances' kWh and slab prices —
+    yearly_appliance_breakdown()'s attribution, summed by the database
+    (equal up to float summation order). Appliances in APPLIANCES order.
+    """
+    cur.execute("""
+        SELECT (SELECT COUNT(*) FROM appliance_data WHERE username = %s AND year = %s),
+               t.appliance, t.kwh, t.cost
+        FROM (SELECT 1) AS one
+        LEFT JOIN (
+            SELECT appliance,
+                   SUM(kwh / month_kwh * units)    AS kwh,
+                   SUM(price / month_price * bill) AS cost
+            FROM (
+                -- REAL columns as the client reads them (shortest decimal), not widened float4
+                SELECT u.appliance, u.kwh, u.price, e.units::text::float8 AS units, e.bill::text::float8 AS bill,
+                       SUM(u.kwh)   OVER (PARTITION BY u.month) AS month_kwh,
+                       SUM(u.price) OVER (PARTITION BY u.month) AS month_price
+                FROM appliance_usage u
+                JOIN electricity_data e
+                  ON e.username = u.username AND e.year = u.year AND e.month = u.month
+                WHERE u.username = %s AND u.year = %s AND u.kwh > 0
+            ) AS m
+            WHERE units <> 0 AND bill <> 0 AND month_kwh <> 0
+            GROUP BY appliance
+        ) AS t ON TRUE
+        ORDER BY array_position(%s::text[], t.appliance)
+    """, (username, year, username, year, list(APPLIANCE_NAMES)))
+    rows = cur.fetchall()
+    units = {a: float(k) for _, a, k, _ in rows if a is not None}
+    cost  = {a: float(c) for _, a, _, c in rows if a is not None}
+    return rows[0][0], units, cost
+
+
+def refresh_summary(cur, username, year, supplier=None):
+    """
+    Recompute the yearly_summary row for (username, year) on ``cur``'s open
+    transaction; ``supplier`` saves looking it up when the caller has it.
+    The advisory lock, held to commit, serialises concurrent writers to the
+    same year, so the last one to commit always reads every row committed
+    before it.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s), %s)", (username, year))
+    cur.execute("SELECT month, units, bill, rate FROM electricity_data WHERE username = %s AND year = %s", (username, year))
+    month_rows = cur.fetchall()
+    appliance_months, appliance_units, appliance_cost = appliance_totals(cur, username, year)
+    supplier = supplier or _supplier(cur, username)
+    summary = summarise_totals(month_rows, appliance_months, appliance_units, appliance_cost, supplier)
+    if summary is None:
+        cur.execute("DELETE FROM yearly_summary WHERE username = %s AND year = %s", (username, year))
+        return
+    summary["appliance_units"] = json.dumps(summary["appliance_units"])
+    summary["appliance_cost"]  = json.dumps(summary["appliance_cost"])
+    cur.execute(f"""
+        INSERT INTO yearly_summary (username, year, {", ".join(SUMMARY_FIELDS)})
+        VALUES (%s, %s, {", ".join(["%s"] * len(SUMMARY_FIELDS))})
+        ON CONFLICT(username, year) DO UPDATE SET
+            {", ".join(f"{f} = EXCLUDED.{f}" for f in SUMMARY_FIELDS)}, updated_at = NOW()
+    """, (username, year, *(summary[f] for f in SUMMARY_FIELDS)))
+
+
+# ─────────────────────────────────────────────
+# USER PROFILE
+# ─────────────────────────────────────────────
+@metrics.timed("store.save_supplier")
+def save_supplier(username, supplier):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE users SET supplier = %s WHERE username = %s", (supplier, username))
+        # Appliance cost shares are priced on the supplier's slabs
+        _reprice_usage(cur, username, supplier)
+        # Year order, like the writers' per-year advisory locks, so this can't deadlock with an import
+        cur.execute("SELECT year FROM yearly_summary WHERE username = %s ORDER BY year", (username,))
+        years = [r[0] for r in cur.fetchall()]
+        for year in years:
+            refresh_summary(cur, username, year, supplier)
+        conn.commit()
+        cur.close()
+    _invalidate(username, *(("summary", username, year) for year in years))
+
+def _reprice_usage(cur, username, supplier):
+    cur.execute("SELECT year, month, appliance, kwh FROM appliance_usage WHERE username = %s AND kwh > 0",
+                (username,))
+    rows = cur.fetchall()
+    if not rows:
+        return
+    years, months, appliances, kwh = (list(col) for col in zip(*rows))
+    cur.execute("""
+        UPDATE appliance_usage AS u SET price = v.price
+        FROM unnest(%s::int[], %s::text[], %s::text[], %s::float8[]) AS v(year, month, appliance, price)
+        WHERE u.username = %s AND u.year = v.year AND u.month = v.month AND u.appliance = v.appliance
+    """, (years, months, appliances, calculate_bills(kwh, supplier)["total"].tolist(), username))
+
+@metrics.timed("store.load_supplier")
+def load_supplier(username):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT supplier FROM users WHERE username = %s", (username,))
+        row = cur.fetchone()
+        cur.close()
+        return row[0] if row else "MSEDCL"
+
+@metrics.timed("store.load_login_profile")
+def load_login_profile(username):
+    """
+    Everything a login needs — password hash, supplier and survey hours (None
+    if the survey was never filled) — in one round trip. None for unknown users.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT u.password, u.supplier, s.avg_appliance_hours
+            FROM users u LEFT JOIN user_survey s ON s.username = u.username
+            WHERE u.username = %s
+        """, (username,))
+        row = cur.fetchone()
+        cur.close()
+    return LoginProfile(*row) if row else None
+
+@metrics.timed("store.has_completed_survey")
+def has_completed_survey(username):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT avg_appliance_hours FROM user_survey WHERE username = %s", (username,))
+        row = cur.fetchone()
+        cur.close()
+        return row[0] if row else None
+
+@metrics.timed("store.save_user_survey")
+def save_user_survey(username, avg_hours):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO user_survey (username, avg_appliance_hours)
+            VALUES (%s, %s)
+            ON CONFLICT(username) DO UPDATE SET
+                avg_appliance_hours = EXCLUDED.avg_appliance_hours,
+                completed_at = NOW()
+        """, (username, json.dumps(avg_hours)))
+        conn.commit()
+        cur.close()
+
+
+# ─────────────────────────────────────────────
+# WRITES
+# ─────────────────────────────────────────────
+@metrics.timed("store.save_entry")
+def save_entry(username, year, month, units, bill, rate):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO electricity_data (username, year, month, units, bill, rate)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT(username, year, month) DO UPDATE SET
+                units = EXCLUDED.units, bill = EXCLUDED.bill, rate = EXCLUDED.rate
+        """, (username, year, month, units, bill, rate))
+        refresh_summary(cur, username, year)
+        conn.commit()
+        cur.close()
+    _invalidate(username, *_entry_keys(username, year))
+
+@metrics.timed("store.delete_month_entry")
+def delete_month_entry(username, year, month):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM electricity_data WHERE username = %s AND year = %s AND month = %s", (username, year, month))
+        cur.execute("DELETE FROM appliance_data WHERE username = %s AND year = %s AND month = %s", (username, year, month))
+        cur.execute("DELETE FROM appliance_usage WHERE username = %s AND year = %s AND month = %s", (username, year, month))
+        refresh_summary(cur, username, year)
+        conn.commit()
+        cur.close()
+    _invalidate(username, *_entry_keys(username, year), *_appliance_keys(username, year))
+
+@metrics.timed("store.save_appliance_data")
+def save_appliance_data(username, year, month, appliance_hours):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO appliance_data (username, year, month, appliance_hours)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT(username, year, month) DO UPDATE SET
+                appliance_hours = EXCLUDED.appliance_hours
+        """, (username, year, month, json.dumps(appliance_hours)))
+        supplier = _supplier(cur, username)
+        write_usage(cur, username, [(year, month, appliance_hours)], supplier)
+        refresh_summary(cur, username, year, supplier)
+        conn.commit()
+        cur.close()
+    _invalidate(username, *_appliance_keys(username, year))
+
+@metrics.timed("store.delete_user_data")
+def delete_user_data(username, year):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM electricity_data WHERE username = %s AND year = %s", (username, year))
+        cur.execute("DELETE FROM appliance_data WHERE username = %s AND year = %s", (username, year))
+        cur.execute("DELETE FROM appliance_usage WHERE username = %s AND year = %s", (username, year))
+        cur.execute("DELETE FROM yearly_summary WHERE username = %s AND year = %s", (username, year))
+        conn.commit()
+        cur.close()
+    _invalidate(username, *_entry_keys(username, year), *_appliance_keys(username, year))
+
+@metrics.timed("store.save_entries_bulk")
+def save_entries_bulk(username, entries, appliance_rows=()):
+    """
+    Upsert many months in one transaction: ``entries`` are
+    (year, month, units, bill, rate) and ``appliance_rows`` are
+    (year, month, appliance_hours). Each table gets one multi-row
+    INSERT ... ON CONFLICT per ``page_size`` rows instead of one per month.
+    """
+    entries, appliance_rows = list(entries), list(appliance_rows)
+    if not entries and not appliance_rows:
+        return
+    with db.connection() as conn:
+        cur = conn.cursor()
+        if entries:
+            execute_values(cur, """
+                INSERT INTO electricity_data (username, year, month, units, bill, rate)
+                VALUES %s
+                ON CONFLICT(username, year, month) DO UPDATE SET
+                    units = EXCLUDED.units, bill = EXCLUDED.bill, rate = EXCLUDED.rate
+            """, [(username, *e) for e in entries], page_size=1000)
+        if appliance_rows:
+            execute_values(cur, """
+                INSERT INTO appliance_data (username, year, month, appliance_hours)
+                VALUES %s
+                ON CONFLICT(username, year, month) DO UPDATE SET
+                    appliance_hours = EXCLUDED.appliance_hours
+            """, [(username, y, m, json.dumps(h)) for y, m, h in appliance_rows], page_size=1000)
+        supplier = _supplier(cur, username)
+        write_usage(cur, username, appliance_rows, supplier)
+        for year in sorted({e[0] for e in entries} | {r[0] for r in appliance_rows}):
+            refresh_summary(cur, username, year, supplier)
+        conn.commit()
+        cur.close()
+    keys = set()
+    for year in {e[0] for e in entries}:
+        keys.update(_entry_keys(username, year))
+    for year in {r[0] for r in appliance_rows}:
+        keys.update(_appliance_keys(username, year))
+    _invalidate(username, *keys)
+
+
+# ─────────────────────────────────────────────
+# READS (cached)
+# ─────────────────────────────────────────────
+def _fetch_user_data(username, year):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT month, units, bill, rate FROM electricity_data WHERE username = %s AND year = %s", (username, year))
+        rows = cur.fetchall()
+        cur.close()
+    return tuple(rows)
+
+@metrics.timed("store.load_user_data")
+def load_user_data(username, year):
+    return list(data_cache.get_or_load(("rows", username, year),
+                                       lambda: _fetch_user_data(username, year)))
+
+def _fetch_years_with_data(username):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT DISTINCT year FROM electricity_data WHERE username = %s ORDER BY year DESC", (username,))
+        rows = cur.fetchall()
+        cur.close()
+    return tuple(r[0] for r in rows)
+
+@metrics.timed("store.load_years_with_data")
+def load_years_with_data(username):
+    return list(data_cache.get_or_load(("years", username),
+                                       lambda: _fetch_years_with_data(username)))
+
+def _fetch_user_history(username):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT year, month, units, bill, rate FROM electricity_data
+            WHERE username = %s
+            ORDER BY year, array_position(%s::text[], month)
+        """, (username, MONTH_NAMES))
+        rows = cur.fetchall()
+        cur.close()
+    return tuple(rows)
+
+@metrics.timed("store.load_user_history")
+def load_user_history(username):
+    """
+    Every (year, month, units, bill, rate) row for the user, oldest first,
+    in one query — replaces load_years_with_data + one load_user_data per year.
+    """
+    return list(data_cache.get_or_load(("history", username),
+                                       lambda: _fetch_user_history(username)))
+
+@metrics.timed("store.load_all_histories")
+def load_all_histories():
+    """
+    Every user's (username, year, month, units) rows, grouped by user and
+    oldest first, in one uncached query — for batch jobs such as backtests.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT username, year, month, units FROM electricity_data
+            ORDER BY username, year, array_position(%s::text[], month)
+        """, (MONTH_NAMES,))
+        rows = cur.fetchall()
+        cur.close()
+    return rows
+
+@metrics.timed("store.load_all_years")
+def load_all_years(username):
+    """
+    Every year with readings or appliance hours, oldest first, uncached —
+    unlike load_years_with_data, which only sees electricity_data.
+    """
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT year FROM electricity_data WHERE username = %s
+            UNION
+            SELECT year FROM appliance_data WHERE username = %s
+            ORDER BY year
+        """, (username, username))
+        rows = cur.fetchall()
+        cur.close()
+    return [r[0] for r in rows]
+
+@metrics.timed("store.load_all_surveys")
+def load_all_surveys():
+    """{username: survey hours} for every user who completed the survey, uncached."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT username, avg_appliance_hours FROM user_survey")
+        rows = cur.fetchall()
+        cur.close()
+    return dict(rows)
+
+def _fetch_all_appliance_data(username, year):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT month, appliance_hours FROM appliance_data WHERE username = %s AND year = %s",
+                    (username, year))
+        rows = cur.fetchall()
+        cur.close()
+    return tuple(rows)
+
+@metrics.timed("store.load_all_appliance_data")
+def load_all_appliance_data(username, year):
+    return list(data_cache.get_or_load(("appliances", username, year),
+                                       lambda: _fetch_all_appliance_data(username, year)))
+
+def _fetch_year_summary(username, year):
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT {', '.join(SUMMARY_FIELDS)} FROM yearly_summary WHERE username = %s AND year = %s",
+                    (username, year))
+        row = cur.fetchone()
+        cur.close()
+    return dict(zip(SUMMARY_FIELDS, row)) if row else None
+
+@metrics.timed("store.load_year_summary")
+def load_year_summary(username, year):
+    """The year's yearly_summary row as a dict (see voltiq.summary), or None if it has no data."""
+    summary = data_cache.get_or_load(("summary", username, year),
+                                     lambda: _fetch_year_summary(username, year))
+    return dict(summary) if summary else None
+
+def data_version(username, year):
+    """
+    Fingerprint of the user's electricity and appliance rows for ``year``,
+    for keying derived results (charts, series). It changes whenever a
+    write changes what those loads return.
+    """
+    return hash((tuple(load_user_data(username, year)), repr(load_all_appliance_data(username, year))))
+
+def entries_version(username, year):
+    """data_version() of the electricity rows alone, for results that don't read appliance hours."""
+    return hash(tuple(load_user_data(username, year)))
+
+@metrics.timed("store.load_appliance_data")
+def load_appliance_data(username, year, month):
+    # Served from the per-year entry so one invalidation key covers both
+    for m, hours in load_all_appliance_data(username, year):
+        if m == month:
+            return hours
+    return {}
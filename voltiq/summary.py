@@ -0,0 +1,57 @@
+"""
+Per-user, per-year aggregates behind the dashboard's headline metrics.
+
+``summarise_totals`` is the single definition of those numbers. voltiq.store
+runs it inside every write transaction that touches a year — with the
+appliance totals aggregated in SQL over appliance_usage — and stores the
+result in ``yearly_summary``, so the dashboard reads one indexed row
+instead of re-aggregating months and appliance data on each view.
+``summarise_year`` does the appliance attribution in Python instead, from
+(month, appliance_hours) rows.
+"""
+from voltiq.appliances import yearly_appliance_breakdown
+from voltiq.constants import MONTH_ORDER
+
+SUMMARY_FIELDS = (
+    "months", "total_units", "total_bill", "avg_rate",
+    "first_month", "first_units", "last_month", "last_units", "last_bill",
+    "appliance_months", "appliance_units", "appliance_cost", "supplier",
+)
+
+
+def summarise_year(month_rows, appliance_rows, supplier):
+    """
+    Aggregate one year's (month, units, bill, rate) rows and (month,
+    appliance_hours) rows. Returns None when the year has no months.
+    """
+    if not month_rows:
+        return None
+    appliance_units, appliance_cost = yearly_appliance_breakdown(month_rows, appliance_rows, supplier)
+    return summarise_totals(month_rows, len(appliance_rows), appliance_units, appliance_cost, supplier)
+
+
+def summarise_totals(month_rows, appliance_months, appliance_units, appliance_cost, supplier):
+    """
+    summarise_year() with the appliance breakdown already computed:
+    ``appliance_units`` / ``appliance_cost`` map appliance -> kWh / Rs over
+    ``appliance_months`` months of appliance data.
+    """
+    rows = sorted(month_rows, key=lambda r: MONTH_ORDER[r[0]])
+    if not rows:
+        return None
+    units, bills, rates = [r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows]
+    return {
+        "months":           len(rows),
+        "total_units":      sum(units),
+        "total_bill":       sum(bills),
+        "avg_rate":         sum(rates) / len(rates),
+        "first_month":      rows[0][0],
+        "first_units":      units[0],
+        "last_month":       rows[-1][0],
+        "last_units":       units[-1],
+        "last_bill":        bills[-1],
+        "appliance_months": appliance_months,
+        "appliance_units":  {a: float(v) for a, v in appliance_units.items()},
+        "appliance_cost":   {a: float(v) for a, v in appliance_cost.items()},
+        "supplier":         supplier,
+    }
@@ -0,0 +1,189 @@
+"""
+Supplier tariffs and slab-based bill calculation.
+
+Each entry in ``SUPPLIERS`` is compiled once at import into a
+``CompiledTariff``: cumulative slab ceilings plus the energy charge already
+accrued when each slab starts. Pricing any unit count is then a binary
+search plus one multiply-add. ``calculate_bill`` prices one unit count;
+``calculate_bills`` prices a whole array in one NumPy pass and returns
+exactly the same rounded figures.
+"""
+from bisect import bisect_left
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import numpy as np
+
+from voltiq.numeric import round_like_python
+
+# ─────────────────────────────────────────────
+# SUPPLIER RATES
+# ─────────────────────────────────────────────
+SUPPLIERS = {
+    "MSEDCL": {
+        "full_name": "MSEDCL (Mahavitaran)",
+        "slabs": [(100, 2.90), (200, 6.50), (200, 8.00), (float('inf'), 11.85)],
+        "fixed_charge": 30,
+        "fac": 0.20,
+        "duty_pct": 0.16,
+        "color": "#e74c3c"
+    },
+    "Tata Power": {
+        "full_name": "Tata Power Mumbai",
+        "slabs": [(100, 3.34), (200, 6.68), (200, 9.29), (float('inf'), 12.43)],
+        "fixed_charge": 50,
+        "fac": 0.15,
+        "duty_pct": 0.16,
+        "color": "#2980b9"
+    },
+    "Adani Electricity": {
+        "full_name": "Adani Electricity Mumbai",
+        "slabs": [(100, 3.13), (200, 6.26), (200, 9.10), (float('inf'), 11.97)],
+        "fixed_charge": 45,
+        "fac": 0.18,
+        "duty_pct": 0.16,
+        "color": "#f39c12"
+    },
+    "BEST": {
+        "full_name": "BEST (Brihanmumbai Electric Supply)",
+        "slabs": [(100, 2.80), (200, 5.90), (200, 8.50), (float('inf'), 11.20)],
+        "fixed_charge": 25,
+        "fac": 0.10,
+        "duty_pct": 0.16,
+        "color": "#27ae60"
+    },
+}
+
+# ─────────────────────────────────────────────
+# COMPILED TARIFFS
+# ─────────────────────────────────────────────
+@dataclass(frozen=True)
+class CompiledTariff:
+    """
+    Immutable, precomputed view of one supplier's tariff.
+    Slab k covers (floors[k], ceilings[k]] kWh at rates[k] per unit;
+    base_charges[k] is the energy charge for consuming exactly floors[k].
+    """
+    name:         str
+    full_name:    str
+    color:        str
+    floors:       tuple
+    ceilings:     tuple
+    rates:        tuple
+    base_charges: tuple
+    fixed_charge: float
+    fac:          float
+    duty_pct:     float
+
+    @classmethod
+    def compile(cls, name, spec):
+        floors, ceilings, base_charges = [], [], []
+        ceiling, charge = 0.0, 0.0
+        for width, rate in spec["slabs"]:
+            floors.append(ceiling)
+            base_charges.append(charge)
+            # Accumulated in slab order — the same float sequence as walking the slabs
+            charge += width * rate
+            ceiling += width
+            ceilings.append(ceiling)
+        return cls(
+            name=name,
+            full_name=spec["full_name"],
+            color=spec["color"],
+            floors=tuple(floors),
+            ceilings=tuple(ceilings),
+            rates=tuple(rate for _, rate in spec["slabs"]),
+            base_charges=tuple(base_charges),
+            fixed_charge=spec["fixed_charge"],
+            fac=spec["fac"],
+            duty_pct=spec["duty_pct"],
+        )
+
+    def slab_index(self, units):
+        """0-based slab that the last unit of ``units`` falls in."""
+        return min(bisect_left(self.ceilings, units), len(self.ceilings) - 1)
+
+    def energy_charge(self, units):
+        if units <= 0:
+            return 0.0
+        k = self.slab_index(units)
+        return self.base_charges[k] + (units - self.floors[k]) * self.rates[k]
+
+
+TARIFFS = MappingProxyType({name: CompiledTariff.compile(name, spec) for name, spec in SUPPLIERS.items()})
+
+
+def get_tariff(supplier):
+    """Compiled tariff for ``supplier``; unknown names fall back to MSEDCL."""
+    return TARIFFS.get(supplier, TARIFFS["MSEDCL"])
+
+
+# ─────────────────────────────────────────────
+# BILL CALCULATOR
+# ─────────────────────────────────────────────
+def calculate_bill(units, supplier="MSEDCL"):
+    t = get_tariff(supplier)
+    energy_charge = t.energy_charge(units)
+    fac = units * t.fac
+    fixed_charge = t.fixed_charge
+    # Electricity duty applies to energy + FAC + fixed (not just energy)
+    electricity_duty = (energy_charge + fac + fixed_charge) * t.duty_pct
+    total = energy_charge + fac + fixed_charge + electricity_duty
+    return {
+        "energy_charge": round(energy_charge, 2),
+        "fac": round(fac, 2),
+        "fixed_charge": fixed_charge,
+        "electricity_duty": round(electricity_duty, 2),
+        "total": round(total, 2)
+    }
+
+# ─────────────────────────────────────────────
+# BATCH BILL CALCULATOR
+# ─────────────────────────────────────────────
+_TARIFF_LIST    = list(TARIFFS.values())
+_SUPPLIER_INDEX = {t.name: i for i, t in enumerate(_TARIFF_LIST)}
+_FAC            = np.array([t.fac for t in _TARIFF_LIST], dtype=float)
+_FIXED          = np.array([t.fixed_charge for t in _TARIFF_LIST], dtype=float)
+_DUTY_PCT       = np.array([t.duty_pct for t in _TARIFF_LIST], dtype=float)
+_CEILINGS       = [np.array(t.ceilings) for t in _TARIFF_LIST]
+_FLOORS         = [np.array(t.floors) for t in _TARIFF_LIST]
+_RATES          = [np.array(t.rates) for t in _TARIFF_LIST]
+_BASE_CHARGES   = [np.array(t.base_charges) for t in _TARIFF_LIST]
+
+
+def _energy_charges(units, tariff_idx):
+    """Vectorised CompiledTariff.energy_charge — searchsorted + one multiply-add."""
+    energy = np.zeros(units.shape)
+    for i in np.unique(tariff_idx):
+        mask = (tariff_idx == i) & (units > 0)
+        u = units[mask]
+        k = np.minimum(np.searchsorted(_CEILINGS[i], u, side="left"), len(_CEILINGS[i]) - 1)
+        energy[mask] = _BASE_CHARGES[i][k] + (u - _FLOORS[i][k]) * _RATES[i][k]
+    return energy
+
+
+def calculate_bills(units, supplier="MSEDCL"):
+    """
+    Vectorised calculate_bill. ``units`` is any array-like of kWh values;
+    ``supplier`` is one name or an array-like of names, one per element
+    (unknown names fall back to MSEDCL, as in calculate_bill).
+    Returns a dict of float arrays with the same keys as calculate_bill.
+    """
+    units = np.asarray(units, dtype=float)
+    if isinstance(supplier, str):
+        idx = np.full(units.shape, _SUPPLIER_INDEX.get(supplier, 0))
+    else:
+        names, inverse = np.unique(np.asarray(supplier), return_inverse=True)
+        idx = np.array([_SUPPLIER_INDEX.get(n, 0) for n in names], dtype=int)[inverse].reshape(units.shape)
+    energy_charge    = _energy_charges(units, idx)
+    fac              = units * _FAC[idx]
+    fixed_charge     = _FIXED[idx]
+    electricity_duty = (energy_charge + fac + fixed_charge) * _DUTY_PCT[idx]
+    total            = energy_charge + fac + fixed_charge + electricity_duty
+    return {
+        "energy_charge":    round_like_python(energy_charge, 2),
+        "fac":              round_like_python(fac, 2),
+        "fixed_charge":     fixed_charge,
+        "electricity_duty": round_like_python(electricity_duty, 2),
+        "total":            round_like_python(total, 2),
+    }
@@ -0,0 +1,135 @@
+"""
+Season-aware scrolling alerts shown above every page.
+
+The ticker sits above the page dispatch, so the app asks for it on every
+rerun of every page. Its text only depends on the user's electricity data,
+their supplier and the calendar month, so alerts are cached under
+``(username, supplier, year, month, user_generation)`` — the generation
+changes on every write, which makes the old entry unreachable.
+"""
+from datetime import date
+
+import pandas as pd
+
+from voltiq.cache import TTLCache, data_cache
+from voltiq.constants import CO2_FACTOR
+from voltiq.store import load_user_history, load_year_summary, user_generation
+from voltiq.tariff import calculate_bill, get_tariff
+
+# Same TTL as the row cache, so writes from other processes still show up
+ticker_cache = TTLCache(maxsize=1024, ttl=data_cache.ttl)
+
+
+def build_ticker_alerts(username, supplier, today=None):
+    """
+    Season-aware scrolling alerts — short and punchy. Returns
+    (alerts, store_reads), the latter being the store lookups it made.
+    """
+    today = today or date.today()
+    alerts = []
+    current_month = today.month - 1  # 0-indexed
+    is_summer  = current_month in [2,3,4,5]
+    is_monsoon = current_month in [6,7,8]
+    is_winter  = current_month in [10,11,0,1]
+
+    # 3 short season tips
+    if is_summer:
+        alerts += ["☀️ Summer: Set AC to 24°C — saves 24% vs 18°C",
+                   "☀️ Use fan + AC together — raise temp by 2°C with same comfort",
+                   "☀️ AC sleep timer: auto-off saves ~35 kWh/month"]
+    elif is_monsoon:
+        alerts += ["🌧️ Monsoon: Use fan-only mode before switching AC on",
+                   "🌧️ Washing machine — full loads only, clothes dry slower now",
+                   "🌧️ Cool rainy days — switch off AC, open windows"]
+    else:
+        alerts += ["❄️ Winter: Geyser on 15 min before use, off immediately after",
+                   "❄️ No need for AC this month — switch off at MCB",
+                   "❄️ Geyser left on all day costs ~Rs 115/day"]
+
+    # Last bill data — this year, else last year; history is already month-ordered
+    history = load_user_history(username)
+    store_reads = 1
+    year = today.year
+    rows = [r[1:] for r in history if r[0] == year]
+    if not rows:
+        year -= 1
+        rows = [r[1:] for r in history if r[0] == year]
+
+    if rows:
+        df_t = pd.DataFrame(rows, columns=["Month","Units","Bill","Rate"])
+        last = df_t.iloc[-1]
+        units, bill, month = last["Units"], last["Bill"], last["Month"]
+
+        # Slab + saving — what the bill would be if usage stopped at this slab's floor
+        tariff = get_tariff(supplier)
+        slab   = tariff.slab_index(units)
+        if slab > 0:
+            s = round(bill - calculate_bill(tariff.floors[slab], supplier)["total"], 0)
+        if slab >= 3:
+            tip = "Raise AC to 24°C" if is_summer else ("Cut geyser to 30 min" if is_winter else "Avoid AC + geyser together")
+            alerts.append(f"🔴 {month}: Rs {bill:.0f} · Slab {slab + 1} · Save Rs {s:.0f} → {tip}")
+        elif slab == 2:
+            tip = "AC sleep timer on" if is_summer else ("Geyser off after use" if is_winter else "Unplug standby devices")
+            alerts.append(f"🟠 {month}: Rs {bill:.0f} · Slab 3 · Save Rs {s:.0f} → {tip}")
+        elif slab == 1:
+            alerts.append(f"🟡 {month}: Rs {bill:.0f} · Slab 2 · Save Rs {s:.0f} → Use daylight, off fans in empty rooms")
+        else:
+            alerts.append(f"✅ {month}: Rs {bill:.0f} · Slab 1 · Great efficiency!")
+
+        # vs previous month
+        if len(df_t) >= 2:
+            prev = df_t.iloc[-2]
+            diff = round(bill - prev["Bill"], 0)
+            if diff > 0:
+                alerts.append(f"📈 Bill up Rs {diff:.0f} vs {prev['Month']} · {month}: Rs {bill:.0f}")
+            elif diff < 0:
+                alerts.append(f"📉 Bill down Rs {abs(diff):.0f} vs {prev['Month']} · Saved Rs {abs(diff):.0f}!")
+
+        # CO2
+        co2 = round(units * CO2_FACTOR, 1)
+        alerts.append(f"🌍 {month} CO₂: {co2} kg · {co2/22:.1f} trees/yr to offset")
+
+        # Yearly total
+        year_summary = load_year_summary(username, year)
+        store_reads += 1
+        if year_summary and year_summary["months"] >= 6:
+            alerts.append(f"📊 {year_summary['months']} months · Rs {year_summary['total_bill']:.0f} total this year")
+
+    else:
+        alerts.append("👋 Enter your first bill to get personalised alerts")
+
+    return alerts, store_reads
+
+
+def _ticker_key(username, supplier, today):
+    return ("ticker", username, supplier, today.year, today.month, user_generation(username))
+
+
+def load_ticker_alerts(username, supplier, today=None):
+    """
+    build_ticker_alerts(), cached until the user's data, supplier or the
+    calendar month changes. Returns (alerts, store_reads_saved); the second
+    value is 0 when the alerts had to be built.
+    """
+    today = today or date.today()
+    # Read the generation before building, so a write that lands mid-build
+    # leaves the entry under a key nobody asks for again
+    key   = _ticker_key(username, supplier, today)
+    entry = ticker_cache.get(key)
+    if entry is not None:
+        return entry[0], entry[1]
+    alerts, store_reads = build_ticker_alerts(username, supplier, today)
+    ticker_cache.set(key, (alerts, store_reads))
+    return alerts, 0
+
+
+def ticker_reads(username, supplier, today=None):
+    """
+    The store reads load_ticker_alerts() will make, as ``(fn, *args)`` calls
+    for a prefetch batch — none while the cached alerts are still current.
+    """
+    today = today or date.today()
+    # A peek: the lookup that counts is load_ticker_alerts()'s
+    if _ticker_key(username, supplier, today) in ticker_cache:
+        return []
+    return [(load_user_history, username), (load_year_summary, username, today.year)]